@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Booking, BookingLine
+from django.db import transaction
+from .models import Booking, BookingLine, SalesRollup, sale_revenue
+from event.models import Event
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
@@ -13,8 +15,45 @@ class BookingAdmin(admin.ModelAdmin):
 @admin.register(BookingLine)
 class BookingLineAdmin(admin.ModelAdmin):
   
-  list_display = ("booking", "event", "buy_key", "qr_code_thumbnail")
+  list_display = ("booking", "event", "buy_key", "qr_code_thumbnail", "admitted_at")
   ordering = ("booking__booking_date", "event__date", "event__start_time")
-  readonly_fields = ("buy_key", "qr_code", "qr_code_image", "qr_code_thumbnail")
+  readonly_fields = ("buy_key", "qr_code", "qr_code_image", "qr_code_thumbnail", "admitted_at")
   search_fields = ("booking__person__firstname", "booking__person__lastname")
-  search_help_text = "Prénom et/ou Nom du client"
\ No newline at end of file
+  search_help_text = "Prénom et/ou Nom du client"
+
+  def save_model(self, request, obj: BookingLine, form, change: bool) -> None:
+
+    """
+    Enregistre la ligne de réservation et répercute ses places sur le compteur de places réservées des événements et
+    sur les cumuls des ventes.
+    Args:
+      request: La requête HTTP de l'interface d'administration.
+      obj (BookingLine): La ligne de réservation à enregistrer.
+      form: Le formulaire de l'interface d'administration.
+      change (bool): Indique s'il s'agit d'une modification d'une ligne existante.
+    """
+    seats_changed = not change or bool({"event", "offer"} & set(form.changed_data))
+    sales_changed = seats_changed or "booking" in form.changed_data
+
+    with transaction.atomic():
+
+      # Libère les places et retire des cumuls l'ancienne combinaison réservation / événement / offre
+      if change and sales_changed:
+
+        previous = BookingLine.objects.select_related("booking", "event", "offer").get(pk=obj.pk)
+        SalesRollup.objects.record([previous], sign=-1)
+
+        if seats_changed:
+          Event.objects.release_booked_seats(previous.event_id, previous.offer.number_seats)
+
+      # Une nouvelle combinaison événement / offre est une nouvelle vente, au prix et à la réduction du moment
+      if change and seats_changed:
+        obj.amount = sale_revenue(obj.event.price, obj.offer)
+
+      super().save_model(request, obj, form, change)
+
+      if sales_changed:
+        SalesRollup.objects.record([obj])
+
+      if seats_changed:
+        Event.objects.add_booked_seats({obj.event_id: obj.offer.number_seats})
@@ -1,13 +1,26 @@
+import uuid
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
 from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
-from .models import Booking, BookingLine
-from .serializers import PaymentSerializer
-from event.models import Event
+from rest_framework.settings import APISettings
+from rest_framework.views import APIView
+from . import qrcache, qrrender, qrsign
+from .gate import gate_index
+from .models import Booking, BookingLine, QrCodeJob, SalesRollup, SeatHold, sale_revenue
+from .serializers import BookingLineSerializer, OfflineScanSerializer, PaymentSerializer, ScanSerializer, SeatHoldSerializer
+from event.models import Event, InsufficientSeatsError
 from offer.models import Offer
+from offer.stats import invalidate_stats
+from user.models import Person
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -20,19 +33,306 @@ def process_payment(request: Request) -> Response:
   
   cart = serializer.validated_data['cart']
 
-  with transaction.atomic():
+  # Chargement groupé des événements du panier
+  events = Event.objects.in_bulk({item['id_event'] for item in cart})
 
-    booking = Booking.objects.create(person=request.user)
+  try:
 
-    for item in cart:
+    with transaction.atomic():
 
-      event = Event.objects.get(pk=item['id_event'])
-      offer = Offer.objects.get(pk=item['id_offer'])
+      # Les places et la réduction des offres sont lues en base dans la transaction, et non dans les tables de référence
+      # du processus, qui peuvent ne pas encore refléter une modification faite dans un autre processus
+      offers = Offer.objects.in_bulk({item['id_offer'] for item in cart})
 
-      BookingLine.objects.create(
-        booking=booking,
-        event=event,
-        offer=offer
-      )
+      # Rejet des identifiants inconnus
+      if any(item['id_event'] not in events or item['id_offer'] not in offers for item in cart):
+        return Response(
+          {"success": False, "errors": {"cart": ["Le panier contient un événement ou une offre inconnu."]}},
+          status=status.HTTP_400_BAD_REQUEST
+        )
+
+      # Verrouillage des réservations temporaires du panier, dont les places sont déjà décomptées
+      # Une réservation temporaire expirée n'est pas convertie : ses places sont réservées de nouveau, et les siennes
+      # libérées par `expire_holds`
+      hold_ids = [item['id_hold'] for item in cart if item.get('id_hold')]
+      holds = SeatHold.objects.select_for_update().filter(
+        person=request.user,
+        expires_at__gt=timezone.now()
+      ).in_bulk(hold_ids) if hold_ids else {}
+
+      converted_holds = []
+      seats_by_event = Counter()
+
+      for item in cart:
+
+        event = events[item['id_event']]
+        offer = offers[item['id_offer']]
+        hold = holds.pop(item.get('id_hold'), None)
+
+        if hold and hold.event_id == event.pk and hold.offer_id == offer.pk:
+          converted_holds.append(hold.pk)
+        else:
+          seats_by_event[event.pk] += offer.number_seats
+
+      # Réservation atomique des places du panier non couvertes par une réservation temporaire
+      Event.objects.allocate_seats(seats_by_event)
+      SeatHold.objects.filter(pk__in=converted_holds).delete()
+
+      booking = Booking.objects.create(person=request.user)
+      lines = []
+
+      for item in cart:
+
+        event = events[item['id_event']]
+        offer = offers[item['id_offer']]
+        line = BookingLine(booking=booking, event=event, offer=offer, amount=sale_revenue(event.price, offer))
+        # Le QR code est construit à partir de l'utilisateur déjà chargé, sans relire la personne de la réservation
+        line.generate_qr_code(request.user.pk)
+        lines.append(line)
+
+      BookingLine.objects.bulk_create(lines)
+      SalesRollup.objects.record(lines)
+      # L'enregistrement groupé n'envoie pas de signal `post_save` : les statistiques des ventes sont invalidées ici
+      invalidate_stats()
+
+      # Les images des QR codes sont générées après validation par le processus `render_qr_codes`, ou à la demande
+      if not settings.QR_CODE_ON_DEMAND:
+        QrCodeJob.objects.bulk_create([QrCodeJob(booking_line=line) for line in lines])
   
-    return Response({"success": True}, status=status.HTTP_201_CREATED)
\ No newline at end of file
+  except InsufficientSeatsError as error:
+    return Response(
+      {"success": False, "errors": {"cart": [f"Il ne reste que {error.available} place(s) pour l'événement {error.event_id}."]}},
+      status=status.HTTP_409_CONFLICT
+    )
+
+  return Response({"success": True}, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_seat_hold(request: Request) -> Response:
+
+  """
+  Réserve temporairement les places d'une offre pour un événement, pendant `SEAT_HOLD_TTL` secondes.
+
+  Args:
+    → request (HttpRequest) : L'objet de la requête HTTP contenant l'événement et l'offre à réserver.
+  Returns:
+    → Response : Une réponse JSON contenant la réservation temporaire créée avec un code de statut HTTP 201, ou les erreurs
+      avec un code de statut HTTP 400, 409 ou 429.
+  """
+  serializer = SeatHoldSerializer(data=request.data)
+
+  if not serializer.is_valid():
+    return Response({"success": False, "errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+  event = serializer.validated_data['event']
+  offer = serializer.validated_data['offer']
+
+  try:
+
+    with transaction.atomic():
+
+      # Le verrou de la personne sérialise ses demandes simultanées, qui ne peuvent pas dépasser ensemble le maximum
+      list(Person.objects.select_for_update().filter(pk=request.user.pk).values_list('pk', flat=True))
+      now = timezone.now()
+
+      if SeatHold.objects.filter(person=request.user, expires_at__gt=now).count() >= settings.SEAT_HOLD_MAX_PER_PERSON:
+        return Response(
+          {"success": False, "errors": {"hold": ["Nombre maximal de réservations temporaires atteint."]}},
+          status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+      Event.objects.allocate_seats({event.pk: offer.number_seats})
+      hold = serializer.save(person=request.user, expires_at=now + timedelta(seconds=settings.SEAT_HOLD_TTL))
+
+  except InsufficientSeatsError as error:
+    return Response(
+      {"success": False, "errors": {"hold": [f"Il ne reste que {error.available} place(s) pour l'événement {error.event_id}."]}},
+      status=status.HTTP_409_CONFLICT
+    )
+
+  return Response(SeatHoldSerializer(hold).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def cancel_seat_hold(request: Request, hold_id: uuid.UUID) -> Response:
+
+  """
+  Annule une réservation temporaire de l'utilisateur authentifié et libère ses places.
+
+  Args:
+    → request (HttpRequest) : L'objet de la requête HTTP.
+    → hold_id (UUID) : L'identifiant de la réservation temporaire.
+  Returns:
+    → Response : Une réponse vide avec un code de statut HTTP 204, ou HTTP 404 si la réservation temporaire n'existe pas.
+  """
+  if not SeatHold.objects.filter(pk=hold_id, person=request.user).release():
+    return Response({"success": False}, status=status.HTTP_404_NOT_FOUND)
+
+  return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def ticket_list(request: Request) -> Response:
+
+  """
+  Récupère les billets de l'utilisateur authentifié, avec l'état de génération de l'image de leur QR code.
+
+  Args:
+    → request (HttpRequest) : L'objet de la requête HTTP.
+  Returns:
+    → Response : Une réponse JSON contenant la liste sérialisée des lignes de réservation avec un code de statut HTTP 200.
+  """
+  lines = BookingLine.objects.filter(booking__person=request.user).select_related(
+    'booking', 'event__sport', 'event__location', 'offer'
+  ).order_by('event__date', 'event__start_time', 'booking__booking_date')
+  serializer = BookingLineSerializer(lines, many=True)
+  return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+
+class QrCodeContentNegotiation(DefaultContentNegotiation):
+
+  """
+  Négociation du contenu des images des QR codes : le paramètre `format` y choisit le format de l'image, et non le
+  format de la réponse comme dans le reste de l'API.
+  """
+  settings = APISettings(user_settings={"URL_FORMAT_OVERRIDE": None})
+
+
+
+
+class TicketQrCodeView(APIView):
+
+  permission_classes = [IsAuthenticated]
+  content_negotiation_class = QrCodeContentNegotiation
+
+  def get(self, request: Request, line_id: uuid.UUID) -> HttpResponse:
+
+    """
+    Retourne l'image du QR code d'un billet de l'utilisateur authentifié, générée à la demande à partir de son contenu.
+    Le format est choisi par le paramètre `format` (`png`, `png8` ou `svg`), par défaut celui de `QR_CODE_FORMAT`.
+    L'image ne dépendant que de son contenu, elle est servie avec une `ETag` forte et peut être conservée indéfiniment
+    par le navigateur.
+
+    Args:
+      → request (HttpRequest) : L'objet de la requête HTTP.
+      → line_id (UUID) : L'identifiant de la ligne de réservation.
+    Returns:
+      → HttpResponse : L'image avec un code de statut HTTP 200, HTTP 304 si l'`ETag` envoyée correspond,
+        ou une réponse JSON avec un code de statut HTTP 400 si le format est inconnu, ou HTTP 404 si le billet
+        n'appartient pas à l'utilisateur.
+    """
+    fmt = request.query_params.get('format', settings.QR_CODE_FORMAT)
+
+    if fmt not in qrrender.FORMATS:
+      return Response(
+        {"success": False, "errors": {"format": [f"Format inconnu, formats disponibles : {', '.join(qrrender.FORMATS)}."]}},
+        status=status.HTTP_400_BAD_REQUEST
+      )
+
+    payload = BookingLine.objects.filter(pk=line_id, booking__person=request.user).values_list('qr_code', flat=True).first()
+
+    if payload is None:
+      return Response({"success": False}, status=status.HTTP_404_NOT_FOUND)
+
+    etag = f'"{qrcache.image_key(payload, fmt)}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+
+    if etag in [tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")]:
+      return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return HttpResponse(qrcache.image_cache().get(payload, fmt), content_type=qrrender.FORMATS[fmt][1], headers=headers)
+
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def scan_tickets(request: Request, event_id: int) -> Response:
+
+  """
+  Contrôle un lot de billets scannés à l'entrée d'un événement et enregistre leur première entrée.
+  Les QR codes signés sont vérifiés par leur signature et les QR codes historiques recherchés dans l'index en mémoire
+  de l'événement : seuls les billets valides sont ensuite verrouillés et admis en base de données.
+
+  Args:
+    → request (HttpRequest) : L'objet de la requête HTTP contenant la liste `scans` des QR codes scannés.
+    → event_id (int) : L'identifiant de l'événement.
+  Returns:
+    → Response : Une réponse JSON contenant l'état de chaque scan ("admitted", "duplicate" ou "invalid"), dans l'ordre
+      du lot, avec un code de statut HTTP 200, ou HTTP 400 si le lot est invalide, ou HTTP 404 si l'événement
+      n'existe pas (vérifié uniquement pour les QR codes historiques, les autres étant contrôlés sans requête).
+  """
+  serializer = ScanSerializer(data=request.data)
+
+  if not serializer.is_valid():
+    return Response({"success": False, "errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+  scans = serializer.validated_data['scans']
+  known, legacy = qrsign.partition(scans, event_id)
+
+  if legacy:
+
+    indexed = gate_index().lookup(event_id, legacy)
+
+    if indexed is None:
+      return Response({"success": False}, status=status.HTTP_404_NOT_FOUND)
+
+    known |= indexed
+
+  states = BookingLine.objects.filter(event_id=event_id).admit(list(known)) if known else {}
+  results = []
+  seen = set()
+
+  for qr_code in scans:
+
+    # Un billet scanné plusieurs fois dans le même lot n'est admis qu'une fois
+    state = "duplicate" if qr_code in seen and qr_code in states else states.get(qr_code, "invalid")
+    seen.add(qr_code)
+    results.append({"qr_code": qr_code, "status": state})
+
+  return Response({"success": True, "results": results}, status=status.HTTP_200_OK)
+
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def upload_offline_scans(request: Request, event_id: int) -> Response:
+
+  """
+  Fusionne le journal des entrées enregistrées par un scanner hors ligne avec les entrées de l'événement.
+  L'envoi est idempotent : la plus ancienne date d'entrée de chaque billet est conservée.
+
+  Args:
+    → request (HttpRequest) : L'objet de la requête HTTP contenant la liste `admissions` des entrées hors ligne.
+    → event_id (int) : L'identifiant de l'événement.
+  Returns:
+    → Response : Une réponse JSON contenant l'état de chaque billet ("admitted", "duplicate" ou "invalid") avec un code
+      de statut HTTP 200, ou HTTP 400 si le journal est invalide, ou HTTP 404 si l'événement n'existe pas.
+  """
+  serializer = OfflineScanSerializer(data=request.data)
+
+  if not serializer.is_valid():
+    return Response({"success": False, "errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+  if not Event.objects.filter(pk=event_id).exists():
+    return Response({"success": False}, status=status.HTTP_404_NOT_FOUND)
+
+  # Un billet présent plusieurs fois dans le journal ne garde que sa première entrée
+  admissions = {}
+  for admission in serializer.validated_data['admissions']:
+    qr_code, admitted_at = admission['qr_code'], admission['admitted_at']
+    admissions[qr_code] = min(admitted_at, admissions.get(qr_code, admitted_at))
+
+  # Les QR codes signés falsifiés ou destinés à un autre événement sont écartés sans requête
+  signed, legacy = qrsign.partition(admissions, event_id)
+  states = BookingLine.objects.filter(event_id=event_id).merge_admissions(
+    {qr_code: admissions[qr_code] for qr_code in [*signed, *legacy]}
+  )
+  results = [{"qr_code": qr_code, "status": states.get(qr_code, "invalid")} for qr_code in admissions]
+
+  return Response({"success": True, "results": results}, status=status.HTTP_200_OK)
@@ -9,6 +9,9 @@ class BookingConfig(AppConfig):
   def ready(self):
     
     """
-    Importe les gestionnaires de signaux pour l'application.
+    Importe les gestionnaires de signaux pour l'application et vérifie les clés de signature des QR codes.
     """
-    import booking.signals
\ No newline at end of file
+    import booking.signals
+    from booking.qrsign import check_keys
+
+    check_keys()
\ No newline at end of file
@@ -0,0 +1,237 @@
+import hashlib
+import mmap
+import struct
+import threading
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime, timedelta
+from functools import cache
+from typing import Iterable
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from .models import BookingLine
+from event.models import Event
+
+# En-tête des instantanés hors ligne : signature, version, événement, date d'export (horodatage Unix) et nombre de billets.
+# Il occupe 32 octets, ce qui aligne le tableau trié des empreintes de 64 bits qui le suit.
+SNAPSHOT_HEADER = struct.Struct("<8sIIqQ")
+SNAPSHOT_MAGIC = b"JOGATE\0\0"
+SNAPSHOT_VERSION = 1
+
+def ticket_hash(qr_code: str) -> int:
+
+  """
+  Calcule l'empreinte de 64 bits d'un QR code, stockée dans les instantanés hors ligne à la place de son contenu.
+
+  Args:
+    qr_code (str): Le contenu du QR code.
+  Returns:
+    int: L'empreinte BLAKE2b de 8 octets, lue comme un entier non signé petit-boutiste.
+  """
+  return int.from_bytes(hashlib.blake2b(qr_code.encode(), digest_size=8).digest(), "little")
+
+
+def write_snapshot(file, event_id: int, qr_codes: Iterable[str]) -> int:
+
+  """
+  Écrit l'instantané hors ligne des billets valides d'un événement : l'en-tête, puis le tableau trié des empreintes.
+
+  Args:
+    file: Le fichier binaire de destination, ouvert en écriture.
+    event_id (int): L'identifiant de l'événement.
+    qr_codes (Iterable[str]): Les contenus des QR codes des billets valides.
+  Returns:
+    int: Le nombre d'empreintes écrites.
+  """
+  hashes = np.unique(np.fromiter((ticket_hash(qr_code) for qr_code in qr_codes), dtype="<u8"))
+
+  file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, event_id, int(time.time()), len(hashes)))
+  file.write(hashes.tobytes())
+
+  return len(hashes)
+
+
+
+
+class GateSnapshot:
+
+  """
+  Lecteur d'un instantané hors ligne, projeté en mémoire : la recherche d'un billet est une recherche dichotomique
+  dans le tableau trié des empreintes, sans lecture préalable du fichier.
+  """
+  def __init__(self, path: str):
+
+    with open(path, "rb") as file:
+      self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, self.event_id, exported_at, count = SNAPSHOT_HEADER.unpack_from(self._mmap)
+
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+      self._mmap.close()
+      raise ValueError(f"{path} n'est pas un instantané de contrôle des billets valide.")
+
+    self.exported_at = datetime.fromtimestamp(exported_at, tz=UTC)
+    self.hashes = np.frombuffer(self._mmap, dtype="<u8", count=count, offset=SNAPSHOT_HEADER.size)
+
+  def __len__(self) -> int:
+
+    """
+    Retourne le nombre de billets de l'instantané.
+    """
+    return len(self.hashes)
+
+  def __contains__(self, qr_code: str) -> bool:
+
+    """
+    Indique si le QR code correspond à un billet valide de l'événement.
+    """
+    return bool(self.contains([qr_code])[0])
+
+  def contains(self, qr_codes: Iterable[str]) -> np.ndarray:
+
+    """
+    Recherche un lot de QR codes dans l'instantané.
+    Args:
+      qr_codes (Iterable[str]): Les contenus des QR codes scannés.
+    Returns:
+      np.ndarray : Un tableau booléen, vrai pour les billets valides, dans l'ordre des QR codes fournis.
+    """
+    wanted = np.fromiter((ticket_hash(qr_code) for qr_code in qr_codes), dtype="<u8")
+    positions = np.searchsorted(self.hashes, wanted).clip(max=max(len(self.hashes) - 1, 0))
+
+    return self.hashes[positions] == wanted if len(self.hashes) else np.zeros(len(wanted), dtype=bool)
+
+  def close(self) -> None:
+
+    """
+    Libère la projection en mémoire du fichier.
+    """
+    self.hashes = None
+    self._mmap.close()
+
+  def __enter__(self) -> "GateSnapshot":
+
+    """
+    Permet d'utiliser l'instantané comme gestionnaire de contexte.
+    """
+    return self
+
+  def __exit__(self, *exc_info) -> None:
+
+    """
+    Ferme l'instantané à la sortie du gestionnaire de contexte.
+    """
+    self.close()
+
+
+
+
+class GateIndex:
+
+  """
+  Index en mémoire, par événement, des contenus de QR code des billets valides.
+  Les billets inconnus de l'index sont rejetés sans requête ; l'index d'un événement n'est complété, avec les billets
+  achetés depuis son dernier chargement, qu'au plus une fois toutes les `GATE_INDEX_REFRESH` secondes. Seuls les
+  `GATE_INDEX_MAX_EVENTS` événements contrôlés le plus récemment sont conservés.
+  """
+  def __init__(self):
+
+    self._events = OrderedDict()
+    self._lock = threading.Lock()
+
+  def warm(self, event_ids: list[int] | None = None) -> int:
+
+    """
+    Charge l'index des événements donnés, par défaut ceux du jour.
+    Args:
+      event_ids (list[int] | None): Les identifiants des événements à charger.
+    Returns:
+      int : Le nombre de billets chargés.
+    """
+    if event_ids is None:
+      event_ids = Event.objects.filter(date=timezone.localdate()).values_list('pk', flat=True)
+
+    return sum(len(self._load(event_id)[0]) for event_id in event_ids)
+
+  def lookup(self, event_id: int, qr_codes: list[str]) -> set[str] | None:
+
+    """
+    Retourne les QR codes scannés présents dans l'index de l'événement, complété si l'un d'eux est inconnu.
+    Args:
+      event_id (int): L'identifiant de l'événement.
+      qr_codes (list[str]): Les contenus des QR codes scannés.
+    Returns:
+      set[str] | None : Les QR codes connus de l'événement, ou None si l'événement n'existe pas.
+    """
+    with self._lock:
+      entry = self._events.get(event_id)
+      if entry is not None:
+        self._events.move_to_end(event_id)
+
+    entry = entry or self._load(event_id)
+
+    if entry is None:
+      return None
+
+    known, refreshed, _ = entry
+
+    if not known.issuperset(qr_codes) and time.monotonic() - refreshed >= settings.GATE_INDEX_REFRESH:
+      known = self._refresh(event_id)
+
+    return known.intersection(qr_codes)
+
+  def _load(self, event_id: int) -> tuple[set[str], float, datetime] | None:
+
+    """
+    Charge l'ensemble des QR codes d'un événement, avec les instants de son chargement, et retire de l'index les
+    événements contrôlés le moins récemment au-delà de `GATE_INDEX_MAX_EVENTS`.
+    """
+    if not Event.objects.filter(pk=event_id).exists():
+      return None
+
+    entry = (set(), time.monotonic(), timezone.now())
+    entry[0].update(BookingLine.objects.filter(event_id=event_id).values_list('qr_code', flat=True))
+
+    with self._lock:
+      self._events[event_id] = entry
+      self._events.move_to_end(event_id)
+      while len(self._events) > settings.GATE_INDEX_MAX_EVENTS:
+        self._events.popitem(last=False)
+
+    return entry
+
+  def _refresh(self, event_id: int) -> set[str]:
+
+    """
+    Complète l'index d'un événement avec les billets achetés depuis son dernier chargement.
+    La fenêtre de recouvrement couvre les paiements dont la transaction était encore en cours lors du chargement.
+    """
+    with self._lock:
+      entry = self._events.get(event_id)
+      if entry is not None:
+        known, _, since = entry
+        self._events[event_id] = (known, time.monotonic(), timezone.now())
+
+    # Événement retiré de l'index depuis sa lecture : il est rechargé en entier
+    if entry is None:
+      entry = self._load(event_id)
+      return entry[0] if entry else set()
+
+    known.update(
+      BookingLine.objects.filter(
+        event_id=event_id,
+        booking__booking_date__gte=since - timedelta(seconds=settings.GATE_INDEX_OVERLAP)
+      ).values_list('qr_code', flat=True)
+    )
+
+    return known
+
+
+@cache
+def gate_index() -> GateIndex:
+
+  """
+  Retourne l'index des billets valides du processus.
+  """
+  return GateIndex()
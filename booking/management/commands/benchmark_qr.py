@@ -0,0 +1,97 @@
+import time
+import uuid
+from io import BytesIO
+import numpy as np
+import qrcode
+from django.core.management.base import BaseCommand
+from PIL import Image
+from booking import qrrender
+
+def render_legacy_png(payload: str) -> bytes:
+
+  """
+  Génère l'image PNG d'un QR code avec l'implémentation historique de `BookingLine.save()`, conservée comme référence.
+
+  Args:
+    payload (str): Le contenu du QR code.
+  Returns:
+    bytes: Le contenu du fichier PNG.
+  """
+  qr = qrcode.QRCode(
+    version=1,
+    error_correction=qrcode.constants.ERROR_CORRECT_L,
+    box_size=10,
+    border=5
+  )
+  qr.add_data(payload)
+  qr.make(fit=True)
+  img = qr.make_image(fill_color="black", back_color="white").convert('RGBA')
+
+  width, height = img.size
+  start_color = np.array([0x4b, 0xb1, 0xd7, 255])
+  end_color = np.array([0xff, 0xbd, 0x59, 255])
+  gradient = np.zeros((height, width, 4), dtype=np.uint8)
+  for x in range(width):
+    ratio = x / (width - 1)
+    color = (1 - ratio) * start_color + ratio * end_color
+    gradient[:, x, :] = color
+
+  qr_array = np.array(img)
+  mask = (qr_array[:, :, 0:3] == [0, 0, 0]).all(axis=2)
+  qr_array[mask] = gradient[mask]
+  img_gradient = Image.fromarray(qr_array, "RGBA")
+
+  buffer = BytesIO()
+  img_gradient.save(buffer, format='PNG')
+
+  return buffer.getvalue()
+
+
+
+
+class Command(BaseCommand):
+
+  help = (
+    "Mesure le nombre d'images de QR code générées par seconde et leur taille, avant et après le moteur "
+    "`booking.qrrender`, pour chaque format de sortie."
+  )
+
+  def add_arguments(self, parser) -> None:
+
+    """
+    Déclare les options de la commande.
+    """
+    parser.add_argument("--count", default=200, type=int, help="Nombre de billets générés par mesure.")
+
+  def handle(self, *args, **options) -> None:
+
+    """
+    Génère le même lot de contenus de QR code avec chaque implémentation et affiche le débit et la taille obtenus.
+    """
+    payloads = [f"{uuid.uuid4()}|{uuid.uuid4()}" for _ in range(options["count"])]
+
+    measures = [
+      ("Implémentation historique", lambda: [render_legacy_png(payload) for payload in payloads]),
+      ("qrrender.render_png", lambda: [qrrender.render_png(payload) for payload in payloads]),
+      *(
+        (f"qrrender.render_batch ({fmt})", lambda fmt=fmt: qrrender.render_batch(payloads, fmt))
+        for fmt in qrrender.FORMATS
+      )
+    ]
+
+    self.stdout.write(f"{'Implémentation':<32} | {'Billets/s':>10} | {'ms/billet':>10} | {'octets/billet':>13}")
+    baseline = None
+
+    for label, render in measures:
+
+      start = time.perf_counter()
+      images = render()
+      elapsed = time.perf_counter() - start
+
+      rate = len(payloads) / elapsed
+      size = sum(map(len, images)) / len(images)
+      baseline = baseline or (rate, size)
+      self.stdout.write(
+        f"{label:<32} | {rate:>10.1f} | {1000 * elapsed / len(payloads):>10.2f} | {size:>13.0f}"
+        f"  (x{rate / baseline[0]:.2f}, {100 * size / baseline[1]:.0f} %)"
+      )
@@ -0,0 +1,43 @@
+import time
+from django.core.management.base import BaseCommand
+from booking.models import SeatHold
+
+class Command(BaseCommand):
+
+  help = "Supprime par lots les réservations temporaires expirées et libère leurs places."
+
+  def add_arguments(self, parser) -> None:
+
+    """
+    Déclare les options de la commande.
+    """
+    parser.add_argument("--batch-size", default=1000, type=int, help="Nombre de réservations temporaires supprimées par requête.")
+    parser.add_argument(
+      "--interval",
+      default=0,
+      type=float,
+      help="Délai, en secondes, entre deux passages. Si nul, la commande s'arrête après un seul passage."
+    )
+
+  def handle(self, *args, **options) -> None:
+
+    """
+    Expire les réservations temporaires lot par lot, une fois ou en boucle selon l'option `--interval`.
+    """
+    while True:
+
+      expired = 0
+
+      # Un lot incomplet signifie qu'il ne reste plus de réservation temporaire expirée non verrouillée
+      while (count := SeatHold.objects.expire(options["batch_size"])):
+        expired += count
+        if count < options["batch_size"]:
+          break
+
+      if expired:
+        self.stdout.write(f"{expired} réservation(s) temporaire(s) expirée(s).")
+
+      if not options["interval"]:
+        break
+
+      time.sleep(options["interval"])
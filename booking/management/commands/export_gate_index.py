@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from booking.gate import write_snapshot
+from booking.models import BookingLine
+from event.models import Event
+
+class Command(BaseCommand):
+
+  help = (
+    "Exporte l'instantané hors ligne des billets valides d'un événement : un fichier binaire contenant le tableau trié "
+    "des empreintes de 64 bits des QR codes, lisible par `booking.gate.GateSnapshot`."
+  )
+
+  def add_arguments(self, parser) -> None:
+
+    """
+    Déclare les arguments de la commande.
+    """
+    parser.add_argument("event_id", type=int, help="Identifiant de l'événement.")
+    parser.add_argument("--output", help="Fichier de destination, par défaut `gate_<event_id>.idx`.")
+    parser.add_argument("--batch-size", default=10000, type=int, help="Nombre de billets lus par requête.")
+
+  def handle(self, *args, **options) -> None:
+
+    """
+    Lit les QR codes de l'événement avec un curseur côté serveur et écrit l'instantané.
+    """
+    event_id = options["event_id"]
+
+    if not Event.objects.filter(pk=event_id).exists():
+      raise CommandError(f"L'événement {event_id} n'existe pas.")
+
+    output = options["output"] or f"gate_{event_id}.idx"
+    qr_codes = (
+      BookingLine.objects.filter(event_id=event_id)
+      .values_list('qr_code', flat=True)
+      .iterator(chunk_size=options["batch_size"])
+    )
+
+    with open(output, "wb") as file:
+      count = write_snapshot(file, event_id, qr_codes)
+
+    self.stdout.write(self.style.SUCCESS(f"{count} billet(s) exporté(s) dans {output}."))
@@ -0,0 +1,66 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections
+from booking.models import SalesRollup
+from event.models import Event
+from offer.stats import clear_stats
+
+def rebuild_event(event_id: int) -> int:
+
+  """
+  Recalcule les cumuls des ventes d'un événement, dans sa propre transaction.
+  Exécutée dans un fil de travail, dont la connexion à la base de données est fermée à la fin du calcul.
+
+  Args:
+    event_id (int): L'identifiant de l'événement.
+  Returns:
+    int: Le nombre de cumuls de l'événement.
+  """
+  try:
+    return SalesRollup.objects.rebuild(event_id)
+  finally:
+    connections.close_all()
+
+
+
+
+class Command(BaseCommand):
+
+  help = (
+    "Recalcule les cumuls des ventes par événement, offre et jour à partir des lignes de réservation, en parallèle par "
+    "événement. Les ventes enregistrées pendant la reconstruction restent comptées."
+  )
+
+  def add_arguments(self, parser) -> None:
+
+    """
+    Déclare les options de la commande.
+    """
+    parser.add_argument(
+      "--workers",
+      default=os.cpu_count(),
+      type=int,
+      help="Nombre de fils de calcul, chacun avec sa connexion. Si nul, les cumuls sont recalculés dans le fil courant."
+    )
+
+  def handle(self, *args, **options) -> None:
+
+    """
+    Recalcule les cumuls de chaque événement, un événement par transaction, puis invalide les statistiques des ventes.
+    """
+    started = time.perf_counter()
+    event_ids = list(Event.objects.order_by('pk').values_list('pk', flat=True))
+
+    if options["workers"]:
+      with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+        rollups = sum(executor.map(rebuild_event, event_ids))
+    else:
+      rollups = sum(map(SalesRollup.objects.rebuild, event_ids))
+
+    clear_stats()
+
+    self.stdout.write(self.style.SUCCESS(
+      f"{rollups} cumul(s) recalculé(s) pour {len(event_ids)} événement(s) en {time.perf_counter() - started:.1f} s."
+    ))
@@ -0,0 +1,155 @@
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import batched
+from multiprocessing import get_context
+import django
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from booking import qrrender
+from booking.models import BookingLine, QrCodeJob
+
+def render_chunk(chunk: tuple[tuple[uuid.UUID, str, str], ...]) -> list[tuple[uuid.UUID, str, str]]:
+
+  """
+  Génère et enregistre dans le stockage des médias les images d'un lot de QR codes, au format `QR_CODE_FORMAT`.
+  Exécutée dans un processus de travail : aucune requête n'est faite à la base de données.
+
+  Args:
+    chunk (tuple): Les triplets (identifiant de la ligne, contenu du QR code, ancienne image) du lot.
+  Returns:
+    list[tuple]: Les triplets (identifiant de la ligne, nouvelle image, ancienne image), dans l'ordre du lot.
+  """
+  field = BookingLine._meta.get_field('qr_code_image')
+  images = qrrender.render_batch((payload for _, payload, _ in chunk), settings.QR_CODE_FORMAT)
+  extension = qrrender.FORMATS[settings.QR_CODE_FORMAT][2]
+  results = []
+
+  for (pk, _, old_name), content in zip(chunk, images):
+    name = field.storage.save(field.generate_filename(None, f"{uuid.uuid4()}.{extension}"), ContentFile(content))
+    results.append((pk, name, old_name))
+
+  return results
+
+
+
+
+class Command(BaseCommand):
+
+  help = (
+    "Régénère les images des QR codes de toutes les lignes de réservation, en parallèle et par lots. "
+    "La commande reprend au dernier lot enregistré si elle est interrompue."
+  )
+
+  def add_arguments(self, parser) -> None:
+
+    """
+    Déclare les options de la commande.
+    """
+    parser.add_argument("--batch-size", default=500, type=int, help="Nombre de lignes par lot de génération et de mise à jour.")
+    parser.add_argument(
+      "--workers",
+      default=os.cpu_count(),
+      type=int,
+      help="Nombre de processus de génération. Si nul, les images sont générées dans le processus courant."
+    )
+    parser.add_argument(
+      "--checkpoint",
+      default="regenerate_qr.checkpoint",
+      help="Fichier de reprise contenant l'identifiant de la dernière ligne enregistrée, supprimé à la fin du traitement."
+    )
+    parser.add_argument("--restart", action="store_true", help="Ignore le fichier de reprise et repart de la première ligne.")
+
+  def handle(self, *args, **options) -> None:
+
+    """
+    Parcourt les lignes de réservation avec un curseur côté serveur, génère leurs images dans un pool de processus et
+    enregistre les nouvelles images par lots.
+    """
+    checkpoint = options["checkpoint"]
+    start_after = None
+
+    if os.path.exists(checkpoint) and not options["restart"]:
+      with open(checkpoint) as file:
+        start_after = uuid.UUID(file.read().strip())
+      self.stdout.write(f"Reprise après la ligne {start_after}.")
+
+    lines = BookingLine.objects.order_by('pk').values_list('pk', 'qr_code', 'qr_code_image')
+    if start_after:
+      lines = lines.filter(pk__gt=start_after)
+
+    chunks = batched(lines.iterator(chunk_size=options["batch_size"]), options["batch_size"])
+
+    processed = 0
+    started = time.perf_counter()
+
+    for results in self.render(chunks, options["workers"]):
+
+      self.store(results)
+
+      # Le fichier de reprise n'est écrit qu'après l'enregistrement du lot
+      with open(checkpoint, "w") as file:
+        file.write(str(results[-1][0]))
+
+      processed += len(results)
+      self.stdout.write(f"{processed} image(s) régénérée(s), {processed / (time.perf_counter() - started):.1f} image(s)/s")
+
+    if os.path.exists(checkpoint):
+      os.remove(checkpoint)
+
+    self.stdout.write(self.style.SUCCESS(f"{processed} image(s) régénérée(s) en {time.perf_counter() - started:.1f} s."))
+
+  def render(self, chunks, workers: int):
+
+    """
+    Génère les lots d'images, dans l'ordre, en gardant au plus deux lots en cours par processus de travail.
+    Args:
+      chunks: Les lots de triplets (identifiant, contenu du QR code, ancienne image) à générer.
+      workers (int): Le nombre de processus de génération, ou 0 pour générer dans le processus courant.
+    Yields:
+      list[tuple]: Les résultats de `render_chunk` pour chaque lot, dans l'ordre des lignes.
+    """
+    if not workers:
+      yield from map(render_chunk, chunks)
+      return
+
+    # Le démarrage par `spawn` évite de partager la connexion à la base de données avec les processus de travail
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"), initializer=django.setup) as executor:
+
+      pending = deque()
+
+      for chunk in chunks:
+
+        pending.append(executor.submit(render_chunk, chunk))
+
+        if len(pending) >= 2 * workers:
+          yield pending.popleft().result()
+
+      while pending:
+        yield pending.popleft().result()
+
+  def store(self, results: list[tuple[uuid.UUID, str, str]]) -> None:
+
+    """
+    Enregistre les nouvelles images d'un lot en une seule requête, puis supprime les anciens fichiers.
+    Args:
+      results (list[tuple]): Les triplets (identifiant de la ligne, nouvelle image, ancienne image) du lot.
+    """
+    with transaction.atomic():
+
+      BookingLine.objects.bulk_update(
+        [BookingLine(pk=pk, qr_code_image=name) for pk, name, _ in results],
+        ['qr_code_image']
+      )
+      # Les lignes encore en attente de génération n'ont plus besoin de leur tâche
+      QrCodeJob.objects.filter(booking_line__in=[pk for pk, _, _ in results]).delete()
+
+    storage = BookingLine._meta.get_field('qr_code_image').storage
+
+    for _, _, old_name in results:
+      if old_name:
+        storage.delete(old_name)
@@ -0,0 +1,42 @@
+import time
+from django.core.management.base import BaseCommand
+from booking.models import QrCodeJob
+
+class Command(BaseCommand):
+
+  help = "Génère les images des QR codes en attente dans la file des tâches de génération."
+
+  def add_arguments(self, parser) -> None:
+
+    """
+    Déclare les options de la commande.
+    """
+    parser.add_argument("--batch-size", default=50, type=int, help="Nombre de tâches réservées par transaction.")
+    parser.add_argument(
+      "--interval",
+      default=0,
+      type=float,
+      help="Délai, en secondes, d'attente lorsque la file est vide. Si nul, la commande s'arrête une fois la file vidée."
+    )
+
+  def handle(self, *args, **options) -> None:
+
+    """
+    Vide la file des tâches de génération, une fois ou en boucle selon l'option `--interval`.
+    """
+    while True:
+
+      processed = 0
+
+      while (count := QrCodeJob.objects.process(options["batch_size"])):
+        processed += count
+        if count < options["batch_size"]:
+          break
+
+      if processed:
+        self.stdout.write(f"{processed} tâche(s) de génération traitée(s).")
+
+      if not options["interval"]:
+        break
+
+      time.sleep(options["interval"])
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:36
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0001_initial"),
+        ("event", "0004_event_seat_shards"),
+        ("offer", "0001_initial"),
+        ("user", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeatHold",
+            fields=[
+                (
+                    "id_seat_hold",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(
+                        db_index=True, verbose_name="Date d'expiration"
+                    ),
+                ),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="event.event",
+                        verbose_name="Événement",
+                    ),
+                ),
+                (
+                    "offer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="offer.offer",
+                        verbose_name="Offre",
+                    ),
+                ),
+                (
+                    "person",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="user.person",
+                        verbose_name="Personne",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Réservation temporaire",
+                "verbose_name_plural": "Réservations temporaires",
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0002_seathold"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QrCodeJob",
+            fields=[
+                (
+                    "booking_line",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="booking.bookingline",
+                        verbose_name="Ligne de réservation",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        db_index=True,
+                        verbose_name="Date de création",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Tentatives"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Génération de QR code",
+                "verbose_name_plural": "Générations de QR code",
+            },
+        ),
+        migrations.AlterField(
+            model_name="bookingline",
+            name="qr_code_image",
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                upload_to="qr_codes",
+                verbose_name="Image du QR Code",
+            ),
+        ),
+    ]
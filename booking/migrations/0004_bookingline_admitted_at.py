@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0003_qrcodejob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookingline",
+            name="admitted_at",
+            field=models.DateTimeField(
+                editable=False, null=True, verbose_name="Date d'entrée"
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:54
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0004_bookingline_admitted_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="bookingline",
+            name="qr_code",
+            field=models.CharField(
+                editable=False,
+                max_length=100,
+                unique=True,
+                validators=[
+                    django.core.validators.RegexValidator(
+                        message="Le QR code doit être de la forme <UUID>|<UUID> ou <LIGNE>.<ÉVÉNEMENT>.<CLÉ>.<SIGNATURE>.",
+                        regex="^([0-9a-fA-F\\-]{36}\\|[0-9a-fA-F\\-]{36}|[0-9A-F]{32}\\.[0-9]+\\.[0-9A-Z]{1,8}\\.[0-9A-F]{16})$",
+                    )
+                ],
+                verbose_name="QR Code",
+            ),
+        ),
+    ]
@@ -0,0 +1,130 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:10
+
+import django.db.models.deletion
+from decimal import ROUND_HALF_UP, Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_amounts(apps, schema_editor):
+    BookingLine = apps.get_model("booking", "BookingLine")
+
+    lines = []
+    for line in BookingLine.objects.select_related("event", "offer").iterator(
+        chunk_size=1000
+    ):
+        line.amount = (
+            line.event.price
+            * line.offer.number_seats
+            * (100 - line.offer.discount)
+            / 100
+        ).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        lines.append(line)
+
+        if len(lines) == 1000:
+            BookingLine.objects.bulk_update(lines, ["amount"])
+            lines = []
+
+    BookingLine.objects.bulk_update(lines, ["amount"])
+
+
+def populate_sales_rollups(apps, schema_editor):
+    BookingLine = apps.get_model("booking", "BookingLine")
+    SalesRollup = apps.get_model("booking", "SalesRollup")
+
+    sales = (
+        BookingLine.objects.order_by()
+        .values("event_id", "offer_id", day=TruncDate("booking__booking_date"))
+        .annotate(
+            lines=Count("pk"), seats=Sum("offer__number_seats"), revenue=Sum("amount")
+        )
+    )
+    SalesRollup.objects.bulk_create(
+        [SalesRollup(**row) for row in sales.iterator()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0005_bookingline_signed_qr_code"),
+        ("event", "0005_event_schedule_indexes"),
+        ("offer", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookingline",
+            name="amount",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0"),
+                editable=False,
+                max_digits=8,
+                verbose_name="Montant (€)",
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_amounts, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name="SalesRollup",
+            fields=[
+                (
+                    "id_sales_rollup",
+                    models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                (
+                    "day",
+                    models.DateField(db_index=True, verbose_name="Jour de réservation"),
+                ),
+                (
+                    "lines",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Lignes de réservation"
+                    ),
+                ),
+                (
+                    "seats",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Places vendues"
+                    ),
+                ),
+                (
+                    "revenue",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0"),
+                        max_digits=12,
+                        verbose_name="Chiffre d'affaires (€)",
+                    ),
+                ),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="event.event",
+                        verbose_name="Événement",
+                    ),
+                ),
+                (
+                    "offer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="offer.offer",
+                        verbose_name="Offre",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Cumul des ventes",
+                "verbose_name_plural": "Cumuls des ventes",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("event", "offer", "day"), name="unique_sales_rollup"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_sales_rollups, migrations.RunPython.noop),
+    ]
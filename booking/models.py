@@ -1,13 +1,19 @@
-import numpy as np
-import qrcode
 import uuid
+from collections import Counter
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
+from functools import reduce
+from operator import or_
+from django.conf import settings
 from django.core.files.base import ContentFile
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.expressions import CombinedExpression
+from django.db.models.functions import TruncDate
 from django.utils import timezone
 from django.utils.html import format_html
-from io import BytesIO
-from PIL import Image
+from . import qrrender, qrsign
 from event.models import Event
 from offer.models import Offer
 from user.models import Person
@@ -48,6 +54,78 @@ class Booking(models.Model):
 
 
 
+class BookingLineQuerySet(models.QuerySet):
+
+  def admit(self, qr_codes: list[str]) -> dict[str, str]:
+
+    """
+    Enregistre atomiquement la première entrée des billets scannés parmi les lignes de réservation du queryset.
+    Les lignes sont verrouillées dans l'ordre de leur identifiant, ce qui garantit qu'un billet scanné au même instant
+    à deux portes n'est admis qu'une seule fois, puis les nouvelles entrées sont enregistrées en une seule requête.
+    Args:
+      qr_codes (list[str]): Les contenus des QR codes scannés, sans doublon.
+    Returns:
+      dict[str, str] : L'état de chaque QR code trouvé, "admitted" pour une première entrée, sinon "duplicate".
+    """
+    with transaction.atomic():
+
+      lines = (
+        self.select_for_update(of=('self',))
+        .filter(qr_code__in=qr_codes)
+        .order_by('pk')
+        .values_list('pk', 'qr_code', 'admitted_at')
+      )
+      results = {}
+      admitted = []
+
+      for pk, qr_code, admitted_at in lines:
+        results[qr_code] = "duplicate" if admitted_at else "admitted"
+        if not admitted_at:
+          admitted.append(pk)
+
+      if admitted:
+        BookingLine.objects.filter(pk__in=admitted).update(admitted_at=timezone.now())
+
+    return results
+
+  def merge_admissions(self, admissions: dict[str, datetime]) -> dict[str, str]:
+
+    """
+    Fusionne un journal d'entrées enregistrées hors ligne avec les entrées connues des lignes de réservation du queryset.
+    La plus ancienne date d'entrée est conservée, ce qui rend la fusion idempotente : un journal envoyé plusieurs fois,
+    ou par plusieurs portes, donne le même résultat.
+    Args:
+      admissions (dict[str, datetime]): La date d'entrée hors ligne de chaque QR code.
+    Returns:
+      dict[str, str] : L'état de chaque QR code trouvé, "admitted" s'il n'avait pas encore d'entrée, sinon "duplicate".
+    """
+    with transaction.atomic():
+
+      lines = list(
+        self.select_for_update(of=('self',))
+        .filter(qr_code__in=list(admissions))
+        .order_by('pk')
+        .only('pk', 'qr_code', 'admitted_at')
+      )
+      results = {}
+      changed = []
+
+      for line in lines:
+
+        offline = admissions[line.qr_code]
+        results[line.qr_code] = "duplicate" if line.admitted_at else "admitted"
+
+        if line.admitted_at is None or offline < line.admitted_at:
+          line.admitted_at = offline
+          changed.append(line)
+
+      BookingLine.objects.bulk_update(changed, ['admitted_at'])
+
+    return results
+
+
+
+
 class BookingLine(models.Model):
 
   id_booking_line = models.UUIDField(
@@ -57,18 +135,19 @@ class BookingLine(models.Model):
   )
   qr_code = models.CharField(
     editable=False,
-    max_length=73,
+    max_length=100,
     null=False,
     unique=True,
     validators=[
       RegexValidator(
-        regex=r'^[0-9a-fA-F\-]{36}\|[0-9a-fA-F\-]{36}$',
-        message="Le QR code doit être de la forme <UUID>|<UUID>."
+        regex=r'^([0-9a-fA-F\-]{36}\|[0-9a-fA-F\-]{36}|[0-9A-F]{32}\.[0-9]+\.[0-9A-Z]{1,8}\.[0-9A-F]{16})$',
+        message="Le QR code doit être de la forme <UUID>|<UUID> ou <LIGNE>.<ÉVÉNEMENT>.<CLÉ>.<SIGNATURE>."
       )
     ],
     verbose_name="QR Code"
   )
   qr_code_image = models.ImageField(
+    blank=True,
     editable=False,
     null=False,
     upload_to='qr_codes',
@@ -92,6 +171,20 @@ class BookingLine(models.Model):
     on_delete=models.CASCADE,
     verbose_name="Offre"
   )
+  amount = models.DecimalField(
+    decimal_places=2,
+    editable=False,
+    max_digits=8,
+    null=False,
+    verbose_name="Montant (€)"
+  )
+  admitted_at = models.DateTimeField(
+    editable=False,
+    null=True,
+    verbose_name="Date d'entrée"
+  )
+
+  objects = BookingLineQuerySet.as_manager()
 
   class Meta:
 
@@ -128,6 +221,10 @@ class BookingLine(models.Model):
 
     """
     Enregistre la ligne de réservation et génère un QR code unique avec son image pour cette ligne de réservation.
+    Le montant de la vente est fixé à la création, au prix et à la réduction du moment.
+    Le QR code d'une ligne existante n'est généré de nouveau que si la personne ou l'événement qu'il désigne a changé :
+    un billet déjà remis reste valide après une rotation des clés de signature.
+    L'image n'est pas enregistrée lorsque les QR codes sont générés à la demande (`QR_CODE_ON_DEMAND`).
 
     Args:
       *args: Arguments positionnels.
@@ -135,48 +232,68 @@ class BookingLine(models.Model):
     Returns:
       None
     """
-    # Génération du QR code
-    self.qr_code = f"{str(self.id_booking_line)}|{str(self.booking.person.id_person)}"
+    if self._state.adding:
+      self.amount = sale_revenue(self.event.price, self.offer)
 
-    # Génération de l'image du QR code
-    qr = qrcode.QRCode(
-      version=1,
-      error_correction=qrcode.constants.ERROR_CORRECT_L,
-      box_size=10,
-      border=5
-    )
-    qr.add_data(self.qr_code)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white").convert('RGBA')
-
-    # Création du gradient pour l'image du QR code
-    width, height = img.size
-    start_color = np.array([0x4b, 0xb1, 0xd7, 255])  # #4bb1d7
-    end_color = np.array([0xff, 0xbd, 0x59, 255])    # #ffbd59
-    gradient = np.zeros((height, width, 4), dtype=np.uint8)
-    for x in range(width):
-        ratio = x / (width - 1)
-        color = (1 - ratio) * start_color + ratio * end_color
-        gradient[:, x, :] = color
-    
-    # Application du gradient à l'image du QR code
-    qr_array = np.array(img)
-    mask = (qr_array[:, :, 0:3] == [0, 0, 0]).all(axis=2)
-    qr_array[mask] = gradient[mask]
-    img_gradient = Image.fromarray(qr_array, "RGBA")
-
-    # Conversion de l'image en format PNG et sauvegarde dans un buffer
-    buffer = BytesIO()
-    img_gradient.save(buffer, format='PNG')
-    random_filename = f"{uuid.uuid4()}.png"
+    if self._state.adding or not self.qr_code:
+      regenerate = True
+    else:
+      previous = BookingLine.objects.filter(pk=self.pk).values_list('booking__person_id', 'event_id').first()
+      regenerate = previous != (self.booking.person_id, self.event_id)
+
+    if regenerate:
+      self.generate_qr_code(self.booking.person_id)
+
+    if not settings.QR_CODE_ON_DEMAND and (regenerate or not self.qr_code_image):
+      self.render_qr_code_image()
+
+    # Enregistrement de la ligne de réservation
+    super().save(*args, **kwargs)
+
+  @property
+  def qr_code_status(self) -> str:
+
+    """
+    Retourne l'état de génération de l'image du QR code.
+    Returns:
+      str: "ready" si l'image du QR code est disponible ou générée à la demande, sinon "pending".
+    """
+    return "ready" if settings.QR_CODE_ON_DEMAND or self.qr_code_image else "pending"
+
+  def generate_qr_code(self, person_id: uuid.UUID) -> None:
+
+    """
+    Génère le contenu du QR code de la ligne de réservation, sans enregistrer la ligne ni son image.
+    Permet de préparer des lignes destinées à `bulk_create` à partir de l'identifiant de la personne déjà connu.
+    Lorsque `QR_CODE_SIGNED` est activé, le contenu est signé et porte l'événement à la place de la personne.
+
+    Args:
+      person_id (UUID): L'identifiant de la personne ayant effectué la réservation.
+    Returns:
+      None
+    """
+    if settings.QR_CODE_SIGNED:
+      self.qr_code = qrsign.sign(self.id_booking_line, self.event_id)
+    else:
+      self.qr_code = f"{str(self.id_booking_line)}|{str(person_id)}"
+
+  def render_qr_code_image(self) -> None:
+
+    """
+    Génère l'image du QR code à partir de son contenu et l'enregistre dans le stockage des médias, sans enregistrer la
+    ligne de réservation. Le format de l'image est défini par `QR_CODE_FORMAT`.
+
+    Returns:
+      None
+    """
+    # Génération de l'image du QR code avec son dégradé
+    content = qrrender.render(self.qr_code, settings.QR_CODE_FORMAT)
+    random_filename = f"{uuid.uuid4()}.{qrrender.FORMATS[settings.QR_CODE_FORMAT][2]}"
     self.qr_code_image.save(
       random_filename,
-      ContentFile(buffer.getvalue()),
+      ContentFile(content),
       save=False
     )
-    
-    # Enregistrement de la ligne de réservation
-    super().save(*args, **kwargs)
   
   def __str__(self) -> str:
 
@@ -185,4 +302,377 @@ class BookingLine(models.Model):
     Returns:
       str : La représentation de la ligne de réservation.
     """
-    return f"{self.booking} - {self.event}"
\ No newline at end of file
+    return f"{self.booking} - {self.event}"
+
+
+
+
+class QrCodeJobQuerySet(models.QuerySet):
+
+  MAX_ATTEMPTS = 5
+
+  def process(self, batch_size: int = 50) -> int:
+
+    """
+    Réserve un lot de tâches de génération d'images de QR code, génère les images et enregistre les lignes de réservation.
+    Les tâches sont réservées avec `SELECT ... FOR UPDATE SKIP LOCKED`, ce qui permet à plusieurs processus de traiter
+    la file en parallèle. Une tâche en échec reste dans la file et est abandonnée après `MAX_ATTEMPTS` tentatives.
+    Args:
+      batch_size (int): Le nombre maximal de tâches traitées.
+    Returns:
+      int : Le nombre de tâches réservées.
+    """
+    with transaction.atomic():
+
+      jobs = list(
+        self.select_for_update(skip_locked=True, of=('self',))
+        .select_related('booking_line')
+        .filter(attempts__lt=self.MAX_ATTEMPTS)
+        .order_by('created_at')[:batch_size]
+      )
+      rendered = []
+
+      for job in jobs:
+
+        try:
+          job.booking_line.render_qr_code_image()
+          rendered.append(job)
+        except Exception:
+          QrCodeJob.objects.filter(pk=job.pk).update(attempts=F('attempts') + 1)
+
+      BookingLine.objects.bulk_update([job.booking_line for job in rendered], ['qr_code_image'])
+      QrCodeJob.objects.filter(pk__in=[job.pk for job in rendered]).delete()
+
+    return len(jobs)
+
+
+
+
+class QrCodeJob(models.Model):
+
+  booking_line = models.OneToOneField(
+    BookingLine,
+    null=False,
+    on_delete=models.CASCADE,
+    primary_key=True,
+    verbose_name="Ligne de réservation"
+  )
+  created_at = models.DateTimeField(
+    auto_now_add=True,
+    db_index=True,
+    null=False,
+    verbose_name="Date de création"
+  )
+  attempts = models.PositiveSmallIntegerField(
+    default=0,
+    null=False,
+    verbose_name="Tentatives"
+  )
+
+  objects = QrCodeJobQuerySet.as_manager()
+
+  class Meta:
+
+    verbose_name = "Génération de QR code"
+    verbose_name_plural = "Générations de QR code"
+
+  def __str__(self) -> str:
+
+    """
+    Retourne une représentation sous forme de chaîne de la tâche de génération.
+    Returns:
+      str : La représentation de la tâche de génération.
+    """
+    return f"{self.booking_line.buy_key} ({self.attempts} tentative(s))"
+
+
+
+
+class SeatHoldQuerySet(models.QuerySet):
+
+  def release(self) -> int:
+
+    """
+    Supprime les réservations temporaires du queryset et rend leurs places aux compteurs des événements.
+    Les réservations temporaires verrouillées par un paiement en cours sont ignorées, et la suppression se fait en une
+    seule requête `DELETE`.
+    Returns:
+      int : Le nombre de réservations temporaires supprimées.
+    """
+    with transaction.atomic():
+
+      holds = list(
+        self.select_for_update(skip_locked=True, of=('self',)).values_list('id_seat_hold', 'event_id', 'offer__number_seats')
+      )
+
+      if not holds:
+        return 0
+
+      SeatHold.objects.filter(pk__in=[hold_id for hold_id, _, _ in holds]).delete()
+
+      seats_by_event = Counter()
+      for _, event_id, seats in holds:
+        seats_by_event[event_id] += seats
+
+      for event_id, seats in seats_by_event.items():
+        Event.objects.release_booked_seats(event_id, seats)
+
+    return len(holds)
+
+  def expire(self, batch_size: int = 1000) -> int:
+
+    """
+    Supprime un lot de réservations temporaires expirées, les plus anciennes en premier, et libère leurs places.
+    Args:
+      batch_size (int): Le nombre maximal de réservations temporaires traitées.
+    Returns:
+      int : Le nombre de réservations temporaires supprimées.
+    """
+    return self.filter(expires_at__lte=timezone.now()).order_by('expires_at')[:batch_size].release()
+
+
+
+
+class SeatHold(models.Model):
+
+  id_seat_hold = models.UUIDField(
+    default=uuid.uuid4,
+    editable=False,
+    primary_key=True
+  )
+  person = models.ForeignKey(
+    Person,
+    null=False,
+    on_delete=models.CASCADE,
+    verbose_name="Personne"
+  )
+  event = models.ForeignKey(
+    Event,
+    null=False,
+    on_delete=models.CASCADE,
+    verbose_name="Événement"
+  )
+  offer = models.ForeignKey(
+    Offer,
+    null=False,
+    on_delete=models.CASCADE,
+    verbose_name="Offre"
+  )
+  expires_at = models.DateTimeField(
+    db_index=True,
+    null=False,
+    verbose_name="Date d'expiration"
+  )
+
+  objects = SeatHoldQuerySet.as_manager()
+
+  class Meta:
+
+    verbose_name = "Réservation temporaire"
+    verbose_name_plural = "Réservations temporaires"
+
+  def __str__(self) -> str:
+
+    """
+    Retourne une représentation sous forme de chaîne de la réservation temporaire.
+    Returns:
+      str : La représentation de la réservation temporaire.
+    """
+    return f"{self.person} - {self.event} (jusqu'à {timezone.localtime(self.expires_at).strftime('%H:%M:%S')})"
+
+
+
+
+def sale_revenue(price: Decimal, offer: Offer) -> Decimal:
+
+  """
+  Calcule le montant de la vente d'une ligne de réservation : le prix de l'événement pour toutes les places de l'offre,
+  après application de sa réduction, arrondi au centime.
+
+  Args:
+    price (Decimal): Le prix de l'événement.
+    offer (Offer): L'offre de la ligne de réservation.
+  Returns:
+    Decimal: Le montant de la vente.
+  """
+  return (Decimal(price) * offer.number_seats * (100 - offer.discount) / 100).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+
+
+class SalesRollupQuerySet(models.QuerySet):
+
+  def record(self, lines: list[BookingLine], sign: int = 1) -> None:
+
+    """
+    Ajoute aux cumuls des ventes, ou en retire avec `sign=-1`, des lignes de réservation dont l'offre et la réservation
+    sont chargées, pour le montant enregistré de leur vente. Doit être appelée dans la transaction qui enregistre ou
+    supprime les lignes.
+    Args:
+      lines (list[BookingLine]): Les lignes de réservation.
+      sign (int): 1 pour une vente, -1 pour une suppression.
+    """
+    sales = {}
+
+    for line in lines:
+      key = (line.event_id, line.offer_id, timezone.localdate(line.booking.booking_date))
+      count, seats, revenue = sales.get(key, (0, 0, Decimal(0)))
+      sales[key] = (count + sign, seats + sign * line.offer.number_seats, revenue + sign * line.amount)
+
+    self.apply_sales(sales)
+
+  def apply_sales(self, sales: dict[tuple[int, int, date], tuple[int, int, Decimal]]) -> None:
+
+    """
+    Applique de façon atomique des écarts de ventes aux cumuls (événement, offre, jour), en trois requêtes quel que soit
+    leur nombre.
+    Les cumuls manquants des ventes positives sont créés dans l'ordre de leur clé, puis tous les cumuls concernés sont
+    verrouillés dans l'ordre de leur identifiant, ce qui évite tout interblocage entre deux paiements sur l'index unique
+    comme sur les lignes, et mis à jour en une seule requête.
+    Args:
+      sales (dict): Les écarts (lignes, places, chiffre d'affaires), indexés par (événement, offre, jour).
+    """
+    if not sales:
+      return
+
+    with transaction.atomic():
+
+      self.bulk_create(
+        [
+          SalesRollup(event_id=event_id, offer_id=offer_id, day=day)
+          for (event_id, offer_id, day), (count, _, _) in sorted(sales.items())
+          if count > 0
+        ],
+        ignore_conflicts=True
+      )
+
+      rollups = (
+        self.select_for_update()
+        .filter(reduce(or_, (Q(event_id=event_id, offer_id=offer_id, day=day) for event_id, offer_id, day in sales)))
+        .order_by('pk')
+        .values_list('pk', 'event_id', 'offer_id', 'day')
+      )
+      deltas = {pk: sales[(event_id, offer_id, day)] for pk, event_id, offer_id, day in rollups}
+
+      if not deltas:
+        return
+
+      def delta(field: str, index: int) -> CombinedExpression:
+
+        """
+        Construit l'expression de mise à jour d'un cumul, propre à chaque ligne de la requête.
+        """
+        output_field = SalesRollup._meta.get_field(field)
+        change = Case(
+          *[When(pk=pk, then=Value(values[index], output_field=output_field)) for pk, values in deltas.items()],
+          output_field=output_field
+        )
+
+        return F(field) + change
+
+      SalesRollup.objects.filter(pk__in=list(deltas)).update(
+        lines=delta('lines', 0),
+        seats=delta('seats', 1),
+        revenue=delta('revenue', 2)
+      )
+
+  def rebuild(self, event_id: int) -> int:
+
+    """
+    Recalcule les cumuls des ventes d'un événement à partir de ses lignes de réservation.
+    Les cumuls existants sont verrouillés avant le calcul : un paiement en cours sur l'événement applique ses écarts
+    après la reconstruction, sur les valeurs recalculées sans ses lignes.
+    Args:
+      event_id (int): L'identifiant de l'événement.
+    Returns:
+      int : Le nombre de cumuls de l'événement.
+    """
+    with transaction.atomic():
+
+      existing = {
+        (offer_id, day): pk
+        for pk, offer_id, day in self.select_for_update().filter(event_id=event_id).order_by('pk').values_list('pk', 'offer_id', 'day')
+      }
+
+      sales = (
+        BookingLine.objects.filter(event_id=event_id)
+        .order_by()
+        .values('offer_id', day=TruncDate('booking__booking_date'))
+        .annotate(lines=Count('pk'), seats=Sum('offer__number_seats'), revenue=Sum('amount'))
+      )
+      rollups = [SalesRollup(event_id=event_id, **row) for row in sales]
+      rebuilt = {(rollup.offer_id, rollup.day) for rollup in rollups}
+
+      # Les cumuls dont toutes les lignes ont disparu sont supprimés, les autres remplacés par les valeurs recalculées
+      self.filter(pk__in=[pk for key, pk in existing.items() if key not in rebuilt]).delete()
+      self.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=['event', 'offer', 'day'],
+        update_fields=['lines', 'seats', 'revenue']
+      )
+
+    return len(rollups)
+
+
+
+
+class SalesRollup(models.Model):
+
+  id_sales_rollup = models.BigAutoField(
+    null=False,
+    primary_key=True
+  )
+  event = models.ForeignKey(
+    Event,
+    null=False,
+    on_delete=models.CASCADE,
+    verbose_name="Événement"
+  )
+  offer = models.ForeignKey(
+    Offer,
+    null=False,
+    on_delete=models.CASCADE,
+    verbose_name="Offre"
+  )
+  day = models.DateField(
+    db_index=True,
+    null=False,
+    verbose_name="Jour de réservation"
+  )
+  lines = models.PositiveIntegerField(
+    default=0,
+    null=False,
+    verbose_name="Lignes de réservation"
+  )
+  seats = models.PositiveIntegerField(
+    default=0,
+    null=False,
+    verbose_name="Places vendues"
+  )
+  revenue = models.DecimalField(
+    decimal_places=2,
+    default=Decimal(0),
+    max_digits=12,
+    null=False,
+    verbose_name="Chiffre d'affaires (€)"
+  )
+
+  objects = SalesRollupQuerySet.as_manager()
+
+  class Meta:
+
+    constraints = [
+      models.UniqueConstraint(fields=['event', 'offer', 'day'], name='unique_sales_rollup')
+    ]
+    verbose_name = "Cumul des ventes"
+    verbose_name_plural = "Cumuls des ventes"
+
+  def __str__(self) -> str:
+
+    """
+    Retourne une représentation sous forme de chaîne du cumul des ventes.
+    Returns:
+      str : Une chaîne décrivant l'événement, l'offre, le jour et les places vendues.
+    """
+    return f"{self.event} - {self.offer} ({self.day:%d/%m/%Y} : {self.seats} place(s))"
\ No newline at end of file
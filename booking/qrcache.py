@@ -0,0 +1,114 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import cache
+from pathlib import Path
+from django.conf import settings
+from . import qrrender
+
+def image_key(payload: str, fmt: str = "png") -> str:
+
+  """
+  Calcule la clé d'une image de QR code, qui dépend uniquement de son contenu, de son format et de la version du rendu.
+  Sert à la fois de nom de fichier dans le cache disque et d'`ETag` forte.
+
+  Args:
+    payload (str): Le contenu du QR code.
+    fmt (str): Le format de l'image, parmi les clés de `qrrender.FORMATS`.
+  Returns:
+    str: Une empreinte hexadécimale de 32 caractères.
+  """
+  return hashlib.sha256(f"{qrrender.RENDER_VERSION}|{fmt}|{payload}".encode()).hexdigest()[:32]
+
+
+
+
+class QrImageCache:
+
+  """
+  Cache des images de QR code : un cache LRU borné en mémoire, complété par un cache disque facultatif.
+  """
+  def __init__(self, max_entries: int, directory: str | None = None):
+
+    self.max_entries = max_entries
+    self.directory = Path(directory) if directory else None
+    self._entries = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, payload: str, fmt: str = "png") -> bytes:
+
+    """
+    Retourne l'image du QR code, générée au premier appel puis servie depuis le cache.
+    Args:
+      payload (str): Le contenu du QR code.
+      fmt (str): Le format de l'image, parmi les clés de `qrrender.FORMATS`.
+    Returns:
+      bytes: Le contenu du fichier.
+    """
+    filename = f"{image_key(payload, fmt)}.{qrrender.FORMATS[fmt][2]}"
+
+    with self._lock:
+      if filename in self._entries:
+        self._entries.move_to_end(filename)
+        return self._entries[filename]
+
+    content = self._read(filename)
+
+    if content is None:
+      content = qrrender.render(payload, fmt)
+      self._write(filename, content)
+
+    with self._lock:
+      self._entries[filename] = content
+      self._entries.move_to_end(filename)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+    return content
+
+  def __len__(self) -> int:
+
+    """
+    Retourne le nombre d'images conservées en mémoire.
+    """
+    return len(self._entries)
+
+  def _read(self, filename: str) -> bytes | None:
+
+    """
+    Lit une image depuis le cache disque, s'il est configuré.
+    """
+    if self.directory is None:
+      return None
+
+    try:
+      return (self.directory / filename).read_bytes()
+    except FileNotFoundError:
+      return None
+
+  def _write(self, filename: str, content: bytes) -> None:
+
+    """
+    Écrit une image dans le cache disque, s'il est configuré, par un renommage atomique.
+    """
+    if self.directory is None:
+      return
+
+    self.directory.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+
+    with os.fdopen(descriptor, "wb") as file:
+      file.write(content)
+
+    os.replace(temporary, self.directory / filename)
+
+
+@cache
+def image_cache() -> QrImageCache:
+
+  """
+  Retourne le cache des images de QR code du processus, configuré par `QR_CODE_CACHE_SIZE` et `QR_CODE_CACHE_DIR`.
+  """
+  return QrImageCache(settings.QR_CODE_CACHE_SIZE, settings.QR_CODE_CACHE_DIR)
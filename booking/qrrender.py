@@ -0,0 +1,215 @@
+from functools import lru_cache
+from io import BytesIO
+from typing import Iterable
+import numpy as np
+import qrcode
+from PIL import Image
+
+# Version du rendu, à incrémenter à chaque changement de style pour invalider les images mises en cache
+RENDER_VERSION = 1
+
+# Paramètres communs à toutes les images de QR code des billets
+BOX_SIZE = 10
+BORDER = 5
+START_COLOR = np.array([0x4b, 0xb1, 0xd7, 255])  # #4bb1d7
+END_COLOR = np.array([0xff, 0xbd, 0x59, 255])    # #ffbd59
+
+# Pixel blanc opaque, lu comme un seul entier de 32 bits
+BACK_PIXEL = np.array([255, 255, 255, 255], dtype=np.uint8).view(np.uint32)[0]
+
+@lru_cache(maxsize=32)
+def gradient(width: int) -> np.ndarray:
+
+  """
+  Calcule, une seule fois par largeur d'image, la ligne de dégradé horizontal appliquée aux modules du QR code.
+  Le dégradé étant identique sur toutes les lignes, il est diffusé verticalement lors de son application.
+
+  Args:
+    width (int): La largeur de l'image en pixels.
+  Returns:
+    np.ndarray: Un tableau `(width,)` en lecture seule de pixels RGBA, chacun lu comme un entier de 32 bits.
+  """
+  ratio = (np.arange(width) / (width - 1))[:, np.newaxis]
+  row = ((1 - ratio) * START_COLOR + ratio * END_COLOR).astype(np.uint8)
+
+  pixels = row.view(np.uint32).reshape(width)
+  pixels.flags.writeable = False
+
+  return pixels
+
+
+def qr_matrix(payload: str) -> np.ndarray:
+
+  """
+  Calcule la matrice des modules du QR code, bordure comprise.
+
+  Args:
+    payload (str): Le contenu du QR code.
+  Returns:
+    np.ndarray: Un tableau booléen, vrai pour les modules foncés.
+  """
+  qr = qrcode.QRCode(
+    version=1,
+    error_correction=qrcode.constants.ERROR_CORRECT_L,
+    box_size=BOX_SIZE,
+    border=BORDER
+  )
+  qr.add_data(payload)
+  qr.make(fit=True)
+
+  return np.array(qr.get_matrix(), dtype=bool)
+
+
+def render_pixels(payload: str) -> np.ndarray:
+
+  """
+  Calcule les pixels RGBA du QR code, avec le dégradé appliqué aux modules foncés.
+
+  Args:
+    payload (str): Le contenu du QR code.
+  Returns:
+    np.ndarray: Un tableau `(hauteur, largeur, 4)` de pixels RGBA.
+  """
+  # Agrandissement de chaque module en un carré de `BOX_SIZE` pixels
+  mask = qr_matrix(payload).repeat(BOX_SIZE, axis=0).repeat(BOX_SIZE, axis=1)
+  height, width = mask.shape
+
+  # Fond blanc puis copie sur place du dégradé, diffusé sur toutes les lignes, uniquement sur les modules foncés
+  pixels = np.full((height, width), BACK_PIXEL, dtype=np.uint32)
+  np.copyto(pixels, gradient(width), where=mask)
+
+  return pixels.view(np.uint8).reshape(height, width, 4)
+
+
+def render_png(payload: str) -> bytes:
+
+  """
+  Génère l'image PNG du QR code d'un billet.
+
+  Args:
+    payload (str): Le contenu du QR code.
+  Returns:
+    bytes: Le contenu du fichier PNG.
+  """
+  buffer = BytesIO()
+  Image.fromarray(render_pixels(payload), "RGBA").save(buffer, format='PNG')
+
+  return buffer.getvalue()
+
+
+@lru_cache(maxsize=32)
+def palette(width: int) -> tuple[np.ndarray, bytes]:
+
+  """
+  Calcule, une seule fois par largeur d'image, la palette 8 bits du dégradé et l'indice de couleur de chaque colonne.
+  L'indice 0 est réservé au fond blanc ; au-delà de 255 teintes, le dégradé est découpé en bandes de colonnes.
+
+  Args:
+    width (int): La largeur de l'image en pixels.
+  Returns:
+    tuple: Un tableau `(width,)` en lecture seule des indices de couleur des colonnes, et la palette RGB.
+  """
+  row = gradient(width)
+  colors, indices = np.unique(row, return_inverse=True)
+
+  if len(colors) > 255:
+    indices = np.arange(width) * 255 // width
+    colors = row[np.searchsorted(indices, np.arange(255))]
+
+  columns = (indices + 1).astype(np.uint8)
+  columns.flags.writeable = False
+  rgb = np.concatenate([[BACK_PIXEL], colors]).view(np.uint8).reshape(-1, 4)[:, :3]
+
+  return columns, rgb.tobytes()
+
+
+def render_palette_png(payload: str) -> bytes:
+
+  """
+  Génère l'image PNG 8 bits à palette du QR code d'un billet, environ quatre fois plus légère que l'image RGBA.
+
+  Args:
+    payload (str): Le contenu du QR code.
+  Returns:
+    bytes: Le contenu du fichier PNG.
+  """
+  mask = qr_matrix(payload).repeat(BOX_SIZE, axis=0).repeat(BOX_SIZE, axis=1)
+  columns, rgb = palette(mask.shape[1])
+
+  image = Image.fromarray(np.where(mask, columns, 0).astype(np.uint8), "P")
+  image.putpalette(rgb)
+
+  buffer = BytesIO()
+  image.save(buffer, format='PNG')
+
+  return buffer.getvalue()
+
+
+def render_svg(payload: str) -> bytes:
+
+  """
+  Génère l'image vectorielle SVG du QR code d'un billet, le dégradé étant porté par un `linearGradient`.
+  Les modules foncés contigus d'une même ligne sont fusionnés en un seul rectangle du tracé.
+
+  Args:
+    payload (str): Le contenu du QR code.
+  Returns:
+    bytes: Le contenu du fichier SVG, encodé en UTF-8.
+  """
+  matrix = qr_matrix(payload)
+  size = matrix.shape[0]
+
+  # Bornes des plages de modules foncés, lues sur les changements de valeur de chaque ligne bordée de modules clairs
+  edges = np.diff(np.pad(matrix, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+  rows, starts = np.nonzero(edges == 1)
+  ends = np.nonzero(edges == -1)[1]
+
+  path = "".join(f"M{x} {y}h{end - x}v1h{x - end}z" for y, x, end in zip(rows, starts, ends))
+  start, end = (f"#{r:02x}{g:02x}{b:02x}" for r, g, b, _ in (START_COLOR, END_COLOR))
+
+  return (
+    f'<svg xmlns="http://www.w3.org/2000/svg" width="{size * BOX_SIZE}" height="{size * BOX_SIZE}" '
+    f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+    f'<defs><linearGradient id="g" gradientUnits="userSpaceOnUse" x1="0" y1="0" x2="{size}" y2="0">'
+    f'<stop offset="0" stop-color="{start}"/><stop offset="1" stop-color="{end}"/></linearGradient></defs>'
+    f'<rect width="{size}" height="{size}" fill="#fff"/><path fill="url(#g)" d="{path}"/></svg>'
+  ).encode()
+
+
+# Formats de sortie disponibles : fonction de génération, type MIME et extension du fichier
+FORMATS = {
+  "png": (render_png, "image/png", "png"),
+  "png8": (render_palette_png, "image/png", "png"),
+  "svg": (render_svg, "image/svg+xml", "svg")
+}
+
+
+def render(payload: str, fmt: str = "png") -> bytes:
+
+  """
+  Génère l'image du QR code d'un billet dans le format demandé.
+
+  Args:
+    payload (str): Le contenu du QR code.
+    fmt (str): Le format de sortie, parmi les clés de `FORMATS`.
+  Returns:
+    bytes: Le contenu du fichier.
+  """
+  return FORMATS[fmt][0](payload)
+
+
+def render_batch(payloads: Iterable[str], fmt: str = "png") -> list[bytes]:
+
+  """
+  Génère les images des QR codes d'un lot de billets dans le format demandé, en partageant les dégradés mis en cache.
+
+  Args:
+    payloads (Iterable[str]): Les contenus des QR codes.
+    fmt (str): Le format de sortie, parmi les clés de `FORMATS`.
+  Returns:
+    list[bytes]: Le contenu des fichiers, dans l'ordre des contenus fournis.
+  """
+  renderer = FORMATS[fmt][0]
+
+  return [renderer(payload) for payload in payloads]
+
@@ -0,0 +1,125 @@
+import hashlib
+import hmac
+import re
+import uuid
+from typing import Iterable
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Contenu signé : identifiant de la ligne, identifiant de l'événement, identifiant de la clé et HMAC tronqué.
+# Il n'utilise que des caractères du mode alphanumérique des QR codes, plus dense que le mode octet des UUID.
+KEY_ID_PATTERN = re.compile(r'[0-9A-Z]{1,8}')
+SIGNED_PATTERN = re.compile(rf'^([0-9A-F]{{32}})\.([0-9]+)\.({KEY_ID_PATTERN.pattern})\.([0-9A-F]{{16}})$')
+
+def check_keys() -> None:
+
+  """
+  Vérifie au démarrage la configuration des clés de signature : un identifiant de clé hors de `KEY_ID_PATTERN` produirait
+  des contenus toujours refusés par `verify`, sans erreur à l'enregistrement groupé des billets.
+
+  Raises:
+    ImproperlyConfigured: Si un identifiant de `QR_CODE_SIGNING_KEYS` est invalide, ou si `QR_CODE_SIGNING_KEY_ID`
+      n'est pas l'une de ces clés.
+  """
+  invalid = [key_id for key_id in settings.QR_CODE_SIGNING_KEYS if not KEY_ID_PATTERN.fullmatch(key_id)]
+
+  if invalid:
+    raise ImproperlyConfigured(
+      f"Identifiant(s) de clé invalide(s) dans QR_CODE_SIGNING_KEYS : {', '.join(invalid)}. "
+      "Un identifiant comporte de 1 à 8 chiffres ou lettres majuscules."
+    )
+
+  if settings.QR_CODE_SIGNING_KEY_ID not in settings.QR_CODE_SIGNING_KEYS:
+    raise ImproperlyConfigured(
+      f"La clé courante QR_CODE_SIGNING_KEY_ID ({settings.QR_CODE_SIGNING_KEY_ID}) n'est pas dans QR_CODE_SIGNING_KEYS."
+    )
+
+
+def mac(key_id: str, message: str) -> str:
+
+  """
+  Calcule le HMAC-SHA256 tronqué à 64 bits d'un message avec une clé de `QR_CODE_SIGNING_KEYS`.
+
+  Args:
+    key_id (str): L'identifiant de la clé.
+    message (str): Le message à signer.
+  Returns:
+    str: Les 16 premiers caractères hexadécimaux, en majuscules, du HMAC.
+  """
+  key = settings.QR_CODE_SIGNING_KEYS[key_id].encode()
+
+  return hmac.new(key, message.encode(), hashlib.sha256).hexdigest()[:16].upper()
+
+
+def sign(line_id: uuid.UUID, event_id: int) -> str:
+
+  """
+  Construit le contenu signé du QR code d'un billet avec la clé courante `QR_CODE_SIGNING_KEY_ID`.
+
+  Args:
+    line_id (UUID): L'identifiant de la ligne de réservation.
+    event_id (int): L'identifiant de l'événement.
+  Returns:
+    str: Le contenu signé du QR code.
+  """
+  message = f"{line_id.hex.upper()}.{event_id}.{settings.QR_CODE_SIGNING_KEY_ID}"
+
+  return f"{message}.{mac(settings.QR_CODE_SIGNING_KEY_ID, message)}"
+
+
+def verify(qr_code: str) -> tuple[uuid.UUID, int] | None:
+
+  """
+  Vérifie, sans requête, la signature d'un contenu de QR code signé.
+  Une signature produite avec une clé retirée de `QR_CODE_SIGNING_KEYS` est refusée.
+
+  Args:
+    qr_code (str): Le contenu du QR code.
+  Returns:
+    tuple[UUID, int] | None: L'identifiant de la ligne et celui de l'événement, ou None si la signature est invalide.
+  """
+  match = SIGNED_PATTERN.match(qr_code)
+
+  if match is None or match[3] not in settings.QR_CODE_SIGNING_KEYS:
+    return None
+
+  if not hmac.compare_digest(mac(match[3], qr_code[:match.start(4) - 1]), match[4]):
+    return None
+
+  return uuid.UUID(match[1]), int(match[2])
+
+
+def is_signed(qr_code: str) -> bool:
+
+  """
+  Indique si le contenu du QR code n'est pas au format historique `<UUID>|<UUID>` et doit donc être vérifié par sa
+  signature.
+  """
+  return "|" not in qr_code
+
+
+def partition(qr_codes: Iterable[str], event_id: int) -> tuple[set[str], list[str]]:
+
+  """
+  Trie des QR codes scannés à l'entrée d'un événement, sans requête.
+
+  Args:
+    qr_codes (Iterable[str]): Les contenus des QR codes scannés.
+    event_id (int): L'identifiant de l'événement contrôlé.
+  Returns:
+    tuple: Les QR codes signés valides pour l'événement, et les QR codes historiques, à vérifier en base de données.
+      Les QR codes signés falsifiés ou destinés à un autre événement ne figurent dans aucun des deux.
+  """
+  signed, legacy = set(), []
+
+  for qr_code in qr_codes:
+
+    if not is_signed(qr_code):
+      legacy.append(qr_code)
+      continue
+
+    verified = verify(qr_code)
+    if verified is not None and verified[1] == event_id:
+      signed.add(qr_code)
+
+  return signed, legacy
@@ -1,5 +1,13 @@
 import re
+import uuid
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import serializers
+from .models import BookingLine, SeatHold
+from event.models import Event
+from event.serializers import EventLightSerializer
+from offer.models import Offer
+from offer.serializers import OfferSerializer
 
 class PaymentSerializer(serializers.Serializer):
 
@@ -151,4 +159,99 @@ class PaymentSerializer(serializers.Serializer):
       if "id_event" not in item or "id_offer" not in item:
         raise serializers.ValidationError("Chaque élément du panier doit contenir un événement et une offre.")
 
-    return value
\ No newline at end of file
+      try:
+        item["id_event"] = int(item["id_event"])
+        item["id_offer"] = int(item["id_offer"])
+      except (TypeError, ValueError):
+        raise serializers.ValidationError("Les identifiants de l'événement et de l'offre doivent être des entiers.")
+
+      # La réservation temporaire associée à un article est facultative
+      if item.get("id_hold"):
+        try:
+          item["id_hold"] = uuid.UUID(str(item["id_hold"]))
+        except ValueError:
+          raise serializers.ValidationError("La réservation temporaire d'un élément du panier est invalide.")
+
+    return value
+
+
+
+
+class ScanSerializer(serializers.Serializer):
+
+  scans = serializers.ListField(
+    allow_empty=False,
+    child=serializers.CharField(max_length=100),
+    max_length=settings.GATE_SCAN_BATCH_MAX
+  )
+
+
+
+
+class OfflineAdmissionSerializer(serializers.Serializer):
+
+  qr_code = serializers.CharField(max_length=100)
+  admitted_at = serializers.DateTimeField()
+
+
+
+
+class OfflineScanSerializer(serializers.Serializer):
+
+  admissions = OfflineAdmissionSerializer(
+    allow_empty=False,
+    many=True,
+    max_length=settings.GATE_OFFLINE_BATCH_MAX
+  )
+
+
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+
+  id_event = serializers.PrimaryKeyRelatedField(queryset=Event.objects.all(), source='event')
+  id_offer = serializers.PrimaryKeyRelatedField(queryset=Offer.objects.all(), source='offer')
+
+  class Meta:
+    model = SeatHold
+    fields = (
+      'id_seat_hold',
+      'id_event',
+      'id_offer',
+      'expires_at'
+    )
+    read_only_fields = (
+      'id_seat_hold',
+      'expires_at'
+    )
+
+
+
+
+class BookingLineSerializer(serializers.ModelSerializer):
+
+  event = EventLightSerializer()
+  offer = OfferSerializer()
+  booking_date = serializers.DateTimeField(source='booking.booking_date')
+  qr_code_image = serializers.SerializerMethodField()
+
+  class Meta:
+    model = BookingLine
+    fields = (
+      'id_booking_line',
+      'booking_date',
+      'event',
+      'offer',
+      'qr_code_status',
+      'qr_code_image'
+    )
+
+  def get_qr_code_image(self, line: BookingLine) -> str | None:
+
+    """
+    Retourne l'adresse de l'image du QR code : le fichier enregistré, ou la vue de génération à la demande.
+    """
+    if settings.QR_CODE_ON_DEMAND:
+      return reverse('ticket_qr_code', args=[line.pk])
+
+    return line.qr_code_image.url if line.qr_code_image else None
\ No newline at end of file
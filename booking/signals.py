@@ -1,7 +1,12 @@
 import os
-from django.db.models.signals import post_delete
+from collections import Counter
+from django.db.models import Count, QuerySet
+from django.db.models.signals import post_delete, pre_delete
 from django.dispatch import receiver
-from .models import BookingLine
+from .models import Booking, BookingLine, SalesRollup, SeatHold
+from event.models import Event
+from offer.models import Offer
+from user.models import Person
 
 @receiver(post_delete, sender=BookingLine)
 def delete_qr_code_image_on_bookingline_delete(instance, **kwargs) -> None:
@@ -16,4 +21,84 @@ def delete_qr_code_image_on_bookingline_delete(instance, **kwargs) -> None:
     if os.path.isfile(instance.qr_code_image.path):
       
       # Supprime le fichier d'image du QR code
-      os.remove(instance.qr_code_image.path)
\ No newline at end of file
+      os.remove(instance.qr_code_image.path)
+
+
+def cascaded(origin) -> bool:
+
+  """
+  Indique si une ligne de réservation est supprimée en cascade de sa réservation, de son événement ou de son offre.
+  Ses places et ses ventes sont alors prises en compte en une fois, pour toutes les lignes, par le gestionnaire
+  `pre_delete` du parent ; celles d'un événement supprimé disparaissent avec lui.
+  """
+  if origin is None:
+    return False
+
+  model = origin.model if isinstance(origin, QuerySet) else type(origin)
+
+  return model is not BookingLine
+
+
+@receiver(post_delete, sender=BookingLine)
+def release_booked_seats_on_bookingline_delete(instance: BookingLine, origin=None, **kwargs) -> None:
+
+  """
+  Libère les places de la ligne de réservation supprimée dans le compteur de places réservées de l'événement.
+  """
+  if not cascaded(origin):
+    Event.objects.release_booked_seats(instance.event_id, instance.offer.number_seats)
+
+
+@receiver(post_delete, sender=BookingLine)
+def remove_sales_on_bookingline_delete(instance: BookingLine, origin=None, **kwargs) -> None:
+
+  """
+  Retire la ligne de réservation supprimée des cumuls des ventes.
+  """
+  if not cascaded(origin):
+    SalesRollup.objects.record([instance], sign=-1)
+
+
+@receiver(pre_delete, sender=Booking)
+def release_lines_on_booking_delete(instance: Booking, **kwargs) -> None:
+
+  """
+  Libère les places et retire des cumuls des ventes les lignes de la réservation supprimée, en une requête de lecture
+  quel que soit leur nombre.
+  """
+  lines = list(BookingLine.objects.filter(booking=instance).select_related('booking', 'event', 'offer'))
+
+  seats_by_event = Counter()
+  for line in lines:
+    seats_by_event[line.event_id] += line.offer.number_seats
+
+  for event_id, seats in sorted(seats_by_event.items()):
+    Event.objects.release_booked_seats(event_id, seats)
+
+  SalesRollup.objects.record(lines, sign=-1)
+
+
+@receiver(pre_delete, sender=Offer)
+def release_lines_on_offer_delete(instance: Offer, **kwargs) -> None:
+
+  """
+  Libère, événement par événement, les places des lignes de réservation de l'offre supprimée. Leurs cumuls des ventes
+  sont supprimés en cascade avec l'offre.
+  """
+  lines_by_event = BookingLine.objects.filter(offer=instance).order_by('event').values('event').annotate(lines=Count('pk'))
+
+  for row in lines_by_event:
+    Event.objects.release_booked_seats(row['event'], row['lines'] * instance.number_seats)
+
+
+@receiver(pre_delete, sender=Offer)
+@receiver(pre_delete, sender=Person)
+def release_holds_on_delete(instance: Offer | Person, **kwargs) -> None:
+
+  """
+  Rend aux compteurs des événements les places des réservations temporaires de l'offre ou de la personne supprimée,
+  avant leur suppression en cascade. Celles d'un événement supprimé disparaissent avec lui.
+  """
+  field = 'offer' if isinstance(instance, Offer) else 'person'
+
+  SeatHold.objects.filter(**{field: instance}).release()
\ No newline at end of file
@@ -0,0 +1,879 @@
+import shutil
+import tempfile
+import threading
+from datetime import date, timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from booking import qrrender
+from booking.gate import gate_index
+from booking.models import Booking, BookingLine, QrCodeJob, SeatHold
+from event import reference
+from event.models import Event, Location, Sport
+from offer.models import Offer
+from user.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+def payment_data(cart: list[dict]) -> dict:
+
+  """
+  Construit des données de paiement valides pour le panier donné.
+  """
+  return {
+    "card_number": "4111 1111 1111 1112",
+    "card_name": "Jean Dupont",
+    "expiration_date": f"{date.today().year + 1}-01",
+    "cvc": "123",
+    "cart": cart
+  }
+
+
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ProcessPaymentAPITest(TestCase):
+
+  @classmethod
+  def tearDownClass(cls):
+
+    """
+    Supprime le dossier temporaire contenant les images des QR codes générés pendant les tests.
+    """
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+    super().tearDownClass()
+
+  def setUp(self):
+
+    """
+    Configure le client API authentifié, un événement et des offres pour les tests de paiement.
+    """
+    self.client = APIClient()
+    self.url = reverse('process_payment')
+
+    self.user = User.objects.create_user(
+      email="jean.dupont@example.com",
+      password="MotdepasseValide123!",
+      firstname="Jean",
+      lastname="Dupont",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+    self.client.force_authenticate(user=self.user)
+
+    sport = Sport.objects.create(
+      title="Athlétisme",
+      image="sports/athletisme.jpg"
+    )
+    location = Location.objects.create(
+      name="Stade de France",
+      city="Saint-Denis",
+      total_seats=100
+    )
+    self.event = Event.objects.create(
+      sport=sport,
+      location=location,
+      date="2024-08-04",
+      start_time="20:00:00",
+      end_time="22:00:00",
+      price="100.00"
+    )
+    self.solo = Offer.objects.create(
+      type="Offre Solo",
+      number_seats=1,
+      discount=0
+    )
+    self.family = Offer.objects.create(
+      type="Offre Famille",
+      number_seats=4,
+      discount=10
+    )
+
+  def test_process_payment_updates_booked_seats(self):
+
+    """
+    Teste que le paiement crée les lignes de réservation et incrémente le compteur de places réservées de l'événement.
+    """
+    cart = [
+      {"id_event": self.event.id_event, "id_offer": self.solo.id_offer},
+      {"id_event": self.event.id_event, "id_offer": self.family.id_offer}
+    ]
+    response = self.client.post(self.url, payment_data(cart), format='json')
+
+    self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    self.assertEqual(BookingLine.objects.count(), 2)
+
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.booked_seats, 5)
+    self.assertEqual(self.event.available_seats, 95)
+
+  def test_process_payment_query_count_does_not_grow_with_cart(self):
+
+    """
+    Teste que le nombre de requêtes d'un paiement ne dépend pas du nombre de lignes du panier.
+    """
+    queries = []
+
+    for size in (1, 20):
+      cart = [{"id_event": self.event.id_event, "id_offer": self.solo.id_offer}] * size
+
+      with CaptureQueriesContext(connection) as context:
+        response = self.client.post(self.url, payment_data(cart), format='json')
+
+      self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+      queries.append(len(context.captured_queries))
+
+    self.assertEqual(queries[0], queries[1])
+    self.assertEqual(BookingLine.objects.count(), 21)
+    self.assertEqual(set(BookingLine.objects.values_list('booking__person', flat=True)), {self.user.pk})
+    self.assertEqual(QrCodeJob.objects.count(), 21)
+
+  def test_process_payment_reads_current_offers(self):
+
+    """
+    Teste que le paiement réserve les places de l'offre telle qu'elle est en base, même si les tables de référence du
+    processus n'ont pas encore reçu sa modification faite dans un autre processus.
+    """
+    reference.offers()
+    # Une mise à jour groupée n'envoie pas de signal, comme une modification faite dans un autre processus
+    Offer.objects.filter(pk=self.family.pk).update(number_seats=5)
+
+    cart = [{"id_event": self.event.id_event, "id_offer": self.family.id_offer}]
+    response = self.client.post(self.url, payment_data(cart), format='json')
+
+    self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.booked_seats, 5)
+
+  def test_process_payment_rejects_unknown_ids(self):
+
+    """
+    Teste que le paiement est refusé avant toute réservation lorsque le panier référence un événement ou une offre inconnu.
+    """
+    cart = [
+      {"id_event": self.event.id_event, "id_offer": self.solo.id_offer},
+      {"id_event": 9999, "id_offer": self.solo.id_offer}
+    ]
+    response = self.client.post(self.url, payment_data(cart), format='json')
+
+    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    self.assertEqual(BookingLine.objects.count(), 0)
+
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.booked_seats, 0)
+
+  def test_qr_code_images_rendered_after_payment(self):
+
+    """
+    Teste que le paiement enregistre les lignes sans image et que la file de génération complète les images ensuite.
+    """
+    cart = [
+      {"id_event": self.event.id_event, "id_offer": self.solo.id_offer},
+      {"id_event": self.event.id_event, "id_offer": self.family.id_offer}
+    ]
+    self.client.post(self.url, payment_data(cart), format='json')
+
+    # Les billets sont disponibles immédiatement, avec une image en attente de génération
+    tickets = self.client.get(reverse('ticket_list')).json()
+    self.assertEqual(len(tickets), 2)
+    self.assertEqual({ticket['qr_code_status'] for ticket in tickets}, {"pending"})
+
+    self.assertEqual(QrCodeJob.objects.process(), 2)
+    self.assertEqual(QrCodeJob.objects.count(), 0)
+
+    tickets = self.client.get(reverse('ticket_list')).json()
+    self.assertEqual({ticket['qr_code_status'] for ticket in tickets}, {"ready"})
+    self.assertTrue(all(ticket['qr_code_image'] for ticket in tickets))
+
+  @override_settings(QR_CODE_FORMAT="svg")
+  def test_qr_code_images_rendered_in_configured_format(self):
+
+    """
+    Teste que la file de génération enregistre les images dans le format défini par `QR_CODE_FORMAT`.
+    """
+    cart = [{"id_event": self.event.id_event, "id_offer": self.solo.id_offer}]
+    self.client.post(self.url, payment_data(cart), format='json')
+    QrCodeJob.objects.process()
+
+    line = BookingLine.objects.get()
+
+    self.assertTrue(line.qr_code_image.name.endswith(".svg"))
+    with line.qr_code_image.open('rb') as file:
+      self.assertEqual(file.read(), qrrender.render_svg(line.qr_code))
+
+  def test_bookingline_delete_releases_booked_seats(self):
+
+    """
+    Teste que la suppression d'une ligne de réservation libère ses places dans le compteur de l'événement.
+    """
+    cart = [{"id_event": self.event.id_event, "id_offer": self.family.id_offer}]
+    self.client.post(self.url, payment_data(cart), format='json')
+
+    BookingLine.objects.get().delete()
+    self.event.refresh_from_db()
+
+    self.assertEqual(self.event.booked_seats, 0)
+
+  def test_reconcile_booked_seats_matches_bookings(self):
+
+    """
+    Teste que la réconciliation retrouve le nombre de places réservées à partir des lignes de réservation.
+    """
+    cart = [
+      {"id_event": self.event.id_event, "id_offer": self.family.id_offer},
+      {"id_event": self.event.id_event, "id_offer": self.family.id_offer}
+    ]
+    self.client.post(self.url, payment_data(cart), format='json')
+    Event.objects.filter(pk=self.event.pk).update(booked_seats=0)
+
+    Event.objects.reconcile_booked_seats()
+    self.event.refresh_from_db()
+
+    self.assertEqual(self.event.booked_seats, 8)
+
+
+  def test_process_payment_rejects_whole_cart_over_capacity(self):
+
+    """
+    Teste que le paiement est refusé en entier, sans aucune ligne créée, lorsqu'un article dépasse la capacité restante.
+    """
+    Event.objects.add_booked_seats({self.event.id_event: 97})
+
+    cart = [
+      {"id_event": self.event.id_event, "id_offer": self.solo.id_offer},
+      {"id_event": self.event.id_event, "id_offer": self.family.id_offer}
+    ]
+    response = self.client.post(self.url, payment_data(cart), format='json')
+
+    self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+    self.assertFalse(response.json()['success'])
+    self.assertEqual(BookingLine.objects.count(), 0)
+
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.booked_seats, 97)
+
+
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SeatHoldAPITest(TestCase):
+
+  def setUp(self):
+
+    """
+    Configure le client API authentifié, un événement de faible capacité et une offre pour les tests de réservation temporaire.
+    """
+    self.client = APIClient()
+
+    self.user = User.objects.create_user(
+      email="jean.dupont@example.com",
+      password="MotdepasseValide123!",
+      firstname="Jean",
+      lastname="Dupont",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+    self.client.force_authenticate(user=self.user)
+
+    sport = Sport.objects.create(
+      title="Escrime",
+      image="sports/escrime.jpg"
+    )
+    self.location = Location.objects.create(
+      name="Grand Palais",
+      city="Paris",
+      total_seats=6
+    )
+    self.event = Event.objects.create(
+      sport=sport,
+      location=self.location,
+      date="2024-07-27",
+      start_time="10:00:00",
+      end_time="12:00:00",
+      price="60.00"
+    )
+    self.family = Offer.objects.create(
+      type="Offre Famille",
+      number_seats=4,
+      discount=10
+    )
+
+  def create_hold(self):
+
+    """
+    Crée une réservation temporaire pour l'offre famille via l'API.
+    """
+    return self.client.post(
+      reverse('create_seat_hold'),
+      {"id_event": self.event.id_event, "id_offer": self.family.id_offer},
+      format='json'
+    )
+
+  def test_create_seat_hold_counts_against_availability(self):
+
+    """
+    Teste que la réservation temporaire décompte ses places des places disponibles de l'événement.
+    """
+    response = self.create_hold()
+
+    self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    self.assertIn('expires_at', response.json())
+
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.available_seats, 2)
+
+  def test_create_seat_hold_over_capacity(self):
+
+    """
+    Teste qu'une réservation temporaire est refusée lorsque l'événement n'a plus assez de places.
+    """
+    self.create_hold()
+    response = self.create_hold()
+
+    self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+    self.assertEqual(SeatHold.objects.count(), 1)
+
+  def test_payment_converts_seat_hold(self):
+
+    """
+    Teste que le paiement convertit la réservation temporaire en ligne de réservation sans décompter les places une seconde fois.
+    """
+    hold_id = self.create_hold().json()['id_seat_hold']
+
+    cart = [{"id_event": self.event.id_event, "id_offer": self.family.id_offer, "id_hold": hold_id}]
+    response = self.client.post(reverse('process_payment'), payment_data(cart), format='json')
+
+    self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    self.assertEqual(SeatHold.objects.count(), 0)
+    self.assertEqual(BookingLine.objects.count(), 1)
+
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.booked_seats, 4)
+
+  def test_reconcile_booked_seats_keeps_held_seats(self):
+
+    """
+    Teste que la réconciliation compte les places des réservations temporaires en cours et supprime les réservations
+    temporaires expirées, dont les places ne sont pas comptées.
+    """
+    self.location.total_seats = 8
+    self.location.save()
+
+    duo = Offer.objects.create(type="Offre Duo", number_seats=2, discount=5)
+    for _ in range(2):
+      self.client.post(reverse('create_seat_hold'), {"id_event": self.event.id_event, "id_offer": duo.id_offer}, format='json')
+    self.create_hold()
+    SeatHold.objects.filter(offer=self.family).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    self.assertEqual(SeatHold.objects.count(), 3)
+
+    Event.objects.reconcile_booked_seats()
+    self.event.refresh_from_db()
+
+    self.assertEqual(self.event.available_seats, 4)
+    self.assertEqual(SeatHold.objects.count(), 2)
+
+    # Les places des réservations temporaires comptées par la réconciliation sont rendues à leur expiration
+    SeatHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+    SeatHold.objects.expire()
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.available_seats, 8)
+
+  def test_payment_does_not_convert_expired_seat_hold(self):
+
+    """
+    Teste qu'une réservation temporaire expirée n'est pas convertie : le paiement réserve de nouveau ses places.
+    """
+    hold_id = self.create_hold().json()['id_seat_hold']
+    SeatHold.objects.filter(pk=hold_id).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    cart = [{"id_event": self.event.id_event, "id_offer": self.family.id_offer, "id_hold": hold_id}]
+    response = self.client.post(reverse('process_payment'), payment_data(cart), format='json')
+
+    self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+    self.assertEqual(BookingLine.objects.count(), 0)
+
+  @override_settings(SEAT_HOLD_MAX_PER_PERSON=1)
+  def test_create_seat_hold_limited_per_person(self):
+
+    """
+    Teste qu'une personne ne peut pas dépasser le nombre maximal de réservations temporaires en cours.
+    """
+    self.location.total_seats = 100
+    self.location.save()
+
+    self.assertEqual(self.create_hold().status_code, status.HTTP_201_CREATED)
+    self.assertEqual(self.create_hold().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+    self.assertEqual(SeatHold.objects.count(), 1)
+
+  def test_cancel_seat_hold_releases_seats(self):
+
+    """
+    Teste que l'annulation d'une réservation temporaire libère ses places.
+    """
+    hold_id = self.create_hold().json()['id_seat_hold']
+
+    response = self.client.delete(reverse('cancel_seat_hold', args=[hold_id]))
+
+    self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.available_seats, 6)
+
+
+
+
+@skipUnlessDBFeature('has_select_for_update')
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ProcessPaymentConcurrencyTest(TransactionTestCase):
+
+  BUYERS = 24
+  CAPACITY = 10
+
+  def setUp(self):
+
+    """
+    Crée deux événements de faible capacité et des acheteurs distincts pour les tests de concurrence.
+    """
+    sport = Sport.objects.create(
+      title="Athlétisme",
+      image="sports/athletisme.jpg"
+    )
+    location = Location.objects.create(
+      name="Stade de France",
+      city="Saint-Denis",
+      total_seats=self.CAPACITY
+    )
+    self.events = [
+      Event.objects.create(
+        sport=sport,
+        location=location,
+        date="2024-08-04",
+        start_time=f"{hour}:00:00",
+        end_time=f"{hour + 1}:00:00",
+        price="100.00"
+      )
+      for hour in (18, 20)
+    ]
+    self.offer = Offer.objects.create(
+      type="Offre Solo",
+      number_seats=1,
+      discount=0
+    )
+    self.users = [
+      User.objects.create_user(
+        email=f"acheteur{index}@example.com",
+        password="MotdepasseValide123!",
+        firstname="Jean",
+        lastname="Dupont",
+        date_of_birth="1990-01-01",
+        country="France"
+      )
+      for index in range(self.BUYERS)
+    ]
+
+  def test_concurrent_payments_never_oversell(self):
+
+    """
+    Teste que des paiements simultanés sur deux événements, avec des paniers dans des ordres opposés, ne dépassent jamais la capacité et ne
+    s'interbloquent pas.
+    """
+    first, second = self.events
+    barrier = threading.Barrier(self.BUYERS)
+    statuses = []
+
+    def buy(index: int) -> None:
+
+      client = APIClient()
+      client.force_authenticate(user=self.users[index])
+
+      # Une moitié des paniers référence les événements dans l'ordre inverse de l'autre
+      events = (first, second) if index % 2 else (second, first)
+      cart = [{"id_event": event.id_event, "id_offer": self.offer.id_offer} for event in events]
+
+      try:
+        barrier.wait()
+        response = client.post(reverse('process_payment'), payment_data(cart), format='json')
+        statuses.append(response.status_code)
+      finally:
+        connection.close()
+
+    threads = [threading.Thread(target=buy, args=(index,)) for index in range(self.BUYERS)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    # Chaque panier est accepté ou refusé en entier : exactement `CAPACITY` paiements aboutissent
+    self.assertEqual(statuses.count(status.HTTP_201_CREATED), self.CAPACITY)
+    self.assertEqual(statuses.count(status.HTTP_409_CONFLICT), self.BUYERS - self.CAPACITY)
+
+    for event in self.events:
+      event.refresh_from_db()
+      self.assertEqual(event.booked_seats, self.CAPACITY)
+      self.assertEqual(BookingLine.objects.filter(event=event).count(), self.CAPACITY)
+
+
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, QR_CODE_ON_DEMAND=True)
+class TicketQrCodeAPITest(TestCase):
+
+  def setUp(self):
+
+    """
+    Configure le client API authentifié, un événement et une offre pour les tests de génération à la demande.
+    """
+    self.client = APIClient()
+
+    self.user = User.objects.create_user(
+      email="jean.dupont@example.com",
+      password="MotdepasseValide123!",
+      firstname="Jean",
+      lastname="Dupont",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+    self.client.force_authenticate(user=self.user)
+
+    sport = Sport.objects.create(
+      title="Athlétisme",
+      image="sports/athletisme.jpg"
+    )
+    location = Location.objects.create(
+      name="Stade de France",
+      city="Saint-Denis",
+      total_seats=100
+    )
+    self.event = Event.objects.create(
+      sport=sport,
+      location=location,
+      date="2024-08-04",
+      start_time="20:00:00",
+      end_time="22:00:00",
+      price="100.00"
+    )
+    self.solo = Offer.objects.create(
+      type="Offre Solo",
+      number_seats=1,
+      discount=0
+    )
+
+  def pay(self) -> BookingLine:
+
+    """
+    Achète un billet et retourne la ligne de réservation créée.
+    """
+    cart = [{"id_event": self.event.id_event, "id_offer": self.solo.id_offer}]
+    self.client.post(reverse('process_payment'), payment_data(cart), format='json')
+    return BookingLine.objects.get()
+
+  def test_payment_does_not_render_images(self):
+
+    """
+    Teste que le paiement n'enregistre ni image ni tâche de génération, et que le billet est immédiatement disponible.
+    """
+    line = self.pay()
+
+    self.assertFalse(line.qr_code_image)
+    self.assertEqual(QrCodeJob.objects.count(), 0)
+
+    ticket = self.client.get(reverse('ticket_list')).json()[0]
+    self.assertEqual(ticket['qr_code_status'], "ready")
+    self.assertEqual(ticket['qr_code_image'], reverse('ticket_qr_code', args=[line.pk]))
+
+  def test_qr_code_is_rendered_with_strong_etag(self):
+
+    """
+    Teste que l'image est générée à la demande avec une ETag forte, puis validée par une réponse 304 sans contenu.
+    """
+    line = self.pay()
+    url = reverse('ticket_qr_code', args=[line.pk])
+
+    response = self.client.get(url)
+
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertEqual(response['Content-Type'], "image/png")
+    self.assertEqual(response.content, qrrender.render_png(line.qr_code))
+    self.assertFalse(response['ETag'].startswith("W/"))
+    self.assertIn("immutable", response['Cache-Control'])
+
+    response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    self.assertEqual(response.content, b"")
+
+  def test_qr_code_format_is_selected_by_query_parameter(self):
+
+    """
+    Teste que le paramètre `format` choisit le format de l'image, avec une ETag propre à chaque format.
+    """
+    line = self.pay()
+    url = reverse('ticket_qr_code', args=[line.pk])
+
+    png = self.client.get(url)
+    svg = self.client.get(url, {"format": "svg"})
+
+    self.assertEqual(svg.status_code, status.HTTP_200_OK)
+    self.assertEqual(svg['Content-Type'], "image/svg+xml")
+    self.assertEqual(svg.content, qrrender.render_svg(line.qr_code))
+    self.assertNotEqual(svg['ETag'], png['ETag'])
+
+    response = self.client.get(url, {"format": "gif"})
+
+    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    self.assertIn('format', response.json()['errors'])
+
+    # Dans le reste de l'API, le paramètre `format` garde son rôle de choix du format de la réponse
+    self.assertEqual(self.client.get(reverse('ticket_list'), {"format": "json"}).status_code, status.HTTP_200_OK)
+    self.assertEqual(self.client.get(reverse('ticket_list'), {"format": "svg"}).status_code, status.HTTP_404_NOT_FOUND)
+
+  def test_qr_code_of_other_user_is_not_found(self):
+
+    """
+    Teste qu'un utilisateur ne peut pas obtenir l'image du QR code du billet d'un autre utilisateur.
+    """
+    line = self.pay()
+    other = User.objects.create_user(
+      email="marie.curie@example.com",
+      password="MotdepasseValide123!",
+      firstname="Marie",
+      lastname="Curie",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+    self.client.force_authenticate(user=other)
+
+    response = self.client.get(reverse('ticket_qr_code', args=[line.pk]))
+
+    self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+
+
+@override_settings(QR_CODE_ON_DEMAND=True, GATE_INDEX_REFRESH=3600)
+class ScanTicketsAPITest(TestCase):
+
+  def setUp(self):
+
+    """
+    Configure le client API d'un membre du staff, un événement et deux billets achetés pour les tests de contrôle.
+    """
+    gate_index.cache_clear()
+
+    self.client = APIClient()
+
+    self.staff = User.objects.create_user(
+      email="controle@example.com",
+      password="MotdepasseValide123!",
+      firstname="Paul",
+      lastname="Martin",
+      date_of_birth="1985-01-01",
+      country="France",
+      is_staff=True
+    )
+    self.client.force_authenticate(user=self.staff)
+
+    self.user = User.objects.create_user(
+      email="jean.dupont@example.com",
+      password="MotdepasseValide123!",
+      firstname="Jean",
+      lastname="Dupont",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+
+    sport = Sport.objects.create(
+      title="Athlétisme",
+      image="sports/athletisme.jpg"
+    )
+    location = Location.objects.create(
+      name="Stade de France",
+      city="Saint-Denis",
+      total_seats=100
+    )
+    self.event = Event.objects.create(
+      sport=sport,
+      location=location,
+      date="2024-08-04",
+      start_time="20:00:00",
+      end_time="22:00:00",
+      price="100.00"
+    )
+    self.offer = Offer.objects.create(
+      type="Offre Solo",
+      number_seats=1,
+      discount=0
+    )
+    self.url = reverse('scan_tickets', args=[self.event.id_event])
+    self.lines = [self.buy() for _ in range(2)]
+
+  def buy(self) -> BookingLine:
+
+    """
+    Enregistre un billet de l'utilisateur pour l'événement.
+    """
+    line = BookingLine(booking=Booking.objects.create(person=self.user), event=self.event, offer=self.offer)
+    line.save()
+    return line
+
+  def scan(self, *qr_codes: str) -> list[str]:
+
+    """
+    Envoie un lot de scans et retourne l'état de chacun.
+    """
+    response = self.client.post(self.url, {"scans": list(qr_codes)}, format='json')
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    return [result['status'] for result in response.json()['results']]
+
+  def test_first_scan_is_admitted_and_duplicates_rejected(self):
+
+    """
+    Teste que seule la première entrée d'un billet est admise, y compris lorsqu'il est scanné deux fois dans un lot.
+    """
+    first, second = (line.qr_code for line in self.lines)
+
+    self.assertEqual(self.scan(first, first, "inconnu"), ["admitted", "duplicate", "invalid"])
+    self.assertEqual(self.scan(first, second), ["duplicate", "admitted"])
+
+    self.assertEqual(BookingLine.objects.filter(admitted_at__isnull=False).count(), 2)
+
+  def test_unknown_scans_do_not_query_database(self):
+
+    """
+    Teste qu'une fois l'index de l'événement chargé, les billets inconnus sont rejetés sans requête.
+    """
+    gate_index().warm([self.event.id_event])
+
+    with self.assertNumQueries(0):
+      self.assertEqual(self.scan("inconnu", self.lines[0].qr_code[::-1]), ["invalid", "invalid"])
+
+  @override_settings(GATE_INDEX_REFRESH=0)
+  def test_index_is_completed_with_new_tickets(self):
+
+    """
+    Teste qu'un billet acheté après le chargement de l'index est reconnu lors de son premier scan.
+    """
+    gate_index().warm([self.event.id_event])
+    line = self.buy()
+
+    self.assertEqual(self.scan(line.qr_code), ["admitted"])
+
+  def test_ticket_of_other_event_is_invalid(self):
+
+    """
+    Teste qu'un billet d'un autre événement est refusé et que l'événement inconnu renvoie une erreur 404.
+    """
+    other = Event.objects.create(
+      sport=self.event.sport,
+      location=self.event.location,
+      date="2024-08-05",
+      start_time="20:00:00",
+      end_time="22:00:00",
+      price="100.00"
+    )
+    response = self.client.post(reverse('scan_tickets', args=[other.id_event]), {"scans": [self.lines[0].qr_code]}, format='json')
+
+    self.assertEqual(response.json()['results'][0]['status'], "invalid")
+    self.assertIsNone(BookingLine.objects.get(pk=self.lines[0].pk).admitted_at)
+
+    response = self.client.post(reverse('scan_tickets', args=[0]), {"scans": [self.lines[0].qr_code]}, format='json')
+
+    self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+  @override_settings(GATE_INDEX_MAX_EVENTS=2)
+  def test_index_evicts_least_recently_scanned_events(self):
+
+    """
+    Teste que l'index ne conserve que les derniers événements contrôlés et recharge un événement retiré.
+    """
+    first, second = (
+      Event.objects.create(
+        sport=self.event.sport,
+        location=self.event.location,
+        date=date,
+        start_time="20:00:00",
+        end_time="22:00:00",
+        price="100.00"
+      )
+      for date in ("2024-08-05", "2024-08-06")
+    )
+    index = gate_index()
+
+    index.lookup(self.event.id_event, ["inconnu"])
+    index.lookup(first.id_event, ["inconnu"])
+    index.lookup(self.event.id_event, ["inconnu"])
+    index.lookup(second.id_event, ["inconnu"])
+
+    self.assertEqual(list(index._events), [self.event.id_event, second.id_event])
+
+    with self.assertNumQueries(0):
+      index.lookup(self.event.id_event, ["inconnu"])
+
+    self.assertEqual(index.lookup(first.id_event, [self.lines[0].qr_code]), set())
+    self.assertEqual(list(index._events), [self.event.id_event, first.id_event])
+
+  def test_offline_admissions_are_merged_idempotently(self):
+
+    """
+    Teste que le journal hors ligne enregistre les entrées, garde la plus ancienne date et peut être renvoyé sans effet.
+    """
+    first, second = self.lines
+    self.scan(first.qr_code)
+    admitted_online = BookingLine.objects.get(pk=first.pk).admitted_at
+
+    url = reverse('upload_offline_scans', args=[self.event.id_event])
+    data = {
+      "admissions": [
+        {"qr_code": second.qr_code, "admitted_at": "2024-08-04T19:05:00Z"},
+        {"qr_code": second.qr_code, "admitted_at": "2024-08-04T19:01:00Z"},
+        {"qr_code": first.qr_code, "admitted_at": "2099-01-01T00:00:00Z"},
+        {"qr_code": "inconnu", "admitted_at": "2024-08-04T19:02:00Z"}
+      ]
+    }
+
+    response = self.client.post(url, data, format='json')
+
+    self.assertEqual(
+      [result['status'] for result in response.json()['results']],
+      ["admitted", "duplicate", "invalid"]
+    )
+    self.assertEqual(BookingLine.objects.get(pk=first.pk).admitted_at, admitted_online)
+    self.assertEqual(BookingLine.objects.get(pk=second.pk).admitted_at.isoformat(), "2024-08-04T19:01:00+00:00")
+
+    response = self.client.post(url, data, format='json')
+
+    self.assertEqual([result['status'] for result in response.json()['results']], ["duplicate", "duplicate", "invalid"])
+    self.assertEqual(BookingLine.objects.get(pk=second.pk).admitted_at.isoformat(), "2024-08-04T19:01:00+00:00")
+
+  @override_settings(QR_CODE_SIGNED=True)
+  def test_signed_tickets_are_verified_without_query(self):
+
+    """
+    Teste que les billets signés sont admis sans index, et que les billets falsifiés sont refusés sans requête.
+    """
+    line = self.buy()
+    forged = line.qr_code[:-1] + ("0" if line.qr_code[-1] != "0" else "1")
+
+    with self.assertNumQueries(0):
+      self.assertEqual(self.scan(forged, "inconnu"), ["invalid", "invalid"])
+
+    self.assertEqual(self.scan(line.qr_code, forged), ["admitted", "invalid"])
+    self.assertEqual(self.scan(line.qr_code), ["duplicate"])
+
+  def test_scan_requires_staff_and_valid_batch(self):
+
+    """
+    Teste que le contrôle est réservé au staff et que le lot de scans doit être une liste non vide.
+    """
+    response = self.client.post(self.url, {"scans": []}, format='json')
+    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    self.client.force_authenticate(user=self.user)
+    response = self.client.post(self.url, {"scans": [self.lines[0].qr_code]}, format='json')
+
+    self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    self.assertIsNone(BookingLine.objects.get(pk=self.lines[0].pk).admitted_at)
@@ -0,0 +1,251 @@
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from booking.gate import GateSnapshot
+from booking.models import Booking, BookingLine, QrCodeJob, SalesRollup
+from event.models import Event, Location, Sport
+from offer.models import Offer
+from user.models import Person
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RegenerateQrCommandTests(TestCase):
+
+  @classmethod
+  def tearDownClass(cls):
+
+    """
+    Supprime le dossier temporaire contenant les images des QR codes générés pendant les tests.
+    """
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+    super().tearDownClass()
+
+  def setUp(self):
+
+    """
+    Crée des lignes de réservation, dont une seule avec une image, et un fichier de reprise temporaire.
+    """
+    sport = Sport.objects.create(
+      title="Rugby à 7",
+      image="sports/rugby.jpg"
+    )
+    location = Location.objects.create(
+      name="Stade de France",
+      city="Saint-Denis",
+      total_seats=80000
+    )
+    event = Event.objects.create(
+      sport=sport,
+      location=location,
+      date="2024-07-24",
+      start_time="15:30:00",
+      end_time="22:00:00",
+      price="24.00"
+    )
+    offer = Offer.objects.create(
+      type="Offre Solo",
+      number_seats=1,
+      discount=0
+    )
+    person = Person.objects.create(
+      firstname="Jean",
+      lastname="Dupont",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+    booking = Booking.objects.create(person=person)
+
+    # Une ligne enregistrée avec son image, les autres en attente de génération
+    BookingLine.objects.create(booking=booking, event=event, offer=offer)
+    lines = [BookingLine(booking=booking, event=event, offer=offer, amount=event.price) for _ in range(4)]
+    for line in lines:
+      line.generate_qr_code(person.pk)
+    BookingLine.objects.bulk_create(lines)
+    QrCodeJob.objects.bulk_create([QrCodeJob(booking_line=line) for line in lines])
+
+    self.checkpoint = os.path.join(tempfile.mkdtemp(), "regenerate_qr.checkpoint")
+
+  def test_regenerate_qr_replaces_all_images(self):
+
+    """
+    Teste que la commande génère une nouvelle image pour chaque ligne, supprime l'ancienne et vide la file de génération.
+    """
+    old_image = BookingLine.objects.exclude(qr_code_image='').get().qr_code_image
+
+    call_command("regenerate_qr", workers=0, batch_size=2, checkpoint=self.checkpoint, stdout=StringIO())
+
+    images = set(BookingLine.objects.values_list('qr_code_image', flat=True))
+    self.assertEqual(len(images), 5)
+    self.assertNotIn('', images)
+    self.assertNotIn(old_image.name, images)
+    self.assertFalse(old_image.storage.exists(old_image.name))
+    self.assertEqual(QrCodeJob.objects.count(), 0)
+    self.assertFalse(os.path.exists(self.checkpoint))
+
+  def test_regenerate_qr_resumes_after_checkpoint(self):
+
+    """
+    Teste que la commande reprend après la ligne enregistrée dans le fichier de reprise.
+    """
+    pks = list(BookingLine.objects.order_by('pk').values_list('pk', flat=True))
+    with open(self.checkpoint, "w") as file:
+      file.write(str(pks[2]))
+
+    before = dict(BookingLine.objects.values_list('pk', 'qr_code_image'))
+    call_command("regenerate_qr", workers=0, checkpoint=self.checkpoint, stdout=StringIO())
+    after = dict(BookingLine.objects.values_list('pk', 'qr_code_image'))
+
+    self.assertEqual([after[pk] == before[pk] for pk in pks], [True, True, True, False, False])
+
+
+
+
+@override_settings(QR_CODE_ON_DEMAND=True)
+class ExportGateIndexCommandTests(TestCase):
+
+  def setUp(self):
+
+    """
+    Crée deux événements avec des billets et un dossier temporaire pour les instantanés exportés.
+    """
+    sport = Sport.objects.create(
+      title="Rugby à 7",
+      image="sports/rugby.jpg"
+    )
+    location = Location.objects.create(
+      name="Stade de France",
+      city="Saint-Denis",
+      total_seats=80000
+    )
+    self.event, self.other = (
+      Event.objects.create(
+        sport=sport,
+        location=location,
+        date=date,
+        start_time="15:30:00",
+        end_time="22:00:00",
+        price="24.00"
+      )
+      for date in ("2024-07-24", "2024-07-25")
+    )
+    offer = Offer.objects.create(
+      type="Offre Solo",
+      number_seats=1,
+      discount=0
+    )
+    person = Person.objects.create(
+      firstname="Jean",
+      lastname="Dupont",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+    booking = Booking.objects.create(person=person)
+
+    self.lines = [BookingLine.objects.create(booking=booking, event=self.event, offer=offer) for _ in range(50)]
+    self.other_line = BookingLine.objects.create(booking=booking, event=self.other, offer=offer)
+
+    directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+    self.output = os.path.join(directory, "gate.idx")
+
+  def test_export_gate_index_writes_searchable_snapshot(self):
+
+    """
+    Teste que l'instantané exporté contient exactement les billets de l'événement, triés et retrouvés par le lecteur.
+    """
+    call_command("export_gate_index", self.event.id_event, output=self.output, batch_size=7, stdout=StringIO())
+
+    with GateSnapshot(self.output) as snapshot:
+
+      self.assertEqual(snapshot.event_id, self.event.id_event)
+      self.assertEqual(len(snapshot), 50)
+      self.assertTrue((snapshot.hashes[:-1] < snapshot.hashes[1:]).all())
+
+      self.assertTrue(all(line.qr_code in snapshot for line in self.lines))
+      self.assertNotIn(self.other_line.qr_code, snapshot)
+      self.assertEqual(
+        snapshot.contains([self.lines[0].qr_code, "inconnu", self.lines[-1].qr_code]).tolist(),
+        [True, False, True]
+      )
+
+  def test_export_gate_index_rejects_unknown_event(self):
+
+    """
+    Teste que la commande échoue pour un événement inexistant et que le lecteur refuse un fichier invalide.
+    """
+    with self.assertRaises(CommandError):
+      call_command("export_gate_index", 0, output=self.output, stdout=StringIO())
+
+    with open(self.output, "wb") as file:
+      file.write(bytes(64))
+
+    with self.assertRaises(ValueError):
+      GateSnapshot(self.output)
+
+
+
+
+@override_settings(QR_CODE_ON_DEMAND=True)
+class RebuildRollupsCommandTests(TestCase):
+
+  def setUp(self):
+
+    """
+    Crée deux événements avec des lignes de réservation enregistrées sans mise à jour des cumuls des ventes.
+    """
+    sport = Sport.objects.create(
+      title="Rugby à 7",
+      image="sports/rugby.jpg"
+    )
+    location = Location.objects.create(
+      name="Stade de France",
+      city="Saint-Denis",
+      total_seats=80000
+    )
+    self.events = [
+      Event.objects.create(
+        sport=sport,
+        location=location,
+        date=date,
+        start_time="15:30:00",
+        end_time="22:00:00",
+        price="24.00"
+      )
+      for date in ("2024-07-24", "2024-07-25")
+    ]
+    offer = Offer.objects.create(
+      type="Offre Duo",
+      number_seats=2,
+      discount=10
+    )
+    person = Person.objects.create(
+      firstname="Jean",
+      lastname="Dupont",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+    booking = Booking.objects.create(person=person)
+
+    for event, count in zip(self.events, (3, 5)):
+      for _ in range(count):
+        BookingLine.objects.create(booking=booking, event=event, offer=offer)
+
+  def test_rebuild_rollups_recomputes_all_events(self):
+
+    """
+    Teste que la commande recalcule les cumuls des ventes de chaque événement à partir des lignes de réservation.
+    """
+    output = StringIO()
+    call_command("rebuild_rollups", workers=0, stdout=output)
+
+    self.assertIn("2 cumul(s) recalculé(s) pour 2 événement(s)", output.getvalue())
+    self.assertEqual(
+      sorted(SalesRollup.objects.values_list('event_id', 'lines', 'seats', 'revenue')),
+      [(self.events[0].id_event, 3, 6, Decimal("129.60")), (self.events[1].id_event, 5, 10, Decimal("216.00"))]
+    )
\ No newline at end of file
@@ -0,0 +1,356 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from booking.models import Booking, BookingLine, SalesRollup, SeatHold
+from event.models import Event, Location, Sport
+from offer.models import Offer
+from user.models import Person
+
+class SeatHoldModelTests(TestCase):
+
+  def setUp(self):
+
+    """
+    Crée un événement, une offre et une personne pour tester les réservations temporaires.
+    """
+    sport = Sport.objects.create(
+      title="Judo",
+      image="sports/judo.jpg"
+    )
+    location = Location.objects.create(
+      name="Arena Champ-de-Mars",
+      city="Paris",
+      total_seats=100
+    )
+    self.event = Event.objects.create(
+      sport=sport,
+      location=location,
+      date="2024-08-02",
+      start_time="10:00:00",
+      end_time="12:00:00",
+      price="45.00"
+    )
+    self.offer = Offer.objects.create(
+      type="Offre Duo",
+      number_seats=2,
+      discount=5
+    )
+    self.person = Person.objects.create(
+      firstname="Jean",
+      lastname="Dupont",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+
+  def create_hold(self, expires_in: int) -> SeatHold:
+
+    """
+    Crée une réservation temporaire dont les places sont décomptées du compteur de l'événement.
+    """
+    Event.objects.allocate_seats({self.event.id_event: self.offer.number_seats})
+
+    return SeatHold.objects.create(
+      person=self.person,
+      event=self.event,
+      offer=self.offer,
+      expires_at=timezone.now() + timedelta(seconds=expires_in)
+    )
+
+  def test_expire_releases_only_expired_holds(self):
+
+    """
+    Teste que `expire` supprime les réservations temporaires expirées et rend leurs places, sans toucher aux autres.
+    """
+    for _ in range(3):
+      self.create_hold(-60)
+    active = self.create_hold(600)
+
+    self.assertEqual(SeatHold.objects.expire(batch_size=2), 2)
+    self.assertEqual(SeatHold.objects.expire(batch_size=2), 1)
+    self.assertEqual(SeatHold.objects.expire(batch_size=2), 0)
+
+    self.assertEqual(list(SeatHold.objects.all()), [active])
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.booked_seats, 2)
+
+  def test_cascade_deletes_release_holds(self):
+
+    """
+    Teste que la suppression d'une offre ou d'une personne rend les places de leurs réservations temporaires.
+    """
+    for _ in range(2):
+      self.create_hold(600)
+
+    self.person.delete()
+
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.booked_seats, 0)
+    self.assertFalse(SeatHold.objects.exists())
+
+    self.person = Person.objects.create(
+      firstname="Marie",
+      lastname="Durand",
+      date_of_birth="1992-01-01",
+      country="France"
+    )
+    self.create_hold(600)
+
+    self.offer.delete()
+
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.booked_seats, 0)
+    self.assertFalse(SeatHold.objects.exists())
+
+
+
+
+@override_settings(QR_CODE_ON_DEMAND=True)
+class SalesRollupModelTests(TestCase):
+
+  def setUp(self):
+
+    """
+    Crée un événement, deux offres et une réservation pour tester les cumuls des ventes.
+    """
+    sport = Sport.objects.create(
+      title="Judo",
+      image="sports/judo.jpg"
+    )
+    location = Location.objects.create(
+      name="Arena Champ-de-Mars",
+      city="Paris",
+      total_seats=100
+    )
+    self.event = Event.objects.create(
+      sport=sport,
+      location=location,
+      date="2024-08-02",
+      start_time="10:00:00",
+      end_time="12:00:00",
+      price="45.00"
+    )
+    self.solo = Offer.objects.create(
+      type="Offre Solo",
+      number_seats=1,
+      discount=0
+    )
+    self.duo = Offer.objects.create(
+      type="Offre Duo",
+      number_seats=2,
+      discount=5
+    )
+    person = Person.objects.create(
+      firstname="Jean",
+      lastname="Dupont",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+    self.booking = Booking.objects.create(person=person)
+    self.day = timezone.localdate(self.booking.booking_date)
+
+  def sell(self, *offers: Offer) -> list[BookingLine]:
+
+    """
+    Enregistre une ligne de réservation par offre et les ajoute aux cumuls des ventes, comme le paiement.
+    """
+    lines = [BookingLine(booking=self.booking, event=self.event, offer=offer) for offer in offers]
+    for line in lines:
+      line.save()
+    SalesRollup.objects.record(lines)
+
+    return lines
+
+  def rollups(self) -> dict:
+
+    """
+    Retourne les cumuls des ventes de l'événement, indexés par offre.
+    """
+    return {
+      rollup.offer_id: (rollup.lines, rollup.seats, rollup.revenue)
+      for rollup in SalesRollup.objects.filter(event=self.event, day=self.day)
+    }
+
+  def test_record_accumulates_sales(self):
+
+    """
+    Teste que les ventes successives sont cumulées par offre, avec le chiffre d'affaires après réduction, en trois
+    requêtes quel que soit le nombre de lignes.
+    """
+    self.sell(self.solo, self.duo)
+
+    lines = [BookingLine(booking=self.booking, event=self.event, offer=offer) for offer in (self.duo, self.duo, self.solo)]
+    for line in lines:
+      line.save()
+
+    # Trois requêtes, encadrées par le point de sauvegarde de la transaction
+    with self.assertNumQueries(5):
+      SalesRollup.objects.record(lines)
+
+    self.assertEqual(self.rollups(), {
+      self.solo.id_offer: (2, 2, Decimal("90.00")),
+      self.duo.id_offer: (3, 6, Decimal("256.50"))
+    })
+
+  def test_delete_removes_sales(self):
+
+    """
+    Teste que la suppression d'une ligne de réservation la retire des cumuls des ventes.
+    """
+    solo, duo, _ = self.sell(self.solo, self.duo, self.duo)
+
+    solo.delete()
+    duo.delete()
+
+    self.assertEqual(self.rollups(), {
+      self.solo.id_offer: (0, 0, Decimal("0.00")),
+      self.duo.id_offer: (1, 2, Decimal("85.50"))
+    })
+
+  def test_cascade_deletes_handled_in_bulk(self):
+
+    """
+    Teste que la suppression d'une réservation libère les places de ses lignes et les retire des cumuls des ventes en un
+    nombre de requêtes indépendant du nombre de lignes, et que la suppression d'une offre libère les places de ses lignes.
+    """
+    Event.objects.add_booked_seats({self.event.id_event: 13})
+    queries = []
+
+    for size in (1, 4):
+
+      self.booking = Booking.objects.create(person=self.booking.person)
+      self.sell(*[self.duo] * size)
+
+      with CaptureQueriesContext(connection) as context:
+        self.booking.delete()
+
+      queries.append(len(context.captured_queries))
+
+    self.assertEqual(queries[0], queries[1])
+    self.assertEqual(self.rollups(), {self.duo.id_offer: (0, 0, Decimal("0.00"))})
+
+    self.booking = Booking.objects.create(person=self.booking.person)
+    self.sell(self.solo, self.solo, self.solo)
+    self.solo.delete()
+
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.booked_seats, 0)
+    self.assertFalse(SalesRollup.objects.filter(offer_id=self.solo.id_offer).exists())
+
+  def test_rebuild_matches_recorded_sales(self):
+
+    """
+    Teste que la reconstruction retrouve les cumuls enregistrés au fil des ventes et corrige un cumul faux ou orphelin.
+    """
+    self.sell(self.solo, self.duo, self.duo)
+    recorded = self.rollups()
+
+    SalesRollup.objects.filter(offer=self.duo).update(lines=10)
+    SalesRollup.objects.create(event=self.event, offer=self.solo, day=self.day - timedelta(days=1), lines=1, seats=1)
+
+    self.assertEqual(SalesRollup.objects.rebuild(self.event.id_event), 2)
+    self.assertEqual(self.rollups(), recorded)
+    self.assertEqual(SalesRollup.objects.filter(event=self.event).count(), 2)
+
+  def test_sales_keep_their_amount_after_price_change(self):
+
+    """
+    Teste que le chiffre d'affaires d'une vente reste celui du prix et de la réduction du moment de la vente, lors de sa
+    suppression comme de la reconstruction des cumuls.
+    """
+    solo, duo = self.sell(self.solo, self.duo)
+
+    Event.objects.filter(pk=self.event.pk).update(price="60.00")
+    Offer.objects.filter(pk=self.duo.pk).update(discount=20)
+
+    SalesRollup.objects.rebuild(self.event.id_event)
+
+    self.assertEqual(self.rollups(), {
+      self.solo.id_offer: (1, 1, Decimal("45.00")),
+      self.duo.id_offer: (1, 2, Decimal("85.50"))
+    })
+
+    BookingLine.objects.get(pk=duo.pk).delete()
+    BookingLine.objects.get(pk=solo.pk).delete()
+
+    self.assertEqual(self.rollups(), {
+      self.solo.id_offer: (0, 0, Decimal("0.00")),
+      self.duo.id_offer: (0, 0, Decimal("0.00"))
+    })
+
+
+
+
+@override_settings(
+  QR_CODE_ON_DEMAND=True,
+  QR_CODE_SIGNED=True,
+  QR_CODE_SIGNING_KEYS={"K1": "premiere-cle", "K2": "seconde-cle"},
+  QR_CODE_SIGNING_KEY_ID="K1"
+)
+class BookingLineQrCodeTests(TestCase):
+
+  def setUp(self):
+
+    """
+    Crée une ligne de réservation signée avec la première clé.
+    """
+    sport = Sport.objects.create(
+      title="Judo",
+      image="sports/judo.jpg"
+    )
+    location = Location.objects.create(
+      name="Arena Champ-de-Mars",
+      city="Paris",
+      total_seats=100
+    )
+    self.event = Event.objects.create(
+      sport=sport,
+      location=location,
+      date="2024-08-02",
+      start_time="10:00:00",
+      end_time="12:00:00",
+      price="45.00"
+    )
+    offer = Offer.objects.create(
+      type="Offre Solo",
+      number_seats=1,
+      discount=0
+    )
+    person = Person.objects.create(
+      firstname="Jean",
+      lastname="Dupont",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+    self.line = BookingLine(booking=Booking.objects.create(person=person), event=self.event, offer=offer)
+    self.line.save()
+
+  def test_resave_keeps_qr_code_after_key_rotation(self):
+
+    """
+    Teste qu'un nouvel enregistrement de la ligne après une rotation des clés conserve son QR code, et qu'un changement
+    d'événement en génère un nouveau avec la clé courante.
+    """
+    qr_code = self.line.qr_code
+
+    with self.settings(QR_CODE_SIGNING_KEY_ID="K2"):
+
+      line = BookingLine.objects.get(pk=self.line.pk)
+      line.save()
+      self.assertEqual(BookingLine.objects.get(pk=line.pk).qr_code, qr_code)
+
+      line.event = Event.objects.create(
+        sport=self.event.sport,
+        location=self.event.location,
+        date="2024-08-03",
+        start_time="10:00:00",
+        end_time="12:00:00",
+        price="45.00"
+      )
+      line.save()
+
+    self.assertNotEqual(line.qr_code, qr_code)
+    self.assertIn(".K2.", line.qr_code)
+
@@ -0,0 +1,130 @@
+import shutil
+import tempfile
+import numpy as np
+import xml.etree.ElementTree as ElementTree
+from io import BytesIO
+from django.test import SimpleTestCase
+from PIL import Image
+from booking import qrcache, qrrender
+from booking.management.commands.benchmark_qr import render_legacy_png
+
+PAYLOAD = "0f8fad5b-d9cb-469f-a165-70867728950e|7c9e6679-7425-40de-944b-e07fc1f90ae7"
+
+def decode(content: bytes) -> np.ndarray:
+
+  """
+  Décode une image PNG en tableau de pixels RGBA.
+  """
+  return np.array(Image.open(BytesIO(content)).convert('RGBA'))
+
+
+
+
+class QrRenderTests(SimpleTestCase):
+
+  def test_render_png_matches_legacy_rendering(self):
+
+    """
+    Teste que le moteur produit exactement les mêmes pixels que l'implémentation historique de `BookingLine.save()`.
+    """
+    np.testing.assert_array_equal(decode(qrrender.render_png(PAYLOAD)), decode(render_legacy_png(PAYLOAD)))
+
+  def test_gradient_is_cached_and_read_only(self):
+
+    """
+    Teste que le dégradé est calculé une seule fois par largeur d'image et ne peut pas être modifié.
+    """
+    first = qrrender.gradient(430)
+
+    self.assertIs(qrrender.gradient(430), first)
+    self.assertFalse(first.flags.writeable)
+
+  def test_render_batch_matches_single_rendering(self):
+
+    """
+    Teste que la génération par lot retourne les mêmes images, dans le même ordre, que la génération unitaire.
+    """
+    payloads = [PAYLOAD, PAYLOAD[::-1]]
+
+    self.assertEqual(qrrender.render_batch(payloads), [qrrender.render_png(payload) for payload in payloads])
+
+  def test_render_palette_png_matches_rgba_rendering(self):
+
+    """
+    Teste que l'image à palette est une image 8 bits, plus légère, dont les couleurs s'écartent d'au plus une unité
+    de l'image RGBA.
+    """
+    content = qrrender.render_palette_png(PAYLOAD)
+    difference = decode(content).astype(int) - decode(qrrender.render_png(PAYLOAD)).astype(int)
+
+    self.assertEqual(Image.open(BytesIO(content)).mode, "P")
+    self.assertLess(len(content), len(qrrender.render_png(PAYLOAD)))
+    self.assertLessEqual(np.abs(difference).max(), 1)
+
+  def test_render_svg_draws_every_dark_module(self):
+
+    """
+    Teste que l'image SVG a la taille de l'image PNG, applique le dégradé et couvre exactement les modules foncés.
+    """
+    matrix = qrrender.qr_matrix(PAYLOAD)
+    root = ElementTree.fromstring(qrrender.render_svg(PAYLOAD))
+    namespace = "{http://www.w3.org/2000/svg}"
+
+    self.assertEqual(root.get("width"), str(matrix.shape[1] * qrrender.BOX_SIZE))
+    self.assertIsNotNone(root.find(f"{namespace}defs/{namespace}linearGradient"))
+
+    # Chaque rectangle du tracé couvre une plage de modules d'une ligne
+    drawn = np.zeros_like(matrix)
+    for command in root.find(f"{namespace}path").get("d").split("z")[:-1]:
+      x, y = map(int, command[1:command.index("h")].split())
+      width = int(command[command.index("h") + 1:command.index("v")])
+      drawn[y, x:x + width] = True
+
+    np.testing.assert_array_equal(drawn, matrix)
+
+  def test_render_dispatches_on_format(self):
+
+    """
+    Teste que la génération générique et par lot utilise le moteur du format demandé.
+    """
+    self.assertEqual(qrrender.render(PAYLOAD, "svg"), qrrender.render_svg(PAYLOAD))
+    self.assertEqual(qrrender.render_batch([PAYLOAD], "png8"), [qrrender.render_palette_png(PAYLOAD)])
+
+
+
+
+class QrImageCacheTests(SimpleTestCase):
+
+  def test_cache_evicts_least_recently_used_image(self):
+
+    """
+    Teste que le cache mémoire conserve au plus le nombre d'images configuré, en évinçant la moins récemment servie.
+    """
+    cache = qrcache.QrImageCache(max_entries=2)
+    first, second, third = PAYLOAD, PAYLOAD[::-1], PAYLOAD.upper()
+
+    self.assertEqual(cache.get(first), qrrender.render_png(first))
+    cache.get(second)
+    cache.get(first)
+    cache.get(third)
+
+    self.assertEqual(len(cache), 2)
+    self.assertIn(f"{qrcache.image_key(first)}.png", cache._entries)
+    self.assertNotIn(f"{qrcache.image_key(second)}.png", cache._entries)
+
+  def test_disk_cache_is_shared_between_instances(self):
+
+    """
+    Teste que les images écrites dans le cache disque sont relues par un autre cache sans nouvelle génération.
+    """
+    directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+
+    content = qrcache.QrImageCache(max_entries=1, directory=directory).get(PAYLOAD)
+    path = f"{directory}/{qrcache.image_key(PAYLOAD)}.png"
+
+    with open(path, "wb") as file:
+      file.write(b"cached")
+
+    self.assertEqual(content, qrrender.render_png(PAYLOAD))
+    self.assertEqual(qrcache.QrImageCache(max_entries=1, directory=directory).get(PAYLOAD), b"cached")
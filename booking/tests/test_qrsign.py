@@ -0,0 +1,87 @@
+import uuid
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.test import SimpleTestCase, override_settings
+from booking import qrsign
+from booking.models import BookingLine
+
+LINE_ID = uuid.UUID("0f8fad5b-d9cb-469f-a165-70867728950e")
+
+@override_settings(QR_CODE_SIGNING_KEYS={"K1": "premiere-cle", "K2": "seconde-cle"}, QR_CODE_SIGNING_KEY_ID="K2")
+class QrSignTests(SimpleTestCase):
+
+  def test_signed_payload_is_verified(self):
+
+    """
+    Teste que le contenu signé porte la ligne, l'événement et la clé courante, et que sa signature est vérifiée.
+    """
+    payload = qrsign.sign(LINE_ID, 12)
+
+    self.assertTrue(payload.startswith(f"{LINE_ID.hex.upper()}.12.K2."))
+    self.assertEqual(qrsign.verify(payload), (LINE_ID, 12))
+
+  def test_forged_payloads_are_rejected(self):
+
+    """
+    Teste qu'un contenu dont la ligne, l'événement ou la signature a été modifié est refusé.
+    """
+    payload = qrsign.sign(LINE_ID, 12)
+    line, event, key, signature = payload.split(".")
+
+    self.assertIsNone(qrsign.verify(f"{line}.13.{key}.{signature}"))
+    self.assertIsNone(qrsign.verify(f"{uuid.uuid4().hex.upper()}.{event}.{key}.{signature}"))
+    self.assertIsNone(qrsign.verify(f"{line}.{event}.{key}.{'0' * 16}"))
+    self.assertIsNone(qrsign.verify("inconnu"))
+
+  def test_rotated_keys(self):
+
+    """
+    Teste qu'un billet signé avec une ancienne clé reste valide tant que cette clé est conservée.
+    """
+    with self.settings(QR_CODE_SIGNING_KEY_ID="K1"):
+      payload = qrsign.sign(LINE_ID, 12)
+
+    self.assertEqual(qrsign.verify(payload), (LINE_ID, 12))
+
+    with self.settings(QR_CODE_SIGNING_KEYS={"K2": "seconde-cle"}):
+      self.assertIsNone(qrsign.verify(payload))
+
+  def test_partition_sorts_scans_without_query(self):
+
+    """
+    Teste que les scans sont répartis entre billets signés valides pour l'événement et billets historiques.
+    """
+    valid = qrsign.sign(LINE_ID, 12)
+    other_event = qrsign.sign(uuid.uuid4(), 13)
+    legacy = f"{LINE_ID}|{uuid.uuid4()}"
+
+    self.assertEqual(qrsign.partition([valid, other_event, legacy, "inconnu"], 12), ({valid}, [legacy]))
+
+  def test_check_keys_rejects_invalid_configuration(self):
+
+    """
+    Teste que la vérification au démarrage refuse un identifiant de clé hors du format des contenus signés, et une clé
+    courante absente des clés configurées.
+    """
+    qrsign.check_keys()
+
+    for key_id in ("k1", "CLE-1", "K123456789"):
+      with self.subTest(key_id=key_id), override_settings(QR_CODE_SIGNING_KEYS={key_id: "cle"}, QR_CODE_SIGNING_KEY_ID=key_id):
+        with self.assertRaises(ImproperlyConfigured):
+          qrsign.check_keys()
+
+    with override_settings(QR_CODE_SIGNING_KEY_ID="K3"):
+      with self.assertRaises(ImproperlyConfigured):
+        qrsign.check_keys()
+
+  def test_qr_code_validator_accepts_both_formats(self):
+
+    """
+    Teste que le champ `qr_code` accepte le format historique et le format signé, et refuse les autres contenus.
+    """
+    field = BookingLine._meta.get_field('qr_code')
+
+    field.run_validators(qrsign.sign(LINE_ID, 12))
+    field.run_validators(f"{LINE_ID}|{uuid.uuid4()}")
+
+    with self.assertRaises(ValidationError):
+      field.run_validators("inconnu")
@@ -2,5 +2,11 @@ from django.urls import path
 from . import api
 
 urlpatterns = [
-  path('payment', api.process_payment, name='process_payment')
-]
\ No newline at end of file
+  path('payment', api.process_payment, name='process_payment'),
+  path('holds', api.create_seat_hold, name='create_seat_hold'),
+  path('holds/<uuid:hold_id>', api.cancel_seat_hold, name='cancel_seat_hold'),
+  path('tickets', api.ticket_list, name='ticket_list'),
+  path('tickets/<uuid:line_id>/qr', api.TicketQrCodeView.as_view(), name='ticket_qr_code'),
+  path('scan/<int:event_id>', api.scan_tickets, name='scan_tickets'),
+  path('scan/<int:event_id>/offline', api.upload_offline_scans, name='upload_offline_scans')
+]
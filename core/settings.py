@@ -161,8 +161,95 @@ REST_FRAMEWORK = {
 # Simple JWT settings
 SIMPLE_JWT = {
     "USER_ID_FIELD": "id_person",
-    "USER_ID_CLAIM": "user_id"
+    "USER_ID_CLAIM": "user_id",
+    # Utilisateur construit à partir des revendications du jeton par `user.authentication.ClaimsAuthentication`
+    "TOKEN_USER_CLASS": "user.authentication.ClaimsUser",
+    # Jetons refusés après leur révocation à la déconnexion
+    "AUTH_TOKEN_CLASSES": ("user.tokens.RevocableAccessToken",),
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.CustomTokenRefreshSerializer"
 }
 
+# Nombre de jetons révoqués attendus et taux de faux positifs du filtre de Bloom placé devant la table des jetons révoqués,
+# et durée de conservation, en secondes, des révocations publiées aux autres processus dans le cache partagé. Sans cache
+# partagé (`LocMemCache`), chaque processus relit les révocations récentes toutes les `LOCAL_CACHE_MAX_AGE` secondes, avec
+# une fenêtre de recouvrement de `TOKEN_DENYLIST_OVERLAP` secondes, et reconstruit son filtre toutes les
+# `TOKEN_DENYLIST_SYNC_TTL` secondes
+TOKEN_DENYLIST_CAPACITY = int(os.environ.get("TOKEN_DENYLIST_CAPACITY", 100000))
+TOKEN_DENYLIST_ERROR_RATE = float(os.environ.get("TOKEN_DENYLIST_ERROR_RATE", 0.001))
+TOKEN_DENYLIST_SYNC_TTL = int(os.environ.get("TOKEN_DENYLIST_SYNC_TTL", 3600))
+TOKEN_DENYLIST_OVERLAP = int(os.environ.get("TOKEN_DENYLIST_OVERLAP", 300))
+
 # Url
-WEBSITE_URL = os.environ.get("WEBSITE_URL")
\ No newline at end of file
+WEBSITE_URL = os.environ.get("WEBSITE_URL")
+
+# Billetterie
+# Nombre de compteurs de places répartis pour les événements à forte demande
+SEAT_COUNTER_SHARDS = int(os.environ.get("SEAT_COUNTER_SHARDS", 16))
+
+# Durée de validité, en secondes, d'une réservation temporaire de places
+SEAT_HOLD_TTL = int(os.environ.get("SEAT_HOLD_TTL", 600))
+
+# Nombre maximal de réservations temporaires actives par personne
+SEAT_HOLD_MAX_PER_PERSON = int(os.environ.get("SEAT_HOLD_MAX_PER_PERSON", 10))
+
+# Format des images des QR codes : "png" (RGBA), "png8" (PNG 8 bits à palette) ou "svg"
+QR_CODE_FORMAT = os.environ.get("QR_CODE_FORMAT", "png")
+
+# Génère les images des QR codes à la demande, sans les enregistrer dans les médias
+QR_CODE_ON_DEMAND = os.environ.get("QR_CODE_ON_DEMAND", "False") == "True"
+
+# Contenu signé des QR codes des nouveaux billets, vérifiable sans requête : clés HMAC par identifiant
+# ("K1:secret,K2:secret"), la clé courante signant les nouveaux billets et les autres restant acceptées. Les
+# identifiants, de 1 à 8 chiffres ou lettres majuscules, sont vérifiés au démarrage par `booking.qrsign.check_keys`
+QR_CODE_SIGNED = os.environ.get("QR_CODE_SIGNED", "False") == "True"
+QR_CODE_SIGNING_KEYS = dict(
+    item.split(":", 1) for item in os.environ.get("QR_CODE_SIGNING_KEYS", "").split(",") if item
+) or {"0": SECRET_KEY}
+QR_CODE_SIGNING_KEY_ID = os.environ.get("QR_CODE_SIGNING_KEY_ID", next(iter(QR_CODE_SIGNING_KEYS)))
+
+# Nombre d'images de QR code conservées en mémoire par processus, et dossier facultatif du cache disque
+QR_CODE_CACHE_SIZE = int(os.environ.get("QR_CODE_CACHE_SIZE", 2048))
+QR_CODE_CACHE_DIR = os.environ.get("QR_CODE_CACHE_DIR")
+
+# Contrôle des billets aux portes : intervalle minimal entre deux compléments de l'index d'un événement, fenêtre de
+# recouvrement des paiements en cours (en secondes), nombre maximal de scans par requête, en direct ou hors ligne, et
+# préchargement au démarrage
+GATE_INDEX_REFRESH = int(os.environ.get("GATE_INDEX_REFRESH", 5))
+GATE_INDEX_OVERLAP = int(os.environ.get("GATE_INDEX_OVERLAP", 300))
+GATE_SCAN_BATCH_MAX = int(os.environ.get("GATE_SCAN_BATCH_MAX", 500))
+GATE_OFFLINE_BATCH_MAX = int(os.environ.get("GATE_OFFLINE_BATCH_MAX", 20000))
+GATE_INDEX_WARM = os.environ.get("GATE_INDEX_WARM", "False") == "True"
+
+# Nombre maximal d'événements dont l'index des billets est conservé en mémoire par processus
+GATE_INDEX_MAX_EVENTS = int(os.environ.get("GATE_INDEX_MAX_EVENTS", 32))
+
+# Nombre maximal d'articles d'un panier dont les détails sont demandés en une requête
+CART_MAX_ITEMS = int(os.environ.get("CART_MAX_ITEMS", 50))
+
+# Cache partagé entre les processus, nécessaire en production pour que l'invalidation du catalogue atteigne tous les
+# processus (par exemple django.core.cache.backends.redis.RedisCache et redis://127.0.0.1:6379)
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "")
+    }
+}
+
+# Durée, en secondes, pendant laquelle un processus conserve ses données versionnées (catalogue, données de référence,
+# tokens révoqués) sans cache partagé, faute de pouvoir recevoir les invalidations des autres processus
+LOCAL_CACHE_MAX_AGE = int(os.environ.get("LOCAL_CACHE_MAX_AGE", 5))
+
+# Nombre de réponses du catalogue, une par combinaison de filtres, conservées en mémoire par processus
+CATALOGUE_CACHE_SIZE = int(os.environ.get("CATALOGUE_CACHE_SIZE", 256))
+
+# Durée de vie maximale, en secondes, des statistiques des ventes dans le cache, invalidées à chaque vente
+OFFER_STATS_TTL = int(os.environ.get("OFFER_STATS_TTL", 300))
+
+# Durée de vie, en secondes, des places disponibles des événements dans le cache
+AVAILABILITY_TTL = int(os.environ.get("AVAILABILITY_TTL", 2))
+
+# Flux des places disponibles : fenêtre de regroupement des changements et intervalle des messages de maintien (en
+# secondes), et diffusion entre les processus par LISTEN/NOTIFY de PostgreSQL
+AVAILABILITY_STREAM_WINDOW = float(os.environ.get("AVAILABILITY_STREAM_WINDOW", 0.5))
+AVAILABILITY_STREAM_KEEPALIVE = int(os.environ.get("AVAILABILITY_STREAM_KEEPALIVE", 15))
+AVAILABILITY_STREAM_NOTIFY = os.environ.get("AVAILABILITY_STREAM_NOTIFY", "False") == "True"
@@ -0,0 +1,77 @@
+import uuid
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+# Caches propres à chaque processus, qui ne peuvent pas diffuser un changement de version aux autres processus
+LOCAL_CACHES = (DummyCache, LocMemCache)
+
+def shared_cache() -> bool:
+
+  """
+  Indique si le cache par défaut est partagé entre les processus.
+
+  Returns:
+    bool: True si le cache par défaut est partagé entre les processus.
+  """
+  return not isinstance(caches[DEFAULT_CACHE_ALIAS], LOCAL_CACHES)
+
+
+def local_max_age() -> int | None:
+
+  """
+  Retourne la durée, en secondes, pendant laquelle un processus peut conserver des données versionnées sans cache
+  partagé : un changement de version fait par un autre processus ne lui parvient pas, et ses données doivent être
+  rechargées au plus tard après `LOCAL_CACHE_MAX_AGE` secondes.
+
+  Returns:
+    int | None: La durée maximale de conservation, ou None avec un cache partagé.
+  """
+  return None if shared_cache() else settings.LOCAL_CACHE_MAX_AGE
+
+
+def current_version(key: str) -> str:
+
+  """
+  Retourne la version courante enregistrée sous une clé du cache, créée si le cache n'en contient pas encore.
+
+  Args:
+    key (str): La clé de la version dans le cache.
+  Returns:
+    str: La version courante.
+  """
+  version = cache.get(key)
+
+  if version is None:
+    cache.add(key, uuid.uuid4().hex, timeout=None)
+    version = cache.get(key)
+
+  return version
+
+
+def bump_version(key: str) -> None:
+
+  """
+  Change la version enregistrée sous une clé du cache, ce qui fait recharger les données qui en dépendent par tous les
+  processus partageant le cache. Une nouvelle version est tirée au hasard plutôt qu'incrémentée, afin qu'un cache vidé
+  ne puisse pas faire revenir une version déjà servie.
+
+  Args:
+    key (str): La clé de la version dans le cache.
+  """
+  cache.set(key, uuid.uuid4().hex, timeout=None)
+
+
+def invalidate(key: str) -> None:
+
+  """
+  Change la version immédiatement, puis de nouveau après la validation de la transaction : des données chargées entre
+  les deux, avant la validation, ne peuvent ainsi pas survivre à la transaction.
+
+  Args:
+    key (str): La clé de la version dans le cache.
+  """
+  bump_version(key)
+  transaction.on_commit(lambda: bump_version(key))
@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 application = get_wsgi_application()
+
+# Préchargement de l'index des billets des événements du jour pour le contrôle aux portes
+if settings.GATE_INDEX_WARM:
+    from booking.gate import gate_index
+
+    gate_index().warm()
@@ -41,6 +41,16 @@ class LocationAdmin(admin.ModelAdmin):
   list_filter = ('city',)
   ordering = ('name',)
 
+  def save_model(self, request, obj: Location, form, change: bool) -> None:
+
+    """
+    Enregistre le lieu et, si sa capacité change, reconstruit les compteurs répartis de ses événements à forte demande.
+    """
+    super().save_model(request, obj, form, change)
+
+    if change and 'total_seats' in form.changed_data:
+      Event.objects.filter(location=obj, high_demand=True).rebuild_seat_shards()
+
 
 
 
@@ -55,9 +65,27 @@ class EventAdmin(admin.ModelAdmin):
 
   inlines = [EventInline]
   list_display = ('sport', 'date', 'start_time', 'end_time', 'location_name', 'available_places')
-  list_filter = ('sport', 'location__name')
+  list_filter = ('sport', 'location__name', 'high_demand')
   ordering = ('date', 'start_time', 'sport')
 
+  def get_queryset(self, request):
+
+    """
+    Retourne les événements avec leur lieu et leur nombre de places disponibles, chargés en une seule requête.
+    """
+    return super().get_queryset(request).with_availability()
+
+  def save_model(self, request, obj: Event, form, change: bool) -> None:
+
+    """
+    Enregistre l'événement et (re)construit ses compteurs répartis lorsque le mode forte demande est modifié, ou lorsque
+    le lieu, et donc la capacité, d'un événement à forte demande change.
+    """
+    super().save_model(request, obj, form, change)
+
+    if 'high_demand' in form.changed_data or (obj.high_demand and 'location' in form.changed_data):
+      Event.objects.filter(pk=obj.pk).rebuild_seat_shards()
+
   def available_places(self, obj) -> str:
 
     """
@@ -1,47 +1,161 @@
+from django.conf import settings
+from django.db.models import Prefetch, Q
+from django.http import HttpResponse
 from rest_framework import status
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.request import Request
 from rest_framework.response import Response
-from .models import Competition, Event, Sport
-from .serializers import CompetitionSerializer, EventLightSerializer, EventSerializer, SportSerializer
-from offer.models import Offer
+from . import reference
+from .catalogue import catalogue_response, seat_availability
+from .models import Competition, Event
+from .serializers import (
+  CartItemSerializer,
+  CompetitionFilterSerializer,
+  CompetitionLightSerializer,
+  CompetitionSerializer,
+  EventExpandedSerializer,
+  EventFilterSerializer,
+  EventLightSerializer,
+  EventSerializer,
+  SportSerializer,
+  encode_cursor
+)
 from offer.serializers import OfferSerializer
 
 @api_view(['GET'])
 @authentication_classes([])
 @permission_classes([])
-def sport_list(request: Request) -> Response:
+def sport_list(request: Request) -> HttpResponse:
 
   """
-  Récupère une liste de toutes les épreuves sportives.
+  Récupère une liste de toutes les épreuves sportives, servie depuis le cache du catalogue.
 
   Args:
     → request (HttpRequest) : L'objet de la requête HTTP.
   Returns:
-    → Response : Une réponse JSON contenant la liste sérialisée des épreuves sportives avec un code de statut HTTP 200.
+    → HttpResponse : Une réponse JSON contenant la liste sérialisée des épreuves sportives avec un code de statut HTTP 200,
+      ou HTTP 304 si l'`ETag` envoyée correspond.
   """
-  sports = Sport.objects.all().order_by('title')
-  serializer = SportSerializer(sports, many=True)
-  return Response(serializer.data, status=status.HTTP_200_OK)
+  return catalogue_response(
+    request,
+    'sport_list',
+    lambda: SportSerializer(sorted(reference.sports().values(), key=lambda sport: sport.title), many=True).data
+  )
 
 
 @api_view(['GET'])
 @authentication_classes([])
 @permission_classes([])
-def event_list(request: Request) -> Response:
+def event_list(request: Request) -> HttpResponse:
 
   """
-  Récupère une liste de tous les événements sportifs.
+  Récupère la liste des événements sportifs dans l'ordre du programme, servie depuis le cache du catalogue.
+  Les paramètres `date_from`, `date_to`, `sport`, `location` et `city` filtrent la liste. Le paramètre `limit` active la
+  pagination par curseur : la réponse contient alors la page `results` et le curseur `next` de la page suivante, à
+  renvoyer dans le paramètre `cursor`.
+  Le paramètre `expand=competitions` ajoute à chaque événement la liste de ses compétitions.
 
   Args:
     → request (HttpRequest) : L'objet de la requête HTTP.
   Returns:
-    → Response : Une réponse JSON contenant la liste sérialisée des événements sportifs avec un code de statut HTTP 200.
+    → HttpResponse : Une réponse JSON contenant la liste sérialisée des événements sportifs, ou leur page, avec un code
+      de statut HTTP 200, HTTP 304 si l'`ETag` envoyée correspond, ou HTTP 400 si un paramètre est invalide.
   """
-  events = Event.objects.select_related('sport', 'location').order_by('date', 'start_time', 'end_time')
-  serializer = EventSerializer(events, many=True)
-  
-  return Response(serializer.data, status=status.HTTP_200_OK)
+  serializer = EventFilterSerializer(data=request.query_params)
+
+  if not serializer.is_valid():
+    return Response({"success": False, "errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+  params = serializer.validated_data
+  events = Event.objects.select_related('sport', 'location').order_by('date', 'start_time', 'end_time', 'id_event')
+
+  if 'date_from' in params:
+    events = events.filter(date__gte=params['date_from'])
+  if 'date_to' in params:
+    events = events.filter(date__lte=params['date_to'])
+  if 'sport' in params:
+    events = events.filter(sport_id=params['sport'])
+  if 'location' in params:
+    events = events.filter(location_id=params['location'])
+  if 'city' in params:
+    events = events.filter(location__city=params['city'])
+
+  if 'cursor' in params:
+
+    # Événements situés après le curseur dans l'ordre (date, heure de début, heure de fin, identifiant)
+    day, start, end, event_id = params['cursor']
+    events = events.filter(date__gte=day).filter(
+      Q(date__gt=day)
+      | Q(date=day, start_time__gt=start)
+      | Q(date=day, start_time=start, end_time__gt=end)
+      | Q(date=day, start_time=start, end_time=end, id_event__gt=event_id)
+    )
+
+  serializer_class = EventSerializer
+
+  if params.get('expand') == 'competitions':
+    # Compétitions de tous les événements de la liste, ou de la page, chargées en une seule requête supplémentaire
+    events = events.prefetch_related(Prefetch('competition_set', queryset=Competition.objects.order_by('id_competition')))
+    serializer_class = EventExpandedSerializer
+
+  def build():
+
+    """
+    Sérialise la liste filtrée, ou sa page et le curseur de la page suivante.
+    """
+    if 'limit' not in params:
+      return serializer_class(events, many=True).data
+
+    page = list(events[:params['limit'] + 1])
+    has_next = len(page) > params['limit']
+    page = page[:params['limit']]
+
+    return {
+      "results": serializer_class(page, many=True).data,
+      "next": encode_cursor(page[-1]) if has_next else None
+    }
+
+  # Chaque combinaison de paramètres est mise en cache sous son propre nom
+  name = "event_list?" + "&".join(f"{key}={request.query_params[key]}" for key in sorted(params))
+
+  return catalogue_response(request, name, build)
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([])
+def event_availability(request: Request) -> Response:
+
+  """
+  Récupère le nombre de places disponibles des événements, séparé du catalogue car il change à chaque vente.
+  Le paramètre `ids` restreint la réponse à une liste d'identifiants séparés par des virgules.
+
+  Args:
+    → request (HttpRequest) : L'objet de la requête HTTP.
+  Returns:
+    → Response : Une réponse JSON associant à chaque identifiant d'événement son nombre de places disponibles avec un
+      code de statut HTTP 200, ou HTTP 400 si la liste d'identifiants est invalide.
+  """
+  seats = seat_availability()
+  ids = request.query_params.get('ids')
+
+  if ids:
+
+    try:
+      wanted = {str(int(event_id)) for event_id in ids.split(',')}
+    except ValueError:
+      return Response(
+        {"success": False, "errors": {"ids": ["La liste doit contenir des identifiants entiers séparés par des virgules."]}},
+        status=status.HTTP_400_BAD_REQUEST
+      )
+
+    seats = {event_id: seats[event_id] for event_id in wanted if event_id in seats}
+
+  return Response(
+    seats,
+    status=status.HTTP_200_OK,
+    headers={"Cache-Control": f"public, max-age={settings.AVAILABILITY_TTL}"}
+  )
 
 
 @api_view(['GET'])
@@ -63,6 +177,57 @@ def competition_list_by_event(request: Request, event_id: int) -> Response:
   return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([])
+def competition_list(request: Request) -> HttpResponse:
+
+  """
+  Récupère en une seule requête les compétitions de plusieurs événements sportifs, regroupées par événement et servies
+  depuis le cache du catalogue.
+  Le paramètre `ids` désigne les événements par une liste d'identifiants séparés par des virgules, et les paramètres
+  `date_from` et `date_to` par leur période.
+
+  Args:
+    → request (HttpRequest) : L'objet de la requête HTTP.
+  Returns:
+    → HttpResponse : Une réponse JSON associant à chaque identifiant d'événement la liste sérialisée de ses compétitions
+      avec un code de statut HTTP 200, HTTP 304 si l'`ETag` envoyée correspond, ou HTTP 400 si un paramètre est
+      invalide ou si aucun n'est fourni.
+  """
+  serializer = CompetitionFilterSerializer(data=request.query_params)
+
+  if not serializer.is_valid():
+    return Response({"success": False, "errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+  params = serializer.validated_data
+  competitions = Competition.objects.order_by('event_id', 'id_competition')
+
+  if 'ids' in params:
+    competitions = competitions.filter(event_id__in=params['ids'])
+  if 'date_from' in params:
+    competitions = competitions.filter(event__date__gte=params['date_from'])
+  if 'date_to' in params:
+    competitions = competitions.filter(event__date__lte=params['date_to'])
+
+  def build():
+
+    """
+    Regroupe les compétitions par événement, chaque événement demandé par son identifiant figurant dans la réponse.
+    """
+    grouped = {event_id: [] for event_id in params.get('ids', [])}
+
+    for competition in competitions:
+      grouped.setdefault(competition.event_id, []).append(CompetitionLightSerializer(competition).data)
+
+    return {str(event_id): items for event_id, items in grouped.items()}
+
+  # Chaque combinaison de paramètres est mise en cache sous son propre nom
+  name = "competition_list?" + "&".join(f"{key}={params[key]}" for key in sorted(params))
+
+  return catalogue_response(request, name, build)
+
+
 @api_view(['POST'])
 @authentication_classes([])
 @permission_classes([])
@@ -74,31 +239,33 @@ def cart_details(request: Request) -> Response:
   Args:
     → request (HttpRequest) : L'objet de la requête HTTP contenant les articles du panier.
   Returns:
-    → Response : Une réponse JSON contenant les détails des événements et des offres associés aux articles du panier avec un code de statut HTTP 200.
+    → Response : Une réponse JSON contenant les détails des événements et des offres associés aux articles du panier avec un code de statut HTTP 200,
+      ou HTTP 400 si un article est invalide ou si le panier dépasse `CART_MAX_ITEMS` articles.
   """
-  items = request.data
-  result = []
+  serializer = CartItemSerializer(data=request.data, many=True, max_length=settings.CART_MAX_ITEMS)
 
-  for item in items:
+  if not serializer.is_valid():
+    return Response({"success": False, "errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+  items = serializer.validated_data
+
+  # Une seule requête pour les événements distincts du panier, les offres, sports et lieux étant lus dans les tables de
+  # référence du processus
+  events = Event.objects.in_bulk({item['id_event'] for item in items})
+  reference.attach_references(events.values())
+  offers = reference.lookup(reference.offers(), {item['id_offer'] for item in items})
+
+  # Les articles dont l'événement ou l'offre n'existe pas sont ignorés
+  lines = [
+    (events[item['id_event']], offers[item['id_offer']])
+    for item in items
+    if item['id_event'] in events and item['id_offer'] in offers
+  ]
+  lines.sort(key=lambda line: (line[0].date, line[0].start_time, line[0].end_time))
+
+  result = [
+    {'event': EventLightSerializer(event).data, 'offer': OfferSerializer(offer).data}
+    for event, offer in lines
+  ]
 
-    try:
-      event = Event.objects.select_related('sport', 'location').get(id_event=item['id_event'])
-      offer = Offer.objects.get(id_offer=item['id_offer'])
-    
-    except (Event.DoesNotExist, Offer.DoesNotExist):
-      continue
-
-    result.append({
-      'event': EventLightSerializer(event).data,
-      'offer': OfferSerializer(offer).data
-    })
-
-    result.sort(
-      key=lambda x: (
-        x['event']['date'],
-        x['event']['start_time'],
-        x['event']['end_time']
-      )
-    )
-  
   return Response(result, status=status.HTTP_200_OK)
\ No newline at end of file
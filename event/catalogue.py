@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from .models import Event
+from core.versions import current_version, invalidate, local_max_age
+
+# Clés de la version du catalogue et des places disponibles dans le cache partagé entre les processus
+VERSION_KEY = "catalogue:version"
+AVAILABILITY_KEY = "catalogue:availability"
+
+# Réponses JSON déjà rendues du processus, par nom : (version, date d'expiration, contenu, ETag), les moins récemment
+# servies étant écartées au-delà de `CATALOGUE_CACHE_SIZE` réponses
+_snapshots = OrderedDict()
+_lock = threading.Lock()
+
+def invalidate_catalogue(**kwargs) -> None:
+
+  """
+  Gestionnaire des signaux `post_save` et `post_delete` des modèles du catalogue, qui invalide les réponses rendues par
+  tous les processus.
+  """
+  invalidate(VERSION_KEY)
+
+
+def catalogue_response(request: Request, name: str, build: Callable[[], Any], ttl: int | None = None) -> HttpResponse:
+
+  """
+  Sert une réponse du catalogue depuis son rendu JSON en mémoire, reconstruit uniquement lorsque la version du catalogue
+  a changé ou que sa durée de vie est écoulée. La réponse porte une `ETag` forte et une requête dont l'en-tête
+  `If-None-Match` correspond reçoit une réponse 304 sans contenu.
+  Sans cache partagé, un changement de version fait par un autre processus ne parvient pas à celui-ci : la durée de vie
+  du rendu est alors limitée à `LOCAL_CACHE_MAX_AGE` secondes.
+
+  Args:
+    request (Request): La requête HTTP.
+    name (str): Le nom de la réponse, propre au point de terminaison et à ses paramètres.
+    build (Callable): La fonction retournant les données sérialisées de la réponse.
+    ttl (int | None): La durée de vie du rendu en secondes, pour les réponses contenant des données volatiles.
+  Returns:
+    HttpResponse: La réponse JSON, ou une réponse 304.
+  """
+  version = current_version(VERSION_KEY)
+  max_age = local_max_age()
+
+  if max_age is not None:
+    ttl = max_age if ttl is None else min(ttl, max_age)
+
+  with _lock:
+    snapshot = _snapshots.get(name)
+    if snapshot is not None:
+      _snapshots.move_to_end(name)
+
+  if snapshot is None or snapshot[0] != version or snapshot[1] < time.monotonic():
+
+    content = JSONRenderer().render(build())
+    expires = time.monotonic() + ttl if ttl is not None else float("inf")
+    snapshot = (version, expires, content, f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"')
+
+    with _lock:
+      _snapshots[name] = snapshot
+      while len(_snapshots) > settings.CATALOGUE_CACHE_SIZE:
+        _snapshots.popitem(last=False)
+
+  _, _, content, etag = snapshot
+  headers = {"ETag": etag, "Cache-Control": "public, no-cache"}
+
+  if etag in [tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")]:
+    return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+  return HttpResponse(content, content_type="application/json", headers=headers)
+
+
+def seat_availability() -> dict[str, int]:
+
+  """
+  Retourne le nombre de places disponibles de chaque événement, calculé en une seule requête puis conservé dans le cache
+  partagé pendant `AVAILABILITY_TTL` secondes.
+
+  Returns:
+    dict[str, int]: Les places disponibles, par identifiant d'événement.
+  """
+  seats = cache.get(AVAILABILITY_KEY)
+
+  if seats is None:
+    seats = {str(pk): remaining for pk, remaining in Event.objects.with_availability().values_list('pk', 'remaining_seats')}
+    cache.set(AVAILABILITY_KEY, seats, timeout=settings.AVAILABILITY_TTL)
+
+  return seats
@@ -0,0 +1,114 @@
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from event.models import Event, Location, Sport
+
+class Command(BaseCommand):
+
+  help = (
+    "Mesure le nombre d'achats par seconde sur un même événement selon la concurrence, avec un compteur de places unique "
+    "puis avec des compteurs répartis. À exécuter sur une base PostgreSQL de développement."
+  )
+
+  def add_arguments(self, parser) -> None:
+
+    """
+    Déclare les options de la commande.
+    """
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32", help="Niveaux de concurrence, séparés par des virgules.")
+    parser.add_argument("--purchases", default=50, type=int, help="Nombre d'achats effectués par chaque acheteur.")
+    parser.add_argument("--hold-ms", default=2.0, type=float, help="Durée simulée du reste de la transaction de paiement.")
+
+  def handle(self, *args, **options) -> None:
+
+    """
+    Exécute le banc d'essai sur un événement temporaire, supprimé à la fin de la mesure.
+    """
+    if connection.vendor != "postgresql":
+      self.stderr.write(self.style.WARNING("Ce banc d'essai est conçu pour PostgreSQL : les résultats ne seront pas représentatifs."))
+
+    levels = [int(level) for level in options["concurrency"].split(",")]
+    purchases = options["purchases"]
+    hold = options["hold_ms"] / 1000
+
+    sport = Sport.objects.create(title="Banc d'essai", image="sports/benchmark.jpg")
+    location = Location.objects.create(name="Banc d'essai", city="Banc d'essai", total_seats=max(levels) * purchases)
+    event = Event.objects.create(
+      sport=sport,
+      location=location,
+      date="2024-08-04",
+      start_time="20:00:00",
+      end_time="22:00:00",
+      price="0.00"
+    )
+
+    try:
+      self.stdout.write(f"Compteurs répartis : {settings.SEAT_COUNTER_SHARDS}, achats par acheteur : {purchases}")
+      self.stdout.write(f"{'Concurrence':>12} | {'Compteur unique (achats/s)':>27} | {'Compteurs répartis (achats/s)':>30}")
+
+      for level in levels:
+
+        results = [self.measure(event, high_demand, level, purchases, hold) for high_demand in (False, True)]
+        self.stdout.write(f"{level:>12} | {results[0]:>27.1f} | {results[1]:>30.1f}")
+
+    finally:
+      sport.delete()
+      location.delete()
+
+  def measure(self, event: Event, high_demand: bool, level: int, purchases: int, hold: float) -> float:
+
+    """
+    Mesure le débit d'achats pour un mode de comptage et un niveau de concurrence donnés.
+    Args:
+      event (Event): L'événement sur lequel les places sont réservées.
+      high_demand (bool): Indique si les compteurs répartis sont utilisés.
+      level (int): Le nombre d'acheteurs simultanés.
+      purchases (int): Le nombre d'achats effectués par chaque acheteur.
+      hold (float): La durée, en secondes, pendant laquelle chaque transaction reste ouverte après la réservation.
+    Returns:
+      float : Le nombre d'achats aboutis par seconde.
+    """
+    Event.objects.filter(pk=event.pk).update(booked_seats=0, high_demand=high_demand)
+    event.seat_shards.all().delete()
+    Event.objects.filter(pk=event.pk).rebuild_seat_shards()
+
+    barrier = threading.Barrier(level + 1)
+    lock = threading.Lock()
+    completed = []
+
+    def buy() -> None:
+
+      done = 0
+
+      try:
+        barrier.wait()
+
+        for _ in range(purchases):
+          with transaction.atomic():
+            Event.objects.allocate_seats({event.pk: 1})
+            time.sleep(hold)
+          done += 1
+
+      finally:
+        with lock:
+          completed.append(done)
+        connection.close()
+
+    threads = [threading.Thread(target=buy) for _ in range(level)]
+    for thread in threads:
+      thread.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+
+    for thread in threads:
+      thread.join()
+
+    elapsed = time.perf_counter() - start
+
+    if sum(completed) < level * purchases:
+      self.stderr.write(self.style.WARNING(f"{level * purchases - sum(completed)} achat(s) en échec à la concurrence {level}."))
+
+    return sum(completed) / elapsed
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from event.models import Event
+
+class Command(BaseCommand):
+
+  help = "Recalcule le compteur de places réservées des événements à partir des lignes de réservation."
+
+  def handle(self, *args, **options) -> None:
+
+    """
+    Réaligne le compteur `booked_seats` de tous les événements sur la somme des places des lignes de réservation.
+    """
+    updated = Event.objects.reconcile_booked_seats()
+
+    self.stdout.write(self.style.SUCCESS(f"{updated} événement(s) réconcilié(s)."))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:31
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_booked_seats(apps, schema_editor):
+    Event = apps.get_model("event", "Event")
+    BookingLine = apps.get_model("booking", "BookingLine")
+
+    booked = (
+        BookingLine.objects.filter(event=OuterRef("pk"))
+        .order_by()
+        .values("event")
+        .annotate(total=Sum("offer__number_seats"))
+        .values("total")
+    )
+    Event.objects.update(booked_seats=Coalesce(Subquery(booked), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0001_initial"),
+        ("event", "0002_location_event_competition"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="booked_seats",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Places réservées"
+            ),
+        ),
+        migrations.RunPython(populate_booked_seats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("event", "0003_event_booked_seats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="high_demand",
+            field=models.BooleanField(
+                default=False,
+                help_text="Répartit le compteur de places sur plusieurs lignes pour absorber les achats simultanés.",
+                verbose_name="Forte demande",
+            ),
+        ),
+        migrations.CreateModel(
+            name="EventSeatShard",
+            fields=[
+                (
+                    "id_seat_shard",
+                    models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                ("index", models.PositiveSmallIntegerField(verbose_name="Index")),
+                ("capacity", models.PositiveIntegerField(verbose_name="Capacité")),
+                (
+                    "booked_seats",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Places réservées"
+                    ),
+                ),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_shards",
+                        to="event.event",
+                        verbose_name="Événement",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Compteur de places réparti",
+                "verbose_name_plural": "Compteurs de places répartis",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("event", "index"), name="unique_event_seat_shard"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("event", "0004_event_seat_shards"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["date", "start_time", "end_time", "id_event"],
+                name="event_schedule_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["sport", "date", "start_time", "end_time", "id_event"],
+                name="event_sport_schedule_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["location", "date", "start_time", "end_time", "id_event"],
+                name="event_location_schedule_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="location",
+            index=models.Index(fields=["city"], name="location_city_idx"),
+        ),
+    ]
@@ -1,7 +1,15 @@
+import random
 from decimal import Decimal
+from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
-from django.db.models import Sum
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
+
+# Signal envoyé, après validation de la transaction, lorsque les places réservées d'événements ont changé
+seats_changed = Signal()
 
 class Sport(models.Model):
 
@@ -63,6 +71,9 @@ class Location(models.Model):
 
   class Meta:
 
+    indexes = [
+      models.Index(fields=['city'], name='location_city_idx')
+    ]
     verbose_name = "Lieu"
     verbose_name_plural = "Lieux"
   
@@ -78,6 +89,208 @@ class Location(models.Model):
 
 
 
+class InsufficientSeatsError(Exception):
+
+  """
+  Exception levée lorsqu'un événement ne dispose plus d'assez de places pour honorer une réservation.
+  """
+  def __init__(self, event_id: int, requested: int, available: int):
+
+    self.event_id = event_id
+    self.requested = requested
+    self.available = available
+
+    super().__init__(f"Places insuffisantes pour l'événement {event_id} : {requested} demandée(s), {available} disponible(s).")
+
+
+
+
+def notify_seats_changed(event_ids: set[int]) -> None:
+
+  """
+  Envoie le signal `seats_changed` après la validation de la transaction en cours, ou immédiatement hors transaction.
+
+  Args:
+    event_ids (set[int]): Les identifiants des événements dont les places réservées ont changé.
+  """
+  transaction.on_commit(lambda: seats_changed.send(sender=Event, event_ids=event_ids))
+
+
+
+
+class EventQuerySet(models.QuerySet):
+
+  def with_availability(self) -> 'EventQuerySet':
+
+    """
+    Charge le sport et le lieu des événements et annote le nombre de places disponibles dans la même requête.
+    Returns:
+      EventQuerySet : Le queryset annoté avec `remaining_seats`, lu par la propriété `Event.available_seats`.
+    """
+    # Somme des compteurs répartis des événements à forte demande (nulle pour les autres)
+    shard_booked = EventSeatShard.objects.filter(event=OuterRef('pk')).order_by().values('event').annotate(
+      total=Sum('booked_seats')
+    ).values('total')
+
+    return self.select_related('sport', 'location').annotate(
+      remaining_seats=F('location__total_seats') - F('booked_seats') - Coalesce(Subquery(shard_booked), 0)
+    )
+
+  def allocate_seats(self, seats_by_event: dict[int, int]) -> None:
+
+    """
+    Vérifie et réserve de façon atomique les places demandées pour chaque événement, ou aucune.
+
+    Les événements sont traités dans l'ordre de leur identifiant et un seul verrou de ligne est pris par événement, afin
+    que deux paniers portant sur les mêmes événements ne puissent pas s'interbloquer. Une première vérification sans
+    verrou rejette immédiatement un panier portant sur un événement complet. Les événements à forte demande réservent
+    leurs places sur leurs compteurs répartis plutôt que sur la ligne de l'événement. Doit être appelée dans un
+    bloc `transaction.atomic()`.
+    Args:
+      seats_by_event (dict[int, int]): Le nombre de places demandées, indexé par identifiant d'événement.
+    Raises:
+      InsufficientSeatsError: Si un événement ne dispose pas d'assez de places ou n'existe pas.
+    """
+    availability = self.with_availability().filter(pk__in=seats_by_event).values_list('pk', 'remaining_seats', 'high_demand')
+    high_demand_events = set()
+
+    # Rejet rapide, sans verrou, des paniers portant sur un événement déjà complet
+    for event_id, available, high_demand in availability:
+
+      if available < seats_by_event[event_id]:
+        raise InsufficientSeatsError(event_id, seats_by_event[event_id], available)
+
+      if high_demand:
+        high_demand_events.add(event_id)
+
+    # Réservation dans un ordre déterministe, avec vérification sur les valeurs à jour
+    for event_id in sorted(seats_by_event):
+
+      seats = seats_by_event[event_id]
+
+      if event_id in high_demand_events:
+
+        if not EventSeatShard.objects.allocate(event_id, seats):
+          raise InsufficientSeatsError(event_id, seats, Event.objects.get(pk=event_id).available_seats)
+
+        continue
+
+      event = self.select_related('location').select_for_update(of=('self',)).filter(pk=event_id).first()
+
+      # Un événement inconnu, ou supprimé depuis le chargement du panier, n'a aucune place à réserver
+      if event is None:
+        raise InsufficientSeatsError(event_id, seats, 0)
+
+      if event.available_seats < seats:
+        raise InsufficientSeatsError(event_id, seats, event.available_seats)
+
+      self.filter(pk=event_id).update(booked_seats=F('booked_seats') + seats)
+
+    notify_seats_changed(set(seats_by_event))
+
+  def add_booked_seats(self, seats_by_event: dict[int, int]) -> None:
+
+    """
+    Incrémente de façon atomique le compteur de places réservées des événements concernés.
+    Args:
+      seats_by_event (dict[int, int]): Le nombre de places à ajouter, indexé par identifiant d'événement.
+    """
+    for event_id, seats in seats_by_event.items():
+      self.filter(pk=event_id).update(booked_seats=F('booked_seats') + seats)
+
+    notify_seats_changed(set(seats_by_event))
+
+  def release_booked_seats(self, event_id: int, seats: int) -> None:
+
+    """
+    Décrémente de façon atomique le compteur de places réservées d'un événement.
+    Pour un événement à forte demande, les places sont rendues en priorité à ses compteurs répartis afin d'être de
+    nouveau vendables, le reste au compteur de l'événement. Le compteur n'est jamais rendu négatif : un écart éventuel
+    est corrigé par `reconcile_booked_seats`.
+    Args:
+      event_id (int): L'identifiant de l'événement.
+      seats (int): Le nombre de places à libérer.
+    """
+    notify_seats_changed({event_id})
+
+    with transaction.atomic():
+
+      if self.filter(pk=event_id, high_demand=True).exists():
+        seats = EventSeatShard.objects.release(event_id, seats)
+
+      if seats:
+        self.filter(pk=event_id, booked_seats__gte=seats).update(booked_seats=F('booked_seats') - seats)
+
+  def rebuild_seat_shards(self) -> None:
+
+    """
+    Reconstruit les compteurs répartis des événements du queryset.
+    Les places réservées sur les anciens compteurs sont reportées sur le compteur de l'événement, puis, pour les
+    événements à forte demande, les places restantes sont réparties entre `SEAT_COUNTER_SHARDS` nouveaux compteurs.
+    """
+    with transaction.atomic():
+
+      for event in self.select_related('location').select_for_update(of=('self',)).order_by('pk'):
+
+        shards = EventSeatShard.objects.select_for_update().filter(event=event)
+        booked_seats = event.booked_seats + sum(shards.values_list('booked_seats', flat=True))
+        shards.delete()
+
+        if event.high_demand:
+
+          count = settings.SEAT_COUNTER_SHARDS
+          remaining = max(event.location.total_seats - booked_seats, 0)
+
+          EventSeatShard.objects.bulk_create([
+            EventSeatShard(
+              event=event,
+              index=index,
+              capacity=remaining // count + (1 if index < remaining % count else 0)
+            )
+            for index in range(count)
+          ])
+
+        Event.objects.filter(pk=event.pk).update(booked_seats=booked_seats)
+
+  def reconcile_booked_seats(self) -> int:
+
+    """
+    Recalcule le compteur de places réservées à partir des lignes de réservation et des réservations temporaires en
+    cours, dont les places sont décomptées dès leur création, en une seule requête `UPDATE`.
+    Les événements et leurs compteurs répartis sont verrouillés pendant le calcul, puis les compteurs répartis des
+    événements à forte demande sont reconstruits à partir du total recalculé. Les réservations temporaires expirées des
+    événements sont supprimées sans libérer leurs places, qui ne figurent pas dans le total recalculé.
+    Returns:
+      int : Le nombre d'événements mis à jour.
+    """
+    from booking.models import BookingLine, SeatHold
+
+    now = timezone.now()
+    booked = BookingLine.objects.filter(event=OuterRef('pk')).order_by().values('event').annotate(
+      total=Sum('offer__number_seats')
+    ).values('total')
+    held = SeatHold.objects.filter(event=OuterRef('pk'), expires_at__gt=now).order_by().values('event').annotate(
+      total=Sum('offer__number_seats')
+    ).values('total')
+
+    with transaction.atomic():
+
+      list(self.select_for_update().order_by('pk').values_list('pk', flat=True))
+      list(EventSeatShard.objects.select_for_update().filter(event__in=self).order_by('pk').values_list('pk', flat=True))
+
+      # Une réservation temporaire expirée libérée après le calcul retirerait ses places une seconde fois
+      SeatHold.objects.filter(event__in=self, expires_at__lte=now).delete()
+
+      notify_seats_changed(set(self.values_list('pk', flat=True)))
+      updated = self.update(booked_seats=Coalesce(Subquery(booked), 0) + Coalesce(Subquery(held), 0))
+      EventSeatShard.objects.filter(event__in=self).update(booked_seats=0)
+      self.filter(high_demand=True).rebuild_seat_shards()
+
+    return updated
+
+
+
+
 class Event(models.Model):
 
   id_event = models.SmallAutoField(
@@ -115,9 +328,29 @@ class Event(models.Model):
     validators=[MinValueValidator(0), MaxValueValidator(Decimal(999.99))],
     verbose_name="Prix (€)"
   )
+  booked_seats = models.PositiveIntegerField(
+    default=0,
+    editable=False,
+    null=False,
+    verbose_name="Places réservées"
+  )
+  high_demand = models.BooleanField(
+    default=False,
+    help_text="Répartit le compteur de places sur plusieurs lignes pour absorber les achats simultanés.",
+    null=False,
+    verbose_name="Forte demande"
+  )
+
+  objects = EventQuerySet.as_manager()
   
   class Meta:
 
+    # Index couvrant l'ordre du programme, seul ou après un filtre sur le sport ou le lieu, pour la pagination par curseur
+    indexes = [
+      models.Index(fields=['date', 'start_time', 'end_time', 'id_event'], name='event_schedule_idx'),
+      models.Index(fields=['sport', 'date', 'start_time', 'end_time', 'id_event'], name='event_sport_schedule_idx'),
+      models.Index(fields=['location', 'date', 'start_time', 'end_time', 'id_event'], name='event_location_schedule_idx')
+    ]
     verbose_name = "Événement"
     verbose_name_plural = "Événements"
   
@@ -136,20 +369,157 @@ class Event(models.Model):
     """
     Calcule le nombre de places disponibles pour l'événement.
     Returns:
-      int : Le nombre de places disponibles, calculé en soustrayant le nombre de places réservées du nombre total de places.
+      int : Le nombre de places disponibles, calculé en soustrayant le compteur de places réservées du nombre total de places.
     """
-    from booking.models import BookingLine
+    # Utilise l'annotation de `EventQuerySet.with_availability` lorsqu'elle est présente
+    if 'remaining_seats' in self.__dict__:
+      return self.remaining_seats
+
+    booked_seats = self.booked_seats
+
+    if self.high_demand:
+      booked_seats += self.seat_shards.aggregate(total=Sum('booked_seats'))['total'] or 0
 
-    # Calcule le nombre de places réservées pour l'événement
-    booked_seats = BookingLine.objects.filter(event=self).aggregate(
-      total=Sum('offer__number_seats')
-    )['total'] or 0
-    
     return self.location.total_seats - booked_seats
 
 
 
 
+class EventSeatShardQuerySet(models.QuerySet):
+
+  def allocate(self, event_id: int, seats: int) -> bool:
+
+    """
+    Réserve des places sur l'un des compteurs répartis d'un événement, par une décrémentation conditionnelle.
+    Le premier compteur essayé est tiré au hasard afin de répartir les verrous entre les achats simultanés. Lorsque
+    aucun compteur ne peut couvrir seul la demande, près de la fin des ventes, les compteurs de l'événement sont
+    verrouillés dans l'ordre de leur index et la demande est répartie entre eux. Doit être appelée dans un bloc
+    `transaction.atomic()`.
+    Args:
+      event_id (int): L'identifiant de l'événement.
+      seats (int): Le nombre de places à réserver.
+    Returns:
+      bool : True si les compteurs disposaient ensemble d'assez de places, sinon False.
+    """
+    count = settings.SEAT_COUNTER_SHARDS
+    start = random.randrange(count)
+
+    for offset in range(count):
+
+      if self.filter(
+        event_id=event_id,
+        index=(start + offset) % count,
+        booked_seats__lte=F('capacity') - seats
+      ).update(booked_seats=F('booked_seats') + seats):
+        return True
+
+    shards = list(self.select_for_update().filter(event_id=event_id).order_by('index').values_list('pk', 'capacity', 'booked_seats'))
+
+    if sum(capacity - booked_seats for _, capacity, booked_seats in shards) < seats:
+      return False
+
+    for pk, capacity, booked_seats in shards:
+
+      taken = min(capacity - booked_seats, seats)
+
+      if taken > 0:
+        self.filter(pk=pk).update(booked_seats=F('booked_seats') + taken)
+        seats -= taken
+
+      if not seats:
+        break
+
+    return True
+
+  def release(self, event_id: int, seats: int) -> bool:
+
+    """
+    Rend des places aux compteurs répartis d'un événement, comme `allocate` les y a prises : sur l'un d'eux s'il en a
+    assez de réservées, sinon réparties entre eux, verrouillés dans l'ordre de leur index. Doit être appelée dans un
+    bloc `transaction.atomic()`.
+    Args:
+      event_id (int): L'identifiant de l'événement.
+      seats (int): Le nombre de places à libérer.
+    Returns:
+      int : Le nombre de places qui n'ont pu être rendues à aucun compteur, réservées sur le compteur de l'événement.
+    """
+    count = settings.SEAT_COUNTER_SHARDS
+    start = random.randrange(count)
+
+    for offset in range(count):
+
+      if self.filter(
+        event_id=event_id,
+        index=(start + offset) % count,
+        booked_seats__gte=seats
+      ).update(booked_seats=F('booked_seats') - seats):
+        return 0
+
+    for pk, booked_seats in self.select_for_update().filter(event_id=event_id).order_by('index').values_list('pk', 'booked_seats'):
+
+      returned = min(booked_seats, seats)
+
+      if returned > 0:
+        self.filter(pk=pk).update(booked_seats=F('booked_seats') - returned)
+        seats -= returned
+
+      if not seats:
+        break
+
+    return seats
+
+
+
+
+class EventSeatShard(models.Model):
+
+  id_seat_shard = models.BigAutoField(
+    null=False,
+    primary_key=True
+  )
+  event = models.ForeignKey(
+    Event,
+    null=False,
+    on_delete=models.CASCADE,
+    related_name='seat_shards',
+    verbose_name="Événement"
+  )
+  index = models.PositiveSmallIntegerField(
+    null=False,
+    verbose_name="Index"
+  )
+  capacity = models.PositiveIntegerField(
+    null=False,
+    verbose_name="Capacité"
+  )
+  booked_seats = models.PositiveIntegerField(
+    default=0,
+    null=False,
+    verbose_name="Places réservées"
+  )
+
+  objects = EventSeatShardQuerySet.as_manager()
+
+  class Meta:
+
+    constraints = [
+      models.UniqueConstraint(fields=['event', 'index'], name='unique_event_seat_shard')
+    ]
+    verbose_name = "Compteur de places réparti"
+    verbose_name_plural = "Compteurs de places répartis"
+
+  def __str__(self) -> str:
+
+    """
+    Retourne une représentation sous forme de chaîne du compteur réparti.
+    Returns:
+      str : Une chaîne décrivant l'événement, l'index du compteur et son remplissage.
+    """
+    return f'{self.event} #{self.index} ({self.booked_seats}/{self.capacity})'
+
+
+
+
 class Competition(models.Model):
 
   class Gender(models.TextChoices):
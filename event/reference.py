@@ -0,0 +1,131 @@
+import threading
+import time
+from types import MappingProxyType
+from typing import Iterable, Mapping, TypeVar
+from .models import Event, Location, Sport
+from core.versions import current_version, invalidate, local_max_age
+from offer.models import Offer
+
+# Clé de la version des données de référence dans le cache partagé entre les processus
+VERSION_KEY = "reference:version"
+
+# Tables de référence du processus : (version, date d'expiration, offres, sports, lieux), chaque table étant un
+# dictionnaire en lecture seule indexé par identifiant. Les instances sont partagées entre les requêtes et ne doivent pas
+# être modifiées.
+_registry = None
+_lock = threading.Lock()
+
+Model = TypeVar('Model')
+
+def invalidate_reference(**kwargs) -> None:
+
+  """
+  Gestionnaire des signaux `post_save` et `post_delete` des offres, des sports et des lieux, qui fait recharger les
+  tables de référence par tous les processus.
+  """
+  invalidate(VERSION_KEY)
+
+
+def _tables() -> tuple[str, float, Mapping[int, Offer], Mapping[int, Sport], Mapping[int, Location]]:
+
+  """
+  Retourne les tables de référence du processus, rechargées en trois requêtes lorsque leur version a changé ou, sans
+  cache partagé, toutes les `LOCAL_CACHE_MAX_AGE` secondes.
+  La version est lue avant le chargement : une modification validée pendant le chargement fait recharger les tables à
+  l'appel suivant.
+  """
+  global _registry
+
+  version = current_version(VERSION_KEY)
+  registry = _registry
+
+  def stale(registry) -> bool:
+
+    """
+    Indique si les tables doivent être rechargées.
+    """
+    return registry is None or registry[0] != version or registry[1] < time.monotonic()
+
+  if stale(registry):
+
+    with _lock:
+
+      if stale(_registry):
+        max_age = local_max_age()
+        _registry = (
+          version,
+          time.monotonic() + max_age if max_age is not None else float("inf"),
+          MappingProxyType(Offer.objects.in_bulk()),
+          MappingProxyType(Sport.objects.in_bulk()),
+          MappingProxyType(Location.objects.in_bulk())
+        )
+
+      registry = _registry
+
+  return registry
+
+
+def offers() -> Mapping[int, Offer]:
+
+  """
+  Retourne toutes les offres, indexées par identifiant.
+
+  Returns:
+    Mapping[int, Offer]: Les offres, en lecture seule.
+  """
+  return _tables()[2]
+
+
+def sports() -> Mapping[int, Sport]:
+
+  """
+  Retourne toutes les épreuves sportives, indexées par identifiant.
+
+  Returns:
+    Mapping[int, Sport]: Les épreuves sportives, en lecture seule.
+  """
+  return _tables()[3]
+
+
+def locations() -> Mapping[int, Location]:
+
+  """
+  Retourne tous les lieux, indexés par identifiant.
+
+  Returns:
+    Mapping[int, Location]: Les lieux, en lecture seule.
+  """
+  return _tables()[4]
+
+
+def lookup(table: Mapping[int, Model], ids: Iterable[int]) -> dict[int, Model]:
+
+  """
+  Résout une liste d'identifiants dans une table de référence, comme `in_bulk` mais sans requête.
+
+  Args:
+    table (Mapping): La table de référence, retournée par `offers`, `sports` ou `locations`.
+    ids (Iterable[int]): Les identifiants recherchés.
+  Returns:
+    dict: Les instances trouvées, indexées par identifiant ; les identifiants inconnus sont ignorés.
+  """
+  return {pk: table[pk] for pk in ids if pk in table}
+
+
+def attach_references(events: Iterable[Event]) -> None:
+
+  """
+  Associe aux événements leur épreuve sportive et leur lieu depuis les tables de référence, à la place d'une jointure.
+  Une référence absente des tables reste chargée à la demande.
+
+  Args:
+    events (Iterable[Event]): Les événements chargés sans `select_related`.
+  """
+  tables = _tables()
+
+  for event in events:
+
+    if event.sport_id in tables[3]:
+      event.sport = tables[3][event.sport_id]
+    if event.location_id in tables[4]:
+      event.location = tables[4][event.location_id]
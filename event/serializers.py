@@ -1,3 +1,6 @@
+import base64
+import json
+from datetime import date, time
 from rest_framework import serializers
 from .models import Competition, Event, Location, Sport
 
@@ -55,8 +58,7 @@ class EventSerializer(serializers.ModelSerializer):
       'date',
       'start_time',
       'end_time',
-      'price',
-      'available_seats'
+      'price'
     )
 
 
@@ -87,4 +89,126 @@ class CompetitionSerializer(serializers.ModelSerializer):
       'gender',
       'phase',
       'event'
-    )
\ No newline at end of file
+    )
+
+
+class CompetitionLightSerializer(serializers.ModelSerializer):
+  class Meta:
+    model = Competition
+    fields = (
+      'id_competition',
+      'description',
+      'gender',
+      'phase'
+    )
+
+
+class EventExpandedSerializer(EventSerializer):
+
+  competitions = CompetitionLightSerializer(many=True, source='competition_set')
+
+  class Meta(EventSerializer.Meta):
+    fields = EventSerializer.Meta.fields + ('competitions',)
+
+
+
+
+def encode_cursor(event: Event) -> str:
+
+  """
+  Encode la position d'un événement dans le programme en un curseur opaque.
+  """
+  position = [event.date.isoformat(), event.start_time.isoformat(), event.end_time.isoformat(), event.id_event]
+
+  return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+
+
+class EventFilterSerializer(serializers.Serializer):
+
+  date_from = serializers.DateField(required=False)
+  date_to = serializers.DateField(required=False)
+  sport = serializers.IntegerField(required=False)
+  location = serializers.IntegerField(required=False)
+  city = serializers.CharField(max_length=50, required=False)
+  limit = serializers.IntegerField(max_value=100, min_value=1, required=False)
+  cursor = serializers.CharField(required=False)
+  expand = serializers.ChoiceField(choices=['competitions'], required=False)
+
+  def validate_cursor(self, value: str) -> tuple[date, time, time, int]:
+
+    """
+    Décode le curseur de pagination en position (date, heure de début, heure de fin, identifiant) dans le programme.
+
+    Args:
+      value (str): Le curseur fourni par la page précédente.
+    Returns:
+      tuple: La position du dernier événement de la page précédente.
+    Raises:
+      serializers.ValidationError: Si le curseur est invalide.
+    """
+    try:
+      day, start, end, event_id = json.loads(base64.urlsafe_b64decode(value.encode()))
+      return date.fromisoformat(day), time.fromisoformat(start), time.fromisoformat(end), int(event_id)
+    except (ValueError, TypeError):
+      raise serializers.ValidationError("Le curseur de pagination est invalide.")
+
+  def validate(self, data: dict) -> dict:
+
+    """
+    Vérifie que le curseur n'est utilisé qu'avec une taille de page.
+    """
+    if 'cursor' in data and 'limit' not in data:
+      raise serializers.ValidationError({"cursor": ["Le curseur de pagination nécessite le paramètre `limit`."]})
+
+    return data
+
+
+
+
+class CartItemSerializer(serializers.Serializer):
+
+  id_event = serializers.IntegerField()
+  id_offer = serializers.IntegerField()
+
+
+
+
+class CompetitionFilterSerializer(serializers.Serializer):
+
+  ids = serializers.CharField(required=False)
+  date_from = serializers.DateField(required=False)
+  date_to = serializers.DateField(required=False)
+
+  def validate_ids(self, value: str) -> list[int]:
+
+    """
+    Décode la liste d'identifiants d'événements séparés par des virgules.
+
+    Args:
+      value (str): La liste fournie dans la requête.
+    Returns:
+      list[int]: Les identifiants distincts, triés.
+    Raises:
+      serializers.ValidationError: Si la liste est invalide ou contient plus de 100 identifiants.
+    """
+    try:
+      ids = sorted({int(event_id) for event_id in value.split(',')})
+    except ValueError:
+      raise serializers.ValidationError("La liste doit contenir des identifiants entiers séparés par des virgules.")
+
+    if len(ids) > 100:
+      raise serializers.ValidationError("La liste ne peut pas contenir plus de 100 identifiants.")
+
+    return ids
+
+  def validate(self, data: dict) -> dict:
+
+    """
+    Vérifie que la requête porte sur une liste d'événements ou sur une période.
+    """
+    if not data:
+      raise serializers.ValidationError("Le paramètre `ids`, `date_from` ou `date_to` est requis.")
+
+    return data
\ No newline at end of file
@@ -1,7 +1,23 @@
 import os
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import Sport
+from .catalogue import invalidate_catalogue
+from .models import Competition, Event, Location, Sport, seats_changed
+from .reference import invalidate_reference
+from .streams import publish_seats_changed
+
+# Toute modification d'un modèle du catalogue invalide les réponses mises en cache
+for model in (Sport, Location, Event, Competition):
+  post_save.connect(invalidate_catalogue, sender=model, dispatch_uid=f"invalidate_catalogue_{model.__name__}_save")
+  post_delete.connect(invalidate_catalogue, sender=model, dispatch_uid=f"invalidate_catalogue_{model.__name__}_delete")
+
+# Toute modification d'un sport ou d'un lieu fait recharger les tables de référence de tous les processus
+for model in (Sport, Location):
+  post_save.connect(invalidate_reference, sender=model, dispatch_uid=f"invalidate_reference_{model.__name__}_save")
+  post_delete.connect(invalidate_reference, sender=model, dispatch_uid=f"invalidate_reference_{model.__name__}_delete")
+
+# Les changements de places validés sont diffusés aux flux de disponibilité
+seats_changed.connect(publish_seats_changed, dispatch_uid="publish_seats_changed")
 
 @receiver(post_delete, sender=Sport)
 def delete_image_on_object_delete(instance: Sport, **kwargs) -> None:
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import select
+import threading
+import time
+from functools import cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, connections
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+# Canal PostgreSQL portant les changements de places entre les processus
+NOTIFY_CHANNEL = "event_seats_changed"
+
+def current_availability(event_ids: set[int]) -> dict[int, int]:
+
+  """
+  Calcule, en une seule requête, le nombre de places disponibles des événements donnés.
+
+  Args:
+    event_ids (set[int]): Les identifiants des événements.
+  Returns:
+    dict[int, int]: Les places disponibles, par identifiant d'événement.
+  """
+  return dict(Event.objects.with_availability().filter(pk__in=event_ids).values_list('pk', 'remaining_seats'))
+
+
+
+
+class Subscriber:
+
+  """
+  Connexion abonnée au flux : les dernières valeurs non encore envoyées, regroupées par événement.
+  Un client lent ne reçoit ainsi que les valeurs les plus récentes, sans file d'attente qui grossit.
+  """
+  def __init__(self):
+
+    self.pending = {}
+    self.ready = asyncio.Event()
+
+  def push(self, seats: dict[int, int]) -> None:
+
+    """
+    Ajoute des valeurs à envoyer au client.
+    """
+    self.pending.update(seats)
+    self.ready.set()
+
+  async def next(self) -> dict[int, int]:
+
+    """
+    Attend puis retourne les valeurs à envoyer au client.
+    """
+    await self.ready.wait()
+    self.ready.clear()
+    pending, self.pending = self.pending, {}
+
+    return pending
+
+
+
+
+class AvailabilityBroadcaster:
+
+  """
+  Diffuseur, unique par processus, des changements de places disponibles vers les connexions abonnées au flux.
+  Les événements changés pendant une fenêtre de `AVAILABILITY_STREAM_WINDOW` secondes sont regroupés : leurs places
+  sont relues en une seule requête, puis envoyées à tous les abonnés, quel que soit leur nombre.
+  """
+  def __init__(self):
+
+    self._loop = None
+    self._subscribers = set()
+    self._changed = set()
+    self._flush_scheduled = False
+    self._listener = None
+
+  def publish(self, event_ids: set[int]) -> None:
+
+    """
+    Signale que les places des événements ont changé. Peut être appelée depuis n'importe quel fil d'exécution ; ne fait
+    rien tant qu'aucune connexion n'est abonnée dans le processus.
+    Args:
+      event_ids (set[int]): Les identifiants des événements.
+    """
+    loop = self._loop
+
+    if loop is None or loop.is_closed():
+      return
+
+    loop.call_soon_threadsafe(self._collect, event_ids)
+
+  def _collect(self, event_ids: set[int]) -> None:
+
+    """
+    Ajoute les événements au lot de la fenêtre en cours, ouverte au premier changement.
+    """
+    self._changed.update(event_ids)
+
+    if not self._flush_scheduled:
+      self._flush_scheduled = True
+      self._loop.call_later(settings.AVAILABILITY_STREAM_WINDOW, lambda: asyncio.ensure_future(self._flush()))
+
+  async def _flush(self) -> None:
+
+    """
+    Relit les places des événements changés pendant la fenêtre et les transmet aux abonnés.
+    """
+    changed, self._changed = self._changed, set()
+    self._flush_scheduled = False
+
+    if not changed or not self._subscribers:
+      return
+
+    seats = await sync_to_async(current_availability)(changed)
+
+    for subscriber in self._subscribers:
+      subscriber.push(seats)
+
+  def subscribe(self) -> Subscriber:
+
+    """
+    Abonne une connexion au flux, dans la boucle d'événements courante.
+    Returns:
+      Subscriber : L'abonné, à désabonner par `unsubscribe` à la fermeture de la connexion.
+    """
+    loop = asyncio.get_running_loop()
+
+    # Une nouvelle boucle d'événements remplace la précédente, dont les abonnés ne peuvent plus être servis
+    if loop is not self._loop:
+      self._loop = loop
+      self._subscribers = set()
+      self._changed = set()
+      self._flush_scheduled = False
+
+    if settings.AVAILABILITY_STREAM_NOTIFY and self._listener is None:
+      self._listener = threading.Thread(target=self._listen, daemon=True, name="availability-listener")
+      self._listener.start()
+
+    subscriber = Subscriber()
+    self._subscribers.add(subscriber)
+
+    return subscriber
+
+  def unsubscribe(self, subscriber: Subscriber) -> None:
+
+    """
+    Désabonne une connexion du flux.
+    """
+    self._subscribers.discard(subscriber)
+
+  def _listen(self) -> None:
+
+    """
+    Écoute les notifications PostgreSQL des autres processus et les diffuse localement, en se reconnectant en cas de
+    perte de la connexion. S'exécute dans un fil d'exécution dédié, avec sa propre connexion.
+    """
+    while True:
+
+      listener = connections.create_connection("default")
+
+      try:
+        listener.ensure_connection()
+        listener.connection.autocommit = True
+
+        with listener.connection.cursor() as cursor:
+          cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+
+        while True:
+
+          if select.select([listener.connection], [], [], 5) == ([], [], []):
+            continue
+
+          listener.connection.poll()
+
+          while listener.connection.notifies:
+            payload = listener.connection.notifies.pop(0).payload
+            self.publish({int(event_id) for event_id in payload.split(",")})
+
+      except Exception:
+        logger.exception("Écoute des changements de places interrompue, reconnexion dans 5 secondes.")
+        time.sleep(5)
+
+      finally:
+        listener.close()
+
+
+@cache
+def broadcaster() -> AvailabilityBroadcaster:
+
+  """
+  Retourne le diffuseur des changements de places du processus.
+  """
+  return AvailabilityBroadcaster()
+
+
+def publish_seats_changed(event_ids: set[int], **kwargs) -> None:
+
+  """
+  Gestionnaire du signal `seats_changed` : diffuse les changements aux abonnés du processus ou, si le pont PostgreSQL
+  est activé, à ceux de tous les processus par `NOTIFY`.
+  """
+  if settings.AVAILABILITY_STREAM_NOTIFY and connection.vendor == 'postgresql':
+    with connection.cursor() as cursor:
+      cursor.execute("SELECT pg_notify(%s, %s)", [NOTIFY_CHANNEL, ",".join(map(str, sorted(event_ids)))])
+  else:
+    broadcaster().publish(event_ids)
@@ -1,6 +1,9 @@
-from django.test import TestCase
+from datetime import date, time
+from django.contrib.admin.sites import AdminSite
+from django.test import TestCase, override_settings
 from unittest.mock import Mock
 from event.admin import EventAdmin, SportAdmin
+from event.models import Event, Location, Sport
 
 class SportAdminTests(TestCase):
 
@@ -124,4 +127,31 @@ class EventAdminTests(TestCase):
     # Appel de la méthode `location_name`
     result = self.admin.location_name(obj)
     
-    self.assertEqual(result, "Arena Paris Sud 6")
\ No newline at end of file
+    self.assertEqual(result, "Arena Paris Sud 6")
+
+  @override_settings(SEAT_COUNTER_SHARDS=2)
+  def test_save_model_rebuilds_shards_on_location_change(self):
+
+    """
+    Teste que le changement de lieu d'un événement à forte demande reconstruit ses compteurs répartis sur la capacité
+    du nouveau lieu.
+    """
+    sport = Sport.objects.create(title="Natation", image="sports/natation.jpg")
+    small = Location.objects.create(name="Piscine", city="Paris", total_seats=100)
+    large = Location.objects.create(name="Arena La Défense", city="Nanterre", total_seats=1000)
+    event = Event.objects.create(
+      sport=sport,
+      location=small,
+      date=date(2024, 7, 28),
+      start_time=time(10, 0),
+      end_time=time(12, 0),
+      price="80.00",
+      high_demand=True
+    )
+    Event.objects.filter(pk=event.pk).rebuild_seat_shards()
+
+    event.location = large
+    EventAdmin(model=Event, admin_site=AdminSite()).save_model(Mock(), event, Mock(changed_data=['location']), True)
+
+    self.assertEqual(sum(event.seat_shards.values_list('capacity', flat=True)), 1000)
+    self.assertEqual(Event.objects.get(pk=event.pk).available_seats, 1000)
\ No newline at end of file
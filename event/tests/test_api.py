@@ -1,7 +1,9 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
+from event import reference
 from event.models import Competition, Event, Location, Sport
 from offer.models import Offer
 from offer.serializers import OfferSerializer
@@ -142,6 +144,239 @@ class EventListAPITest(TestCase):
     self.assertEqual(data[1]['end_time'], "20:00:00")
     self.assertEqual(data[1]['price'], "100.00")
 
+  def test_event_list_constant_queries(self):
+
+    """
+    Teste que le point de terminaison API `event_list` est chargé en une seule requête, quel que soit le nombre d'événements,
+    et ne contient pas les places disponibles, servies par `event_availability`.
+    """
+    event = Event.objects.order_by('date').first()
+    for day in range(22, 30):
+      Event.objects.create(
+        sport=event.sport,
+        location=event.location,
+        date=f"2025-07-{day}",
+        start_time="10:00:00",
+        end_time="12:00:00",
+        price="20.00"
+      )
+
+    url = reverse('event_list')
+
+    # Vérifie que la liste complète est chargée en une seule requête
+    with self.assertNumQueries(1):
+      response = self.client.get(url)
+
+    data = response.json()
+    self.assertEqual(len(data), 10)
+    self.assertNotIn('available_seats', data[0])
+
+
+
+
+class EventListFilterAPITest(TestCase):
+
+  def setUp(self):
+
+    """
+    Configure le client API et crée un programme de sessions réparties sur deux sports et deux lieux.
+    """
+    cache.clear()
+    self.client = APIClient()
+
+    self.football = Sport.objects.create(
+      title="Football",
+      image="sports/football.jpg"
+    )
+    self.tennis = Sport.objects.create(
+      title="Tennis",
+      image="sports/tennis.jpg"
+    )
+    self.paris = Location.objects.create(
+      name="Parc des Princes",
+      city="Paris",
+      total_seats=48000
+    )
+    self.marseille = Location.objects.create(
+      name="Stade Vélodrome",
+      city="Marseille",
+      total_seats=67000
+    )
+
+    # Plusieurs sessions partagent la même date et les mêmes horaires, départagées par leur identifiant
+    for day in range(20, 26):
+      for sport, location in ((self.football, self.paris), (self.tennis, self.marseille), (self.football, self.marseille)):
+        Event.objects.create(
+          sport=sport,
+          location=location,
+          date=f"2025-07-{day}",
+          start_time="15:00:00",
+          end_time="17:00:00",
+          price="50.00"
+        )
+
+  def test_event_list_filters(self):
+
+    """
+    Teste les filtres sur la période, le sport, le lieu et la ville.
+    """
+    url = reverse('event_list')
+
+    data = self.client.get(url, {"date_from": "2025-07-21", "date_to": "2025-07-22"}).json()
+    self.assertEqual(len(data), 6)
+    self.assertEqual({event['date'] for event in data}, {"2025-07-21", "2025-07-22"})
+
+    data = self.client.get(url, {"sport": self.tennis.id_sport}).json()
+    self.assertEqual(len(data), 6)
+    self.assertEqual({event['sport']['title'] for event in data}, {"Tennis"})
+
+    data = self.client.get(url, {"location": self.paris.id_location}).json()
+    self.assertEqual({event['location']['name'] for event in data}, {"Parc des Princes"})
+
+    data = self.client.get(url, {"city": "Marseille", "sport": self.football.id_sport}).json()
+    self.assertEqual(len(data), 6)
+    self.assertEqual({event['location']['city'] for event in data}, {"Marseille"})
+
+  def test_event_list_keyset_pagination(self):
+
+    """
+    Teste que la pagination par curseur parcourt tout le programme, dans l'ordre et sans doublon, une requête par page.
+    """
+    url = reverse('event_list')
+    expected = [event['id_event'] for event in self.client.get(url).json()]
+
+    seen = []
+    params = {"limit": 4}
+
+    while True:
+
+      with self.assertNumQueries(1):
+        page = self.client.get(url, params).json()
+
+      self.assertLessEqual(len(page['results']), 4)
+      seen += [event['id_event'] for event in page['results']]
+
+      if page['next'] is None:
+        break
+      params = {"limit": 4, "cursor": page['next']}
+
+    self.assertEqual(seen, expected)
+    self.assertEqual(len(seen), 18)
+
+  def test_event_list_invalid_parameters(self):
+
+    """
+    Teste qu'un paramètre invalide renvoie une erreur 400.
+    """
+    url = reverse('event_list')
+
+    for params in ({"date_from": "20-07-2025"}, {"limit": 0}, {"limit": 5, "cursor": "invalide"}, {"cursor": "e30="}):
+      response = self.client.get(url, params)
+      self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+  def test_event_list_expand_competitions(self):
+
+    """
+    Teste que le paramètre `expand=competitions` ajoute les compétitions de chaque événement en une seule requête
+    supplémentaire, y compris sur une page, et qu'il est mis en cache séparément de la liste simple.
+    """
+    url = reverse('event_list')
+    first, second = Event.objects.order_by('date', 'start_time', 'end_time', 'id_event')[:2]
+
+    Competition.objects.create(description="Match 1", gender="Hommes", phase="Poules", event=first)
+    Competition.objects.create(description="Match 2", gender="Femmes", phase="Poules", event=first)
+    Competition.objects.create(description="Match 3", gender="Mixte", event=second)
+
+    # Vérifie que la liste simple ne contient pas les compétitions
+    self.assertNotIn('competitions', self.client.get(url).json()[0])
+
+    with self.assertNumQueries(2):
+      data = self.client.get(url, {"expand": "competitions"}).json()
+
+    self.assertEqual(len(data), 18)
+    self.assertEqual([competition['description'] for competition in data[0]['competitions']], ["Match 1", "Match 2"])
+    self.assertEqual(data[1]['competitions'][0]['gender'], "Mixte")
+    self.assertEqual(data[2]['competitions'], [])
+
+    with self.assertNumQueries(2):
+      page = self.client.get(url, {"expand": "competitions", "limit": 2}).json()
+
+    self.assertEqual(len(page['results'][0]['competitions']), 2)
+
+    # Vérifie qu'une valeur inconnue est refusée
+    response = self.client.get(url, {"expand": "offers"})
+    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+
+
+class EventAvailabilityAPITest(TestCase):
+
+  def setUp(self):
+
+    """
+    Configure le client API, vide le cache et crée des événements avec des places réservées.
+    """
+    cache.clear()
+    self.client = APIClient()
+
+    sport = Sport.objects.create(
+      title="Football",
+      image="sports/football.jpg"
+    )
+    location = Location.objects.create(
+      name="Stade Olympique",
+      city="Paris",
+      total_seats=50000
+    )
+    self.events = [
+      Event.objects.create(
+        sport=sport,
+        location=location,
+        date=f"2025-07-{day}",
+        start_time="15:00:00",
+        end_time="17:00:00",
+        price="50.00"
+      )
+      for day in range(20, 30)
+    ]
+    Event.objects.add_booked_seats({self.events[0].id_event: 250})
+
+  def test_event_availability_for_all_events(self):
+
+    """
+    Teste que les places disponibles de tous les événements sont calculées en une seule requête, puis servies depuis le
+    cache.
+    """
+    url = reverse('event_availability')
+
+    with self.assertNumQueries(1):
+      response = self.client.get(url)
+
+    data = response.json()
+    self.assertEqual(len(data), 10)
+    self.assertEqual(data[str(self.events[0].id_event)], 49750)
+    self.assertEqual(data[str(self.events[1].id_event)], 50000)
+
+    with self.assertNumQueries(0):
+      self.client.get(url)
+
+  def test_event_availability_for_requested_events(self):
+
+    """
+    Teste que le paramètre `ids` restreint la réponse aux événements demandés et qu'un identifiant invalide est refusé.
+    """
+    url = reverse('event_availability')
+    ids = f"{self.events[0].id_event},{self.events[3].id_event},999999"
+
+    response = self.client.get(url, {"ids": ids})
+
+    self.assertEqual(response.json(), {str(self.events[0].id_event): 49750, str(self.events[3].id_event): 50000})
+
+    response = self.client.get(url, {"ids": "1,a"})
+
+    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 
 
@@ -215,6 +450,96 @@ class CompetitionListByEventAPITest(TestCase):
 
 
 
+class CompetitionListAPITest(TestCase):
+
+  def setUp(self):
+
+    """
+    Configure le client API, vide le cache et crée des événements répartis sur plusieurs jours, avec leurs compétitions.
+    """
+    cache.clear()
+    self.client = APIClient()
+
+    sport = Sport.objects.create(
+      title="Football",
+      image="sports/football.jpg"
+    )
+    location = Location.objects.create(
+      name="Stade Olympique",
+      city="Paris",
+      total_seats=50000
+    )
+    self.events = [
+      Event.objects.create(
+        sport=sport,
+        location=location,
+        date=f"2025-07-{day}",
+        start_time="15:00:00",
+        end_time="17:00:00",
+        price="50.00"
+      )
+      for day in range(20, 25)
+    ]
+
+    # Deux compétitions par événement, sauf pour le dernier
+    for event in self.events[:-1]:
+      for number, gender in ((1, "Hommes"), (2, "Femmes")):
+        Competition.objects.create(
+          description=f"Match {number}",
+          gender=gender,
+          phase="Phase 1",
+          event=event
+        )
+
+  def test_competition_list_by_ids(self):
+
+    """
+    Teste que les compétitions de plusieurs événements sont regroupées par événement en une seule requête, un événement
+    demandé sans compétition figurant avec une liste vide.
+    """
+    url = reverse('competition_list')
+    ids = ",".join(str(event.id_event) for event in (self.events[0], self.events[2], self.events[4]))
+
+    with self.assertNumQueries(1):
+      response = self.client.get(url, {"ids": ids})
+
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    data = response.json()
+    self.assertEqual(set(data), {str(self.events[0].id_event), str(self.events[2].id_event), str(self.events[4].id_event)})
+    self.assertEqual([competition['description'] for competition in data[str(self.events[0].id_event)]], ["Match 1", "Match 2"])
+    self.assertEqual(data[str(self.events[4].id_event)], [])
+
+    # Vérifie que la réponse est ensuite servie depuis le cache du catalogue
+    with self.assertNumQueries(0):
+      self.client.get(url, {"ids": ids})
+
+  def test_competition_list_by_date_range(self):
+
+    """
+    Teste que les compétitions des événements d'une période sont regroupées par événement.
+    """
+    url = reverse('competition_list')
+
+    data = self.client.get(url, {"date_from": "2025-07-21", "date_to": "2025-07-22"}).json()
+
+    self.assertEqual(set(data), {str(self.events[1].id_event), str(self.events[2].id_event)})
+    self.assertEqual(len(data[str(self.events[1].id_event)]), 2)
+
+  def test_competition_list_invalid_parameters(self):
+
+    """
+    Teste qu'une requête sans paramètre, ou avec une liste d'identifiants invalide, renvoie une erreur 400.
+    """
+    url = reverse('competition_list')
+
+    for params in ({}, {"ids": "1,a"}, {"ids": ",".join(str(number) for number in range(101))}, {"date_to": "22-07-2025"}):
+      response = self.client.get(url, params)
+      self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+
+
 class CartDetailsAPITest(TestCase):
 
   def setUp(self):
@@ -332,4 +657,168 @@ class CartDetailsAPITest(TestCase):
 
     data = response.json()
     # Vérifie que la liste des détails pour le panier est vide
-    self.assertEqual(data, [])
\ No newline at end of file
+    self.assertEqual(data, [])
+
+  def test_cart_details_constant_queries(self):
+
+    """
+    Teste que le point de terminaison API `cart_details` résout tout le panier en une seule requête sur les événements,
+    quel que soit le nombre d'articles, et retourne les articles dans l'ordre du programme.
+    """
+    url = reverse('cart_details')
+
+    # Crée un second événement, programmé avant le premier
+    earlier = Event.objects.create(
+      sport=self.sport,
+      location=self.location,
+      date="2025-07-30",
+      start_time="09:00:00",
+      end_time="11:00:00",
+      price="25.00"
+    )
+
+    # Crée un panier de plusieurs articles, dont des doublons et un événement inexistant
+    payload = [
+      {"id_event": self.event.id_event, "id_offer": self.offer.id_offer},
+      {"id_event": earlier.id_event, "id_offer": self.offer.id_offer},
+      {"id_event": self.event.id_event, "id_offer": self.offer.id_offer},
+      {"id_event": 9999, "id_offer": self.offer.id_offer}
+    ]
+
+    # Charge les tables de référence du processus, puis vérifie qu'une seule requête, pour les événements, suffit
+    reference.offers()
+    with self.assertNumQueries(1):
+      response = self.client.post(url, payload, format='json')
+
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    data = response.json()
+    # Vérifie que les doublons sont conservés, l'article inexistant ignoré et les articles triés par date
+    self.assertEqual(
+      [item['event']['id_event'] for item in data],
+      [earlier.id_event, self.event.id_event, self.event.id_event]
+    )
+
+  def test_cart_details_too_many_items(self):
+
+    """
+    Teste que le point de terminaison API `cart_details` retourne un code de statut 400 lorsque le panier dépasse le
+    nombre maximal d'articles.
+    """
+    url = reverse('cart_details')
+
+    payload = [{"id_event": self.event.id_event, "id_offer": self.offer.id_offer}] * 3
+
+    with self.settings(CART_MAX_ITEMS=2), self.assertNumQueries(0):
+      response = self.client.post(url, payload, format='json')
+
+    # Vérifie que le code de statut de la réponse est 400 (Bad Request)
+    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+  def test_cart_details_invalid_item(self):
+
+    """
+    Teste que le point de terminaison API `cart_details` retourne un code de statut 400 lorsqu'un article ne contient
+    pas d'identifiants entiers.
+    """
+    url = reverse('cart_details')
+
+    payload = [{"id_event": "abc"}]
+
+    response = self.client.post(url, payload, format='json')
+
+    # Vérifie que le code de statut de la réponse est 400 (Bad Request)
+    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+
+
+class CatalogueCacheAPITest(TestCase):
+
+  def setUp(self):
+
+    """
+    Configure le client API et crée un sport et une offre pour les tests du cache du catalogue.
+    """
+    self.client = APIClient()
+
+    self.sport = Sport.objects.create(
+      title="Football",
+      image="sports/football.jpg"
+    )
+    self.offer = Offer.objects.create(
+      type="Offre Solo",
+      number_seats=1,
+      discount=0
+    )
+
+  def test_catalogue_is_served_without_query(self):
+
+    """
+    Teste qu'une fois rendue, la liste des sports est servie sans requête, avec le même contenu et la même ETag.
+    """
+    url = reverse('sport_list')
+    first = self.client.get(url)
+
+    with self.assertNumQueries(0):
+      second = self.client.get(url)
+
+    self.assertEqual(second.content, first.content)
+    self.assertEqual(second['ETag'], first['ETag'])
+    self.assertEqual(second['Content-Type'], "application/json")
+
+  @override_settings(LOCAL_CACHE_MAX_AGE=0)
+  def test_catalogue_expires_without_shared_cache(self):
+
+    """
+    Teste que, sans cache partagé, une modification dont le changement de version n'est pas reçu, comme celle d'un autre
+    processus, est servie après `LOCAL_CACHE_MAX_AGE` secondes.
+    """
+    event = Event.objects.create(
+      sport=self.sport,
+      location=Location.objects.create(name="Parc des Princes", city="Paris", total_seats=100),
+      date="2024-07-25",
+      start_time="15:00:00",
+      end_time="17:00:00",
+      price="30.00"
+    )
+    url = reverse('event_list')
+    self.client.get(url)
+
+    Event.objects.filter(pk=event.pk).update(price="35.00")
+
+    self.assertEqual(self.client.get(url).json()[0]['price'], "35.00")
+
+  def test_if_none_match_returns_not_modified(self):
+
+    """
+    Teste qu'une requête portant l'ETag courante reçoit une réponse 304 sans contenu.
+    """
+    url = reverse('offer_list')
+    etag = self.client.get(url)['ETag']
+
+    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    self.assertEqual(response.content, b"")
+    self.assertEqual(response['ETag'], etag)
+
+  def test_catalogue_changes_invalidate_cached_responses(self):
+
+    """
+    Teste que l'enregistrement ou la suppression d'un sport ou d'une offre invalide les réponses du catalogue.
+    """
+    sports = self.client.get(reverse('sport_list'))
+    offers = self.client.get(reverse('offer_list'))
+
+    self.sport.title = "Football féminin"
+    self.sport.save()
+    self.offer.delete()
+
+    response = self.client.get(reverse('sport_list'), HTTP_IF_NONE_MATCH=sports['ETag'])
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertEqual(response.json()[0]['title'], "Football féminin")
+
+    response = self.client.get(reverse('offer_list'), HTTP_IF_NONE_MATCH=offers['ETag'])
+    self.assertEqual(response.status_code, status.HTTP_200_OK)
+    self.assertEqual(response.json(), [])
@@ -1,6 +1,8 @@
 from datetime import date, time
-from django.test import TestCase
-from event.models import Competition, Event, Location, Sport
+from django.db import transaction
+from django.db.models import F, Sum
+from django.test import TestCase, override_settings
+from event.models import Competition, Event, EventSeatShard, InsufficientSeatsError, Location, Sport
 
 class SportModelTests(TestCase):
 
@@ -91,6 +93,208 @@ class EventModelTests(TestCase):
     """
     self.assertEqual(self.event.available_seats, 5000)
 
+  def test_event_available_seats_reads_booked_seats_counter(self):
+
+    """
+    Teste que la propriété `available_seats` se base sur le compteur `booked_seats` de l'événement.
+    """
+    Event.objects.add_booked_seats({self.event.id_event: 120})
+    self.event.refresh_from_db()
+
+    self.assertEqual(self.event.booked_seats, 120)
+    self.assertEqual(self.event.available_seats, 4880)
+
+  def test_with_availability_annotates_remaining_seats(self):
+
+    """
+    Teste que `with_availability` annote le nombre de places disponibles lu par la propriété `available_seats`.
+    """
+    Event.objects.add_booked_seats({self.event.id_event: 300})
+
+    with self.assertNumQueries(1):
+      event = Event.objects.with_availability().get(pk=self.event.pk)
+      available_seats = event.available_seats
+      location_name = event.location.name
+
+    self.assertEqual(event.remaining_seats, 4700)
+    self.assertEqual(available_seats, 4700)
+    self.assertEqual(location_name, "Centre aquatique olympique")
+
+  def test_allocate_seats_rejects_request_over_capacity(self):
+
+    """
+    Teste que `allocate_seats` réserve les places disponibles et refuse une demande dépassant la capacité restante.
+    """
+    Event.objects.allocate_seats({self.event.id_event: 4998})
+
+    with self.assertRaises(InsufficientSeatsError) as context:
+      Event.objects.allocate_seats({self.event.id_event: 3})
+
+    self.event.refresh_from_db()
+    self.assertEqual(context.exception.available, 2)
+    self.assertEqual(self.event.booked_seats, 4998)
+
+  def test_allocate_seats_rejects_unknown_event(self):
+
+    """
+    Teste qu'une demande portant sur un événement inconnu est refusée, sans réserver les places des autres événements.
+    """
+    with self.assertRaises(InsufficientSeatsError) as context, transaction.atomic():
+      Event.objects.allocate_seats({self.event.id_event: 2, 9999: 1})
+
+    self.assertEqual((context.exception.event_id, context.exception.available), (9999, 0))
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.booked_seats, 0)
+
+  def test_release_booked_seats_never_goes_negative(self):
+
+    """
+    Teste que `release_booked_seats` décrémente le compteur sans jamais le rendre négatif.
+    """
+    Event.objects.add_booked_seats({self.event.id_event: 4})
+    Event.objects.release_booked_seats(self.event.id_event, 3)
+    Event.objects.release_booked_seats(self.event.id_event, 3)
+    self.event.refresh_from_db()
+
+    self.assertEqual(self.event.booked_seats, 1)
+
+  def test_reconcile_booked_seats_resets_counter_without_bookings(self):
+
+    """
+    Teste que `reconcile_booked_seats` réaligne le compteur sur les lignes de réservation existantes.
+    """
+    Event.objects.filter(pk=self.event.pk).update(booked_seats=42)
+
+    updated = Event.objects.reconcile_booked_seats()
+    self.event.refresh_from_db()
+
+    self.assertEqual(updated, 1)
+    self.assertEqual(self.event.booked_seats, 0)
+
+
+
+
+@override_settings(SEAT_COUNTER_SHARDS=4)
+class EventSeatShardTests(TestCase):
+
+  def setUp(self):
+
+    """
+    Crée un événement à forte demande dont une partie des places est déjà réservée.
+    """
+    self.sport = Sport.objects.create(
+      title="Athlétisme",
+      image="sports/athletisme.jpg"
+    )
+    self.location = Location.objects.create(
+      name="Stade de France",
+      city="Saint-Denis",
+      total_seats=1002
+    )
+    self.event = Event.objects.create(
+      sport=self.sport,
+      location=self.location,
+      date=date(2024, 8, 4),
+      start_time=time(20, 0),
+      end_time=time(22, 0),
+      price="250.00",
+      booked_seats=2,
+      high_demand=True
+    )
+    Event.objects.filter(pk=self.event.pk).rebuild_seat_shards()
+
+  def test_rebuild_seat_shards_splits_remaining_capacity(self):
+
+    """
+    Teste que `rebuild_seat_shards` répartit les places restantes entre `SEAT_COUNTER_SHARDS` compteurs.
+    """
+    capacities = list(self.event.seat_shards.order_by('index').values_list('capacity', flat=True))
+
+    self.assertEqual(capacities, [250, 250, 250, 250])
+    self.assertEqual(self.event.available_seats, 1000)
+
+  def test_allocate_seats_uses_shards_for_high_demand_event(self):
+
+    """
+    Teste que les places d'un événement à forte demande sont réservées sur ses compteurs répartis et sommées à la lecture.
+    """
+    Event.objects.allocate_seats({self.event.id_event: 4})
+    Event.objects.allocate_seats({self.event.id_event: 3})
+
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.booked_seats, 2)
+    self.assertEqual(self.event.seat_shards.aggregate(total=Sum('booked_seats'))['total'], 7)
+    self.assertEqual(self.event.available_seats, 993)
+    self.assertEqual(Event.objects.with_availability().get(pk=self.event.pk).available_seats, 993)
+
+  def test_allocate_seats_rejects_when_no_shard_has_capacity(self):
+
+    """
+    Teste qu'une demande est refusée lorsque les compteurs répartis ne disposent pas ensemble d'assez de places.
+    """
+    EventSeatShard.objects.filter(event=self.event).update(booked_seats=F('capacity') - 1)
+
+    with self.assertRaises(InsufficientSeatsError):
+      Event.objects.allocate_seats({self.event.id_event: 5})
+
+    self.assertEqual(self.event.available_seats, 4)
+
+  def test_allocate_seats_splits_request_across_shards(self):
+
+    """
+    Teste qu'une demande qu'aucun compteur ne peut couvrir seul est répartie entre les compteurs, dans l'ordre de leur
+    index.
+    """
+    EventSeatShard.objects.filter(event=self.event).update(booked_seats=F('capacity') - 1)
+
+    Event.objects.allocate_seats({self.event.id_event: 3})
+
+    free = list(self.event.seat_shards.order_by('index').annotate(free=F('capacity') - F('booked_seats')).values_list('free', flat=True))
+    self.assertEqual(free, [0, 0, 0, 1])
+    self.assertEqual(self.event.available_seats, 1)
+
+  def test_release_booked_seats_returns_seats_to_a_shard(self):
+
+    """
+    Teste que les places libérées sont rendues à un compteur réparti afin d'être de nouveau vendables.
+    """
+    Event.objects.allocate_seats({self.event.id_event: 4})
+    Event.objects.release_booked_seats(self.event.id_event, 4)
+
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.booked_seats, 2)
+    self.assertEqual(self.event.available_seats, 1000)
+
+  def test_release_booked_seats_after_split_allocation(self):
+
+    """
+    Teste que les places d'une demande répartie entre plusieurs compteurs leur sont toutes rendues à sa libération.
+    """
+    EventSeatShard.objects.filter(event=self.event).update(capacity=2)
+    Event.objects.allocate_seats({self.event.id_event: 6})
+    self.assertEqual(self.event.available_seats, 994)
+
+    Event.objects.release_booked_seats(self.event.id_event, 6)
+
+    self.event.refresh_from_db()
+    self.assertEqual(self.event.booked_seats, 2)
+    self.assertEqual(self.event.seat_shards.aggregate(total=Sum('booked_seats'))['total'], 0)
+    self.assertEqual(self.event.available_seats, 1000)
+
+  def test_reconcile_booked_seats_rebuilds_shards(self):
+
+    """
+    Teste que la réconciliation recalcule le total réservé et reconstruit les compteurs répartis sur les places restantes.
+    """
+    Event.objects.allocate_seats({self.event.id_event: 4})
+
+    Event.objects.reconcile_booked_seats()
+    self.event.refresh_from_db()
+
+    self.assertEqual(self.event.booked_seats, 0)
+    self.assertEqual(sum(self.event.seat_shards.values_list('capacity', flat=True)), 1002)
+    self.assertEqual(self.event.available_seats, 1002)
+
 
 
 
@@ -0,0 +1,103 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from core.versions import bump_version
+from event import reference
+from event.models import Event, Location, Sport
+from offer.models import Offer
+
+class ReferenceDataTests(TestCase):
+
+  def setUp(self):
+
+    """
+    Vide le cache et crée une offre, un sport et un lieu de référence.
+    """
+    cache.clear()
+
+    self.offer = Offer.objects.create(
+      type="Offre Solo",
+      number_seats=1,
+      discount=0
+    )
+    self.sport = Sport.objects.create(
+      title="Escrime",
+      image="sports/escrime.jpg"
+    )
+    self.location = Location.objects.create(
+      name="Grand Palais",
+      city="Paris",
+      total_seats=8000
+    )
+
+  def test_tables_loaded_once_per_version(self):
+
+    """
+    Teste que les tables sont chargées en trois requêtes, puis lues sans requête tant que leur version ne change pas.
+    """
+    with self.assertNumQueries(3):
+      reference.offers()
+
+    with self.assertNumQueries(0):
+      self.assertEqual(reference.offers()[self.offer.id_offer].type, "Offre Solo")
+      self.assertEqual(reference.sports()[self.sport.id_sport].title, "Escrime")
+      self.assertEqual(reference.locations()[self.location.id_location].city, "Paris")
+
+    # Vérifie que les tables ne peuvent pas être modifiées
+    with self.assertRaises(TypeError):
+      reference.offers()[0] = self.offer
+
+  def test_tables_reloaded_on_change(self):
+
+    """
+    Teste que l'enregistrement ou la suppression d'une offre ou d'un sport, ou un changement de version fait par un autre
+    processus, fait recharger les tables.
+    """
+    reference.offers()
+
+    duo = Offer.objects.create(type="Offre Duo", number_seats=2, discount=5)
+    self.assertIn(duo.id_offer, reference.offers())
+
+    self.sport.title = "Escrime artistique"
+    self.sport.save()
+    self.assertEqual(reference.sports()[self.sport.id_sport].title, "Escrime artistique")
+
+    duo.delete()
+    self.assertNotIn(duo.id_offer, reference.offers())
+
+    bump_version(reference.VERSION_KEY)
+    with self.assertNumQueries(3):
+      reference.locations()
+
+  @override_settings(LOCAL_CACHE_MAX_AGE=0)
+  def test_tables_expire_without_shared_cache(self):
+
+    """
+    Teste que, sans cache partagé, une modification dont le changement de version n'est pas reçu, comme celle d'un autre
+    processus, est lue après `LOCAL_CACHE_MAX_AGE` secondes.
+    """
+    reference.sports()
+
+    Sport.objects.filter(pk=self.sport.pk).update(title="Escrime artistique")
+
+    self.assertEqual(reference.sports()[self.sport.id_sport].title, "Escrime artistique")
+
+  def test_lookup_and_attach_references(self):
+
+    """
+    Teste que `lookup` ignore les identifiants inconnus et que `attach_references` évite le chargement du sport et du lieu.
+    """
+    self.assertEqual(reference.lookup(reference.offers(), [self.offer.id_offer, 9999]), {self.offer.id_offer: self.offer})
+
+    Event.objects.create(
+      sport=self.sport,
+      location=self.location,
+      date="2024-07-27",
+      start_time="10:00:00",
+      end_time="12:00:00",
+      price="60.00"
+    )
+    events = list(Event.objects.all())
+
+    with self.assertNumQueries(0):
+      reference.attach_references(events)
+      self.assertEqual((events[0].sport.title, events[0].location.name), ("Escrime", "Grand Palais"))
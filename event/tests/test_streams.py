@@ -0,0 +1,97 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from event.models import Event, Location, Sport, seats_changed
+from event.streams import AvailabilityBroadcaster, broadcaster
+
+@override_settings(AVAILABILITY_STREAM_WINDOW=0.05, AVAILABILITY_STREAM_NOTIFY=False)
+class AvailabilityStreamTests(TestCase):
+
+  def setUp(self):
+
+    """
+    Vide le cache et crée deux événements dans un lieu de 1 000 places.
+    """
+    cache.clear()
+
+    sport = Sport.objects.create(
+      title="Natation",
+      image="sports/natation.jpg"
+    )
+    location = Location.objects.create(
+      name="Centre Aquatique",
+      city="Saint-Denis",
+      total_seats=1000
+    )
+    self.first, self.second = (
+      Event.objects.create(
+        sport=sport,
+        location=location,
+        date=date,
+        start_time="10:00:00",
+        end_time="12:00:00",
+        price="45.00"
+      )
+      for date in ("2024-07-27", "2024-07-28")
+    )
+
+  def test_seats_changed_is_sent_after_commit(self):
+
+    """
+    Teste que le signal `seats_changed` n'est envoyé qu'à la validation de la transaction qui modifie les compteurs.
+    """
+    received = []
+    seats_changed.connect(
+      lambda event_ids, **kwargs: received.append(event_ids),
+      dispatch_uid="test_seats_changed",
+      weak=False
+    )
+    self.addCleanup(seats_changed.disconnect, dispatch_uid="test_seats_changed")
+
+    with self.captureOnCommitCallbacks(execute=True):
+      Event.objects.add_booked_seats({self.first.id_event: 4})
+      self.assertEqual(received, [])
+
+    self.assertEqual(received, [{self.first.id_event}])
+
+  async def test_changes_are_coalesced_per_window(self):
+
+    """
+    Teste que les changements d'une même fenêtre sont regroupés en un seul envoi des valeurs à jour à chaque abonné.
+    """
+    stream = AvailabilityBroadcaster()
+    subscribers = [stream.subscribe() for _ in range(3)]
+
+    await sync_to_async(Event.objects.add_booked_seats)({self.first.id_event: 10, self.second.id_event: 3})
+    stream.publish({self.first.id_event})
+    stream.publish({self.first.id_event, self.second.id_event})
+
+    for subscriber in subscribers:
+      seats = await asyncio.wait_for(subscriber.next(), 1)
+      self.assertEqual(seats, {self.first.id_event: 990, self.second.id_event: 997})
+
+    self.assertFalse(any(subscriber.ready.is_set() for subscriber in subscribers))
+
+  async def test_stream_sends_snapshot_then_changes(self):
+
+    """
+    Teste que le flux envoie l'état initial des places, puis les changements diffusés dans le processus.
+    """
+    response = await self.async_client.get(reverse('availability_stream'))
+    messages = aiter(response.streaming_content)
+
+    self.assertEqual(response['Content-Type'], "text/event-stream")
+
+    snapshot = (await anext(messages)).decode()
+    self.assertTrue(snapshot.startswith("event: snapshot\n"))
+    self.assertIn(f'{{"id_event":{self.first.id_event},"available_seats":1000}}', snapshot)
+
+    await sync_to_async(Event.objects.add_booked_seats)({self.second.id_event: 25})
+    broadcaster().publish({self.second.id_event})
+
+    change = (await asyncio.wait_for(anext(messages), 1)).decode()
+    self.assertEqual(change, f'event: availability\ndata: [{{"id_event":{self.second.id_event},"available_seats":975}}]\n\n')
+
+    await messages.aclose()
@@ -1,9 +1,13 @@
 from django.urls import path
 from . import api
+from . import views
 
 urlpatterns = [
   path('sports', api.sport_list, name='sport_list'),
   path('events', api.event_list, name='event_list'),
+  path('availability', api.event_availability, name='event_availability'),
+  path('availability/stream', views.availability_stream, name='availability_stream'),
+  path('competitions', api.competition_list, name='competition_list'),
   path('competitions/<int:event_id>', api.competition_list_by_event, name='competition_list_by_event'),
   path('cart', api.cart_details, name='cart_details')
 ]
\ No newline at end of file
@@ -1,3 +1,68 @@
-from django.shortcuts import render
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from .catalogue import seat_availability
+from .streams import broadcaster
 
-# Create your views here.
+def server_sent_event(name: str, seats: dict) -> str:
+
+  """
+  Formate un message du flux d'événements serveur contenant des places disponibles.
+
+  Args:
+    name (str): Le type du message.
+    seats (dict): Les places disponibles, par identifiant d'événement.
+  Returns:
+    str: Le message, terminé par une ligne vide.
+  """
+  data = [{"id_event": int(event_id), "available_seats": available} for event_id, available in seats.items()]
+
+  return f"event: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def availability_events():
+
+  """
+  Produit les messages du flux d'une connexion : l'état initial des places, puis les changements regroupés, entrecoupés
+  de commentaires qui maintiennent la connexion ouverte.
+  """
+  stream = broadcaster()
+  subscriber = stream.subscribe()
+
+  try:
+    yield server_sent_event("snapshot", await sync_to_async(seat_availability)())
+
+    while True:
+
+      try:
+        seats = await asyncio.wait_for(subscriber.next(), settings.AVAILABILITY_STREAM_KEEPALIVE)
+      except TimeoutError:
+        yield ": keepalive\n\n"
+        continue
+
+      yield server_sent_event("availability", seats)
+
+  finally:
+    stream.unsubscribe(subscriber)
+
+
+@require_GET
+async def availability_stream(request: HttpRequest) -> StreamingHttpResponse:
+
+  """
+  Ouvre un flux d'événements serveur (`text/event-stream`) des places disponibles des événements, mis à jour après
+  chaque vente ou annulation. Nécessite un serveur ASGI.
+
+  Args:
+    → request (HttpRequest) : L'objet de la requête HTTP.
+  Returns:
+    → StreamingHttpResponse : Le flux, qui reste ouvert jusqu'à la déconnexion du client.
+  """
+  return StreamingHttpResponse(
+    availability_events(),
+    content_type="text/event-stream",
+    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+  )
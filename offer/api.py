@@ -1,26 +1,31 @@
-from rest_framework import status
+from django.http import HttpResponse
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.request import Request
-from rest_framework.response import Response
-from .models import Offer
 from .serializers import OfferSerializer, SeatSerializer
+from event.catalogue import catalogue_response
+from event import reference
 
 @api_view(['GET'])
 @authentication_classes([])
 @permission_classes([])
-def number_seats_list(request: Request) -> Response:
+def number_seats_list(request: Request) -> HttpResponse:
     
   """
-  Récupère la liste des valeurs distinctes du nombre de places des offres.
+  Récupère la liste des valeurs distinctes du nombre de places des offres, servie depuis le cache du catalogue.
 
   Args:
     → request (HttpRequest) : L'objet de la requête HTTP.
   Returns:
-    → Response : Une liste JSON du nombres de places distincts.
+    → HttpResponse : Une liste JSON du nombres de places distincts, ou une réponse HTTP 304 si l'`ETag` envoyée correspond.
   """
-  seats = Offer.objects.values('number_seats').distinct().order_by('number_seats')
-  serializer = SeatSerializer(seats, many=True)
-  return Response(serializer.data, status=status.HTTP_200_OK)
+  return catalogue_response(
+    request,
+    'number_seats_list',
+    lambda: SeatSerializer(
+      [{'number_seats': seats} for seats in sorted({offer.number_seats for offer in reference.offers().values()})],
+      many=True
+    ).data
+  )
 
 
 
@@ -28,16 +33,19 @@ def number_seats_list(request: Request) -> Response:
 @api_view(['GET'])
 @authentication_classes([])
 @permission_classes([])
-def offer_list(request: Request) -> Response:
+def offer_list(request: Request) -> HttpResponse:
     
   """
-  Récupère la liste de toutes les offres.
+  Récupère la liste de toutes les offres, servie depuis le cache du catalogue.
 
   Args:
     → request (HttpRequest) : L'objet de la requête HTTP.
   Returns:
-    → Response : Une réponse JSON contenant la liste sérialisée des offres avec un code de statut HTTP 200.
+    → HttpResponse : Une réponse JSON contenant la liste sérialisée des offres avec un code de statut HTTP 200,
+      ou HTTP 304 si l'`ETag` envoyée correspond.
   """
-  offers = Offer.objects.all().order_by('number_seats', 'discount')
-  serializer = OfferSerializer(offers, many=True)
-  return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+  return catalogue_response(
+    request,
+    'offer_list',
+    lambda: OfferSerializer(sorted(reference.offers().values(), key=lambda offer: (offer.number_seats, offer.discount)), many=True).data
+  )
\ No newline at end of file
@@ -5,4 +5,11 @@ class OfferConfig(AppConfig):
 
   default_auto_field = "django.db.models.BigAutoField"
   name = "offer"
-  verbose_name = "Gestion des offres"
\ No newline at end of file
+  verbose_name = "Gestion des offres"
+
+  def ready(self):
+
+    """
+    Importe les gestionnaires de signaux pour l'application.
+    """
+    import offer.signals
\ No newline at end of file
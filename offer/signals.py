@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from .models import Offer
+from .stats import invalidate_stats
+from booking.models import BookingLine
+from event.catalogue import invalidate_catalogue
+from event.reference import invalidate_reference
+from event.models import Event, Location, Sport
+
+# Toute modification d'une offre invalide les réponses mises en cache du catalogue
+post_save.connect(invalidate_catalogue, sender=Offer, dispatch_uid="invalidate_catalogue_Offer_save")
+post_delete.connect(invalidate_catalogue, sender=Offer, dispatch_uid="invalidate_catalogue_Offer_delete")
+
+# Toute modification d'une offre fait recharger les tables de référence de tous les processus
+post_save.connect(invalidate_reference, sender=Offer, dispatch_uid="invalidate_reference_Offer_save")
+post_delete.connect(invalidate_reference, sender=Offer, dispatch_uid="invalidate_reference_Offer_delete")
+
+# Toute modification d'une ligne de réservation, ou des offres, événements, sports et lieux qui la décrivent, invalide
+# les statistiques des ventes mises en cache
+for model in (BookingLine, Offer, Event, Sport, Location):
+  post_save.connect(invalidate_stats, sender=model, dispatch_uid=f"invalidate_stats_{model.__name__}_save")
+  post_delete.connect(invalidate_stats, sender=model, dispatch_uid=f"invalidate_stats_{model.__name__}_delete")
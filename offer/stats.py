@@ -0,0 +1,136 @@
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from .models import Offer
+
+# Clé des statistiques des ventes dans le cache partagé entre les processus
+STATS_KEY = "offer:stats"
+
+def sales_rows() -> list[dict]:
+
+  """
+  Lit en une seule requête les cumuls des ventes par offre, événement et jour de réservation, sans parcourir les lignes
+  de réservation.
+  Chaque offre figure au moins une fois, avec un événement et un jour nuls si elle n'a jamais été vendue.
+
+  Returns:
+    list[dict]: Les cumuls, avec l'offre, l'événement, le jour, le nombre de lignes, de places et le chiffre d'affaires
+      après réduction.
+  """
+  return list(
+    Offer.objects.order_by().values(
+      'id_offer',
+      'type',
+      'number_seats',
+      event=F('salesrollup__event'),
+      event_date=F('salesrollup__event__date'),
+      event_start_time=F('salesrollup__event__start_time'),
+      event_sport=F('salesrollup__event__sport__title'),
+      event_location=F('salesrollup__event__location__name'),
+      day=F('salesrollup__day'),
+      lines=Coalesce(F('salesrollup__lines'), 0),
+      seats=Coalesce(F('salesrollup__seats'), 0),
+      revenue=F('salesrollup__revenue')
+    )
+  )
+
+
+def _add(totals: dict, row: dict) -> None:
+
+  """
+  Ajoute les ventes d'un cumul aux totaux d'une ligne des statistiques.
+  """
+  totals['lines'] += row['lines']
+  totals['seats'] += row['seats']
+  totals['revenue'] += row['revenue'] or Decimal(0)
+
+
+def _totals(**fields) -> dict:
+
+  """
+  Crée une ligne des statistiques aux totaux nuls.
+  """
+  return {**fields, 'lines': 0, 'seats': 0, 'revenue': Decimal(0)}
+
+
+def build_stats(rows: list[dict]) -> dict:
+
+  """
+  Regroupe les ventes par offre, par événement et par jour de réservation.
+
+  Args:
+    rows (list[dict]): Les cumuls retournés par `sales_rows`.
+  Returns:
+    dict: Les lignes des statistiques `offers`, `events` et `days`, dans l'ordre d'affichage, et les totaux `total`.
+  """
+  offers, events, days = {}, {}, {}
+  total = _totals()
+
+  for row in rows:
+
+    _add(offers.setdefault(row['id_offer'], _totals(type=row['type'], number_seats=row['number_seats'])), row)
+
+    # Ligne d'une offre jamais vendue
+    if row['event'] is None:
+      continue
+
+    event = events.setdefault(
+      row['event'],
+      _totals(
+        date=row['event_date'],
+        start_time=row['event_start_time'],
+        sport=row['event_sport'],
+        location=row['event_location']
+      )
+    )
+    _add(event, row)
+    _add(days.setdefault(row['day'], _totals(day=row['day'])), row)
+    _add(total, row)
+
+  return {
+    'offers': sorted(offers.values(), key=lambda offer: (offer['number_seats'], offer['type'])),
+    'events': sorted(events.values(), key=lambda event: (event['date'], event['start_time'], event['sport'])),
+    'days': sorted(days.values(), key=lambda day: day['day']),
+    'total': total
+  }
+
+
+def offer_stats() -> dict:
+
+  """
+  Retourne les statistiques des ventes depuis le cache partagé, recalculées lorsqu'elles ont été invalidées ou que leur
+  durée de vie `OFFER_STATS_TTL` est écoulée.
+
+  Returns:
+    dict: Les statistiques des ventes, telles que retournées par `build_stats`.
+  """
+  stats = cache.get(STATS_KEY)
+
+  if stats is None:
+    stats = build_stats(sales_rows())
+    cache.set(STATS_KEY, stats, timeout=settings.OFFER_STATS_TTL)
+
+  return stats
+
+
+def clear_stats() -> None:
+
+  """
+  Supprime les statistiques des ventes du cache partagé.
+  """
+  cache.delete(STATS_KEY)
+
+
+def invalidate_stats(**kwargs) -> None:
+
+  """
+  Gestionnaire des signaux des modèles dont dépendent les statistiques, également appelé après les enregistrements
+  groupés qui n'envoient pas de signal.
+  Les statistiques sont supprimées immédiatement, puis de nouveau après la validation de la transaction, pour écarter
+  celles calculées entre les deux à partir de ventes non encore validées.
+  """
+  clear_stats()
+  transaction.on_commit(clear_stats)
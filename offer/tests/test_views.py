@@ -0,0 +1,185 @@
+from datetime import date
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from booking.models import Booking, BookingLine, SalesRollup
+from event.models import Event, Location, Sport
+from offer.models import Offer
+from user.models import User
+
+@override_settings(QR_CODE_ON_DEMAND=True)
+class OfferStatsViewTest(TestCase):
+
+  def setUp(self):
+
+    """
+    Vide le cache, connecte un membre du staff et enregistre des ventes de deux offres sur deux événements, une troisième
+    offre n'étant jamais vendue.
+    """
+    cache.clear()
+
+    self.staff = User.objects.create_user(
+      email="admin@example.com",
+      password="MotdepasseValide123!",
+      firstname="Paul",
+      lastname="Martin",
+      date_of_birth="1985-01-01",
+      country="France",
+      is_staff=True
+    )
+    self.client.force_login(self.staff)
+
+    self.user = User.objects.create_user(
+      email="jean.dupont@example.com",
+      password="MotdepasseValide123!",
+      firstname="Jean",
+      lastname="Dupont",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+
+    sport = Sport.objects.create(
+      title="Athlétisme",
+      image="sports/athletisme.jpg"
+    )
+    location = Location.objects.create(
+      name="Stade de France",
+      city="Saint-Denis",
+      total_seats=100
+    )
+    self.first = Event.objects.create(
+      sport=sport,
+      location=location,
+      date="2024-08-04",
+      start_time="20:00:00",
+      end_time="22:00:00",
+      price="100.00"
+    )
+    self.second = Event.objects.create(
+      sport=sport,
+      location=location,
+      date="2024-08-05",
+      start_time="10:00:00",
+      end_time="12:00:00",
+      price="40.00"
+    )
+    self.solo = Offer.objects.create(
+      type="Offre Solo",
+      number_seats=1,
+      discount=0
+    )
+    self.duo = Offer.objects.create(
+      type="Offre Duo",
+      number_seats=2,
+      discount=10
+    )
+    self.family = Offer.objects.create(
+      type="Offre Famille",
+      number_seats=4,
+      discount=20
+    )
+
+    # Les lignes sont enregistrées une à une, puis ajoutées aux cumuls des ventes comme par le paiement
+    booking = Booking.objects.create(person=self.user)
+    lines = [
+      BookingLine(booking=booking, event=event, offer=offer)
+      for event, offer in ((self.first, self.solo), (self.first, self.duo), (self.second, self.duo), (self.second, self.duo))
+    ]
+    for line in lines:
+      line.save()
+    SalesRollup.objects.record(lines)
+
+    self.url = reverse('stats')
+
+  def test_stats_aggregates_sales(self):
+
+    """
+    Teste que les statistiques donnent, par offre, par événement et par jour, le nombre de lignes, de places vendues et le
+    chiffre d'affaires après réduction, en une seule requête sur les cumuls des ventes.
+    """
+    # Une requête pour la session et une pour l'utilisateur connecté, puis la requête sur les cumuls
+    with self.assertNumQueries(3):
+      response = self.client.get(self.url)
+
+    self.assertEqual(response.status_code, 200)
+
+    offers = {stat['type']: stat for stat in response.context['offers']}
+    self.assertEqual(offers["Offre Solo"]['lines'], 1)
+    self.assertEqual(offers["Offre Solo"]['revenue'], Decimal("100.00"))
+    self.assertEqual(offers["Offre Duo"]['lines'], 3)
+    self.assertEqual(offers["Offre Duo"]['seats'], 6)
+    # 100 € × 2 places × 90 % + 2 × (40 € × 2 places × 90 %)
+    self.assertEqual(offers["Offre Duo"]['revenue'], Decimal("324.00"))
+    self.assertEqual(offers["Offre Famille"]['lines'], 0)
+    self.assertEqual(offers["Offre Famille"]['revenue'], Decimal(0))
+
+    events = response.context['events']
+    self.assertEqual([stat['date'] for stat in events], [date(2024, 8, 4), date(2024, 8, 5)])
+    self.assertEqual([stat['seats'] for stat in events], [3, 4])
+
+    days = response.context['days']
+    self.assertEqual(len(days), 1)
+    self.assertEqual(days[0]['lines'], 4)
+
+    total = response.context['total']
+    self.assertEqual((total['lines'], total['seats'], total['revenue']), (4, 7, Decimal("424.00")))
+
+  def test_stats_served_from_cache(self):
+
+    """
+    Teste que les statistiques sont servies depuis le cache tant qu'aucune vente n'est enregistrée.
+    """
+    self.client.get(self.url)
+
+    with self.assertNumQueries(2):
+      response = self.client.get(self.url)
+
+    self.assertEqual(response.context['total']['lines'], 4)
+
+  def test_stats_invalidated_by_sales(self):
+
+    """
+    Teste qu'une vente enregistrée par le paiement, ou la suppression d'une ligne de réservation, met à jour les cumuls
+    et invalide les statistiques mises en cache.
+    """
+    self.client.get(self.url)
+
+    BookingLine.objects.filter(offer=self.solo).delete()
+    self.assertEqual(self.client.get(self.url).context['total']['lines'], 3)
+
+    api = APIClient()
+    api.force_authenticate(user=self.user)
+    response = api.post(
+      reverse('process_payment'),
+      {
+        "card_number": "4111 1111 1111 1112",
+        "card_name": "Jean Dupont",
+        "expiration_date": f"{date.today().year + 1}-01",
+        "cvc": "123",
+        "cart": [{"id_event": self.second.id_event, "id_offer": self.solo.id_offer}] * 2
+      },
+      format='json'
+    )
+    self.assertEqual(response.status_code, 201)
+
+    offers = {stat['type']: stat for stat in self.client.get(self.url).context['offers']}
+    self.assertEqual((offers["Offre Solo"]['lines'], offers["Offre Solo"]['revenue']), (2, Decimal("80.00")))
+
+    # Le chiffre d'affaires enregistré est celui de la vente : une nouvelle réduction ne s'applique qu'aux ventes suivantes
+    self.duo.discount = 0
+    self.duo.save()
+    offers = {stat['type']: stat for stat in self.client.get(self.url).context['offers']}
+    self.assertEqual(offers["Offre Duo"]['revenue'], Decimal("324.00"))
+
+  def test_stats_requires_staff(self):
+
+    """
+    Teste que la page des statistiques est réservée aux membres du staff.
+    """
+    self.client.force_login(self.user)
+
+    response = self.client.get(self.url)
+
+    self.assertEqual(response.status_code, 302)
@@ -1,20 +1,14 @@
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
-from .models import Offer
-from booking.models import BookingLine
+from .stats import offer_stats
 
 @staff_member_required
 def stats(request):
-    
-  offers = Offer.objects.all()
-  stats = []
 
-  for offer in offers:
-    count = BookingLine.objects.filter(offer=offer).count()
-    stats.append({'offer': offer, 'count': count})
-
-  context = {
-    'stats': stats
-  }
-
-  return render(request, "offer/stats.html", context)
\ No newline at end of file
+  """
+  Affiche les statistiques des ventes par offre, par événement et par jour de réservation : nombre de lignes de
+  réservation, places vendues et chiffre d'affaires après réduction.
+  Les statistiques sont lues en une seule requête sur les cumuls des ventes, puis servies depuis le cache jusqu'à la
+  vente suivante.
+  """
+  return render(request, "offer/stats.html", offer_stats())
\ No newline at end of file
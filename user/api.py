@@ -3,9 +3,12 @@ from rest_framework.decorators import api_view, authentication_classes, permissi
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.views import TokenObtainPairView
+from . import denylist
+from .authentication import ClaimsAuthentication
 from .models import User
-from .serializers import CustomTokenObtainPairSerializer, RegisterUserSerializer, UserLightSerializer
+from .serializers import CustomTokenObtainPairSerializer, LogoutSerializer, RegisterUserSerializer, UserLightSerializer
 
 @api_view(['POST'])
 @authentication_classes([])
@@ -54,11 +57,12 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 
 
 @api_view(['GET'])
+@authentication_classes([ClaimsAuthentication])
 @permission_classes([IsAuthenticated])
 def me(request: Request) -> Response:
 
   """
-  Récupère les informations de l'utilisateur authentifié.
+  Récupère les informations de l'utilisateur authentifié, lues dans son token sans requête à la base de données.
   Args:
     → request (HttpRequest) : L'objet de la requête HTTP contenant les informations de l'utilisateur authentifié.
   Returns:
@@ -72,10 +76,33 @@ def me(request: Request) -> Response:
 def logout_user(request: Request) -> Response:
 
   """
-  Déconnecte l'utilisateur authentifié.
+  Déconnecte l'utilisateur authentifié en révoquant le token d'accès utilisé et, s'il est fourni dans `refresh`, son
+  token de rafraîchissement, qui sont ensuite refusés jusqu'à leur expiration.
   Args:
     → request (HttpRequest) : L'objet de la requête HTTP pour la déconnexion.
   Returns:
-    → Response : Une réponse JSON indiquant que la déconnexion a réussi, avec un code de statut HTTP 200.
+    → Response : Une réponse JSON indiquant si la déconnexion a réussi, avec un code de statut HTTP 200, ou les erreurs
+    avec un code de statut HTTP 400 si le token de rafraîchissement est invalide ou appartient à un autre utilisateur.
   """
+  serializer = LogoutSerializer(data=request.data)
+
+  if not serializer.is_valid():
+    return Response({"success": False, "errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+  refresh = serializer.validated_data.get('refresh')
+
+  if refresh is not None:
+
+    if refresh.get(api_settings.USER_ID_CLAIM) != str(request.user.pk):
+      return Response(
+        {"success": False, "errors": {"refresh": ["Token invalide ou expiré."]}},
+        status=status.HTTP_400_BAD_REQUEST
+      )
+
+    denylist.revoke(refresh)
+
+  # Absent lorsque l'utilisateur n'est pas authentifié par un token
+  if request.auth is not None:
+    denylist.revoke(request.auth)
+
   return Response({"success": True}, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,60 @@
+from functools import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import Token
+from .models import User
+
+# Revendications ajoutées aux jetons par `CustomTokenObtainPairSerializer.get_token`
+USER_CLAIMS = ('firstname', 'lastname')
+
+class ClaimsUser(TokenUser):
+
+  """
+  Utilisateur construit à partir des revendications d'un jeton signé, sans requête à la base de données.
+  Il ne porte que l'identifiant de la personne, son prénom et son nom, tels qu'ils étaient à la connexion.
+  """
+
+  @cached_property
+  def firstname(self) -> str:
+
+    """
+    Retourne le prénom de l'utilisateur lu dans le jeton.
+    """
+    return self.token['firstname']
+
+  @cached_property
+  def lastname(self) -> str:
+
+    """
+    Retourne le nom de famille de l'utilisateur lu dans le jeton.
+    """
+    return self.token['lastname']
+
+
+
+
+class ClaimsAuthentication(JWTStatelessUserAuthentication):
+
+  """
+  Authentification par jeton JWT qui fait confiance aux revendications signées du jeton au lieu de charger l'utilisateur,
+  et donc la jointure entre `User` et `Person`, à chaque requête.
+  Réservée aux points de terminaison en lecture qui n'utilisent que ces revendications : les points de terminaison qui
+  modifient des données gardent l'authentification `JWTAuthentication` adossée à la base de données.
+  """
+
+  def get_user(self, validated_token: Token) -> ClaimsUser | User:
+
+    """
+    Construit l'utilisateur à partir du jeton validé. Un jeton émis avant l'ajout des revendications est authentifié
+    avec l'utilisateur de la base de données.
+
+    Args:
+      validated_token (Token): Le jeton dont la signature et l'expiration ont été vérifiées.
+    Returns:
+      ClaimsUser | User: L'utilisateur construit à partir du jeton, ou l'utilisateur de la base de données.
+    """
+    if not all(claim in validated_token for claim in USER_CLAIMS):
+      return JWTAuthentication.get_user(self, validated_token)
+
+    # Instance de `TOKEN_USER_CLASS`, soit `ClaimsUser`
+    return super().get_user(validated_token)
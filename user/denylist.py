@@ -0,0 +1,261 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from .models import RevokedToken
+from core.versions import current_version, invalidate, shared_cache
+
+# Clés, dans le cache partagé entre les processus, de la version des filtres (changée par la purge), du numéro de la
+# dernière révocation publiée et de chaque révocation publiée
+VERSION_KEY = "denylist:version"
+SEQUENCE_KEY = "denylist:sequence"
+REVOKED_KEY = "denylist:revoked:{}"
+
+# Filtre de Bloom du processus : avec un cache partagé, (version, numéro de la dernière révocation reçue, filtre) ;
+# sans cache partagé, (version, date de la dernière lecture, prochaine lecture, prochaine reconstruction, filtre)
+_denylist = None
+_local = None
+_lock = threading.Lock()
+
+class BloomFilter:
+
+  """
+  Filtre de Bloom : ensemble probabiliste qui ne donne jamais de faux négatif, et des faux positifs avec une
+  probabilité `error_rate` tant qu'il ne contient pas plus de `capacity` éléments.
+  """
+
+  def __init__(self, capacity: int, error_rate: float):
+
+    """
+    Dimensionne le tableau de bits et le nombre de fonctions de hachage pour la capacité et le taux d'erreur donnés.
+
+    Args:
+      capacity (int): Le nombre d'éléments attendus.
+      error_rate (float): La probabilité de faux positif visée, entre 0 et 1.
+    """
+    capacity = max(capacity, 1)
+
+    self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    self.hashes = max(1, round(self.size / capacity * math.log(2)))
+    self.bits = bytearray((self.size + 7) // 8)
+
+  def _positions(self, key: str):
+
+    """
+    Retourne les positions des bits d'une clé, dérivées d'une seule empreinte par double hachage.
+    """
+    digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], 'little')
+    second = int.from_bytes(digest[8:], 'little') | 1
+
+    return ((first + i * second) % self.size for i in range(self.hashes))
+
+  def add(self, key: str) -> None:
+
+    """
+    Ajoute une clé au filtre.
+
+    Args:
+      key (str): La clé à ajouter.
+    """
+    for position in self._positions(key):
+      self.bits[position >> 3] |= 1 << (position & 7)
+
+  def __contains__(self, key: str) -> bool:
+
+    """
+    Indique si la clé a peut-être été ajoutée au filtre. Une réponse négative est certaine.
+    """
+    return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+
+
+def invalidate_denylist() -> None:
+
+  """
+  Fait reconstruire les filtres des tokens révoqués après une purge, pour en retirer les tokens expirés.
+  """
+  invalidate(VERSION_KEY)
+
+
+def publish(jti: str) -> None:
+
+  """
+  Publie une révocation validée dans le cache partagé, sous le numéro suivant la dernière révocation publiée, afin que
+  les autres processus l'ajoutent à leur filtre sans le reconstruire.
+
+  Args:
+    jti (str): L'identifiant du token révoqué.
+  """
+  cache.add(SEQUENCE_KEY, 0, timeout=None)
+  sequence = cache.incr(SEQUENCE_KEY)
+
+  # Un numéro déjà pris, avec un cache dont l'incrémentation n'est pas atomique, est remplacé par le suivant
+  while not cache.add(REVOKED_KEY.format(sequence), jti, timeout=settings.TOKEN_DENYLIST_SYNC_TTL):
+    sequence = cache.incr(SEQUENCE_KEY)
+
+
+def _build() -> BloomFilter:
+
+  """
+  Construit un filtre de Bloom en une requête, à partir des tokens révoqués non expirés.
+  """
+  jtis = list(RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list('jti', flat=True))
+
+  bloom = BloomFilter(max(settings.TOKEN_DENYLIST_CAPACITY, 2 * len(jtis)), settings.TOKEN_DENYLIST_ERROR_RATE)
+  for jti in jtis:
+    bloom.add(jti)
+
+  return bloom
+
+
+def _rebuild(version: str, sequence: int) -> BloomFilter:
+
+  """
+  Reconstruit le filtre de Bloom du processus avec un cache partagé.
+  La version et le numéro sont lus avant le chargement : une révocation validée pendant le chargement est reçue à
+  l'appel suivant.
+  """
+  global _denylist
+
+  bloom = _build()
+  _denylist = (version, sequence, bloom)
+
+  return bloom
+
+
+def _shared_filter() -> BloomFilter:
+
+  """
+  Retourne le filtre de Bloom du processus, complété des révocations publiées depuis la dernière lecture.
+  Le filtre n'est reconstruit que lorsque sa version a changé, après une purge, ou lorsqu'une révocation publiée n'est
+  plus dans le cache partagé.
+  """
+  global _denylist
+
+  version = current_version(VERSION_KEY)
+  sequence = cache.get(SEQUENCE_KEY, 0)
+  denylist = _denylist
+
+  if denylist is not None and denylist[0] == version and denylist[1] == sequence:
+    return denylist[2]
+
+  with _lock:
+
+    if _denylist is None or _denylist[0] != version or _denylist[1] > sequence:
+      return _rebuild(version, sequence)
+
+    received = _denylist[1]
+    bloom = _denylist[2]
+
+    if received < sequence:
+
+      keys = [REVOKED_KEY.format(number) for number in range(received + 1, sequence + 1)]
+      jtis = cache.get_many(keys)
+
+      if len(jtis) < len(keys):
+        return _rebuild(version, sequence)
+
+      for jti in jtis.values():
+        bloom.add(jti)
+
+      _denylist = (version, sequence, bloom)
+
+    return bloom
+
+
+def _local_filter() -> BloomFilter:
+
+  """
+  Retourne le filtre de Bloom du processus sans cache partagé, les révocations des autres processus ne pouvant pas lui
+  être publiées. Le filtre est complété des tokens révoqués depuis sa dernière lecture au plus une fois toutes les
+  `LOCAL_CACHE_MAX_AGE` secondes, et reconstruit toutes les `TOKEN_DENYLIST_SYNC_TTL` secondes pour en retirer les
+  tokens purgés. La fenêtre de recouvrement `TOKEN_DENYLIST_OVERLAP` couvre les révocations dont la transaction était
+  encore en cours lors de la lecture précédente.
+  """
+  global _local
+
+  version = current_version(VERSION_KEY)
+  local = _local
+  now = time.monotonic()
+
+  if local is not None and local[0] == version and local[2] > now:
+    return local[4]
+
+  with _lock:
+
+    if _local is not None and _local[0] == version and _local[2] > now:
+      return _local[4]
+
+    since = timezone.now()
+
+    if _local is None or _local[0] != version or _local[3] <= now:
+      bloom = _build()
+      rebuild_at = now + settings.TOKEN_DENYLIST_SYNC_TTL
+    else:
+      _, read_at, _, rebuild_at, bloom = _local
+      for jti in RevokedToken.objects.filter(
+        revoked_at__gte=read_at - timedelta(seconds=settings.TOKEN_DENYLIST_OVERLAP)
+      ).values_list('jti', flat=True):
+        bloom.add(jti)
+
+    _local = (version, since, now + settings.LOCAL_CACHE_MAX_AGE, rebuild_at, bloom)
+
+    return bloom
+
+
+def _filter() -> BloomFilter:
+
+  """
+  Retourne le filtre de Bloom du processus, tenu à jour par le cache partagé ou, à défaut, par des lectures périodiques.
+  """
+  return _shared_filter() if shared_cache() else _local_filter()
+
+
+def is_revoked(jti: str) -> bool:
+
+  """
+  Indique si un token a été révoqué. Le filtre de Bloom écarte sans requête les tokens qui n'ont jamais été révoqués ;
+  seule une réponse positive du filtre, qui peut être un faux positif, est confirmée par la base de données. Sans cache
+  partagé, une révocation faite par un autre processus n'est prise en compte qu'après `LOCAL_CACHE_MAX_AGE` secondes.
+
+  Args:
+    jti (str): L'identifiant du token.
+  Returns:
+    bool: True si le token est révoqué et n'a pas encore expiré.
+  """
+  if jti not in _filter():
+    return False
+
+  return RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now()).exists()
+
+
+def revoke(token: Token) -> None:
+
+  """
+  Révoque un token jusqu'à son expiration. Une révocation répétée est ignorée.
+  Le token est ajouté immédiatement au filtre du processus, puis publié aux autres processus après la validation de la
+  transaction lorsque le cache est partagé.
+
+  Args:
+    token (Token): Le token validé à révoquer.
+  """
+  jti = token[api_settings.JTI_CLAIM]
+
+  RevokedToken.objects.bulk_create(
+    [RevokedToken(jti=jti, expires_at=datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc))],
+    ignore_conflicts=True
+  )
+
+  _filter().add(jti)
+
+  if shared_cache():
+    transaction.on_commit(lambda: publish(jti))
@@ -0,0 +1,45 @@
+import time
+from django.core.management.base import BaseCommand
+from user.denylist import invalidate_denylist
+from user.models import RevokedToken
+
+class Command(BaseCommand):
+
+  help = "Supprime par lots les tokens révoqués déjà expirés et allège le filtre de la liste des tokens révoqués."
+
+  def add_arguments(self, parser) -> None:
+
+    """
+    Déclare les options de la commande.
+    """
+    parser.add_argument("--batch-size", default=1000, type=int, help="Nombre de tokens révoqués supprimés par requête.")
+    parser.add_argument(
+      "--interval",
+      default=0,
+      type=float,
+      help="Délai, en secondes, entre deux passages. Si nul, la commande s'arrête après un seul passage."
+    )
+
+  def handle(self, *args, **options) -> None:
+
+    """
+    Purge les tokens révoqués expirés lot par lot, une fois ou en boucle selon l'option `--interval`.
+    """
+    while True:
+
+      pruned = 0
+
+      # Un lot incomplet signifie qu'il ne reste plus de token révoqué expiré
+      while (count := RevokedToken.objects.prune(options["batch_size"])):
+        pruned += count
+        if count < options["batch_size"]:
+          break
+
+      if pruned:
+        invalidate_denylist()
+        self.stdout.write(f"{pruned} token(s) révoqué(s) expiré(s) supprimé(s).")
+
+      if not options["interval"]:
+        break
+
+      time.sleep(options["interval"])
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevokedToken",
+            fields=[
+                (
+                    "jti",
+                    models.CharField(
+                        max_length=64,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="Identifiant du token",
+                    ),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(
+                        db_index=True, verbose_name="Date d'expiration"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Token révoqué",
+                "verbose_name_plural": "Tokens révoqués",
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
 import uuid
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, UserManager
 from django.db import models
+from django.utils import timezone
 
 class AccountUserManager(UserManager):
 
@@ -108,4 +109,46 @@ class User(Person, AbstractBaseUser, PermissionsMixin):
   class Meta:
 
     verbose_name = "Client"
-    verbose_name_plural = "Clients"
\ No newline at end of file
+    verbose_name_plural = "Clients"
+
+
+
+
+class RevokedTokenQuerySet(models.QuerySet):
+
+  def prune(self, batch_size: int = 1000) -> int:
+
+    """
+    Supprime un lot de tokens révoqués déjà expirés, qui ne peuvent plus être présentés.
+    Args:
+      batch_size (int): Le nombre maximal de tokens supprimés.
+    Returns:
+      int: Le nombre de tokens supprimés.
+    """
+    expired = list(self.filter(expires_at__lte=timezone.now()).order_by('expires_at').values_list('jti', flat=True)[:batch_size])
+
+    return RevokedToken.objects.filter(jti__in=expired).delete()[0] if expired else 0
+
+
+class RevokedToken(models.Model):
+
+  jti = models.CharField(max_length=64, primary_key=True, verbose_name="Identifiant du token")
+  expires_at = models.DateTimeField(db_index=True, null=False, verbose_name="Date d'expiration")
+  revoked_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Date de révocation")
+
+  objects = RevokedTokenQuerySet.as_manager()
+
+  class Meta:
+
+    verbose_name = "Token révoqué"
+    verbose_name_plural = "Tokens révoqués"
+
+  def __str__(self) -> str:
+
+    """
+    Retourne une représentation sous forme de chaîne du token révoqué.
+    Returns:
+      str: L'identifiant du token.
+    """
+
+    return self.jti
\ No newline at end of file
@@ -2,9 +2,11 @@ import re
 from datetime import date
 from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from rest_framework_simplejwt.tokens import Token
 from .models import User
+from .tokens import RevocableRefreshToken
 
 COUNTRIES = [
     "Afghanistan", "Afrique du Sud", "Ahvenanmaa", "Albanie", "Algérie", "Allemagne", "Andorre", "Angola", "Anguilla", "Antarctique",
@@ -220,13 +222,20 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
     """
     Obtient le token JWT pour l'utilisateur avec des informations supplémentaires.
+    Le prénom et le nom sont signés dans le token, et recopiés dans les tokens d'accès, ce qui permet à
+    `ClaimsAuthentication` de construire l'utilisateur sans requête.
 
     Args:
       user (User): L'utilisateur pour lequel le token est généré.
     Returns:
       Token: Le token JWT généré pour l'utilisateur.
     """
-    return super().get_token(user)
+    token = super().get_token(user)
+
+    token['firstname'] = user.firstname
+    token['lastname'] = user.lastname
+
+    return token
   
   def validate(self, attrs: dict) -> dict:
 
@@ -250,6 +259,38 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
 
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+
+  # Refuse le rafraîchissement avec un token révoqué à la déconnexion
+  token_class = RevocableRefreshToken
+
+
+
+
+class LogoutSerializer(serializers.Serializer):
+
+  refresh = serializers.CharField(required=False)
+
+  def validate_refresh(self, value: str) -> RevocableRefreshToken:
+
+    """
+    Valide le token de rafraîchissement à révoquer.
+
+    Args:
+      value (str): Le token de rafraîchissement fourni par l'utilisateur.
+    Raises:
+      serializers.ValidationError: Si le token est invalide, expiré ou déjà révoqué.
+    Returns:
+      RevocableRefreshToken: Le token de rafraîchissement validé.
+    """
+    try:
+      return RevocableRefreshToken(value)
+    except TokenError:
+      raise serializers.ValidationError("Token invalide ou expiré.")
+
+
+
+
 class UserLightSerializer(serializers.ModelSerializer):
 
   class Meta:
@@ -1,9 +1,12 @@
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from user.models import User
+from user.serializers import CustomTokenObtainPairSerializer
+from user.tests.test_denylist import SHARED_CACHES
 
 class CheckEmailExistsAPITest(TestCase):
 
@@ -114,6 +117,7 @@ class MeAPITest(TestCase):
     )
     self.url = reverse('me')
     refresh = RefreshToken.for_user(self.user)
+    self.refresh_token = str(refresh)
     self.access_token = str(refresh.access_token)
 
   def test_me_authenticated(self):
@@ -137,6 +141,29 @@ class MeAPITest(TestCase):
     response = self.client.get(self.url)
     self.assertEqual(response.status_code, 401)
 
+  @override_settings(CACHES=SHARED_CACHES)
+  def test_me_reads_token_claims_without_query(self):
+
+    """
+    Teste qu'un token obtenu à la connexion suffit à identifier l'utilisateur, sans requête à la base de données,
+    lorsque le cache est partagé entre les processus.
+    """
+    cache.clear()
+    access_token = str(CustomTokenObtainPairSerializer.get_token(self.user).access_token)
+    self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+    # Construction du filtre des tokens révoqués du processus
+    self.client.get(self.url)
+
+    with self.assertNumQueries(0):
+      response = self.client.get(self.url)
+
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(response.json(), {
+      "firstname": "Marie",
+      "lastname": "Curie"
+    })
+
 
 
 
@@ -147,6 +174,8 @@ class LogoutUserAPITest(TestCase):
     """
     Configure les données de test pour l'API de déconnexion d'utilisateur.
     """
+    cache.clear()
+
     self.client = APIClient()
     self.user = User.objects.create_user(
       email="logoutuser@example.com",
@@ -158,6 +187,7 @@ class LogoutUserAPITest(TestCase):
     )
     self.url = reverse('logout_user')
     refresh = RefreshToken.for_user(self.user)
+    self.refresh_token = str(refresh)
     self.access_token = str(refresh.access_token)
 
   def test_logout_authenticated(self):
@@ -176,4 +206,59 @@ class LogoutUserAPITest(TestCase):
     Teste que l'accès sans authentification est refusé.
     """
     response = self.client.post(self.url)
-    self.assertEqual(response.status_code, 401)
\ No newline at end of file
+    self.assertEqual(response.status_code, 401)
+
+  def test_logout_revokes_tokens(self):
+
+    """
+    Teste qu'après la déconnexion, le token d'accès et le token de rafraîchissement sont refusés.
+    """
+    self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+    response = self.client.post(self.url, {"refresh": self.refresh_token}, format='json')
+    self.assertEqual(response.status_code, 200)
+
+    response = self.client.post(self.url)
+    self.assertEqual(response.status_code, 401)
+
+    self.client.credentials()
+    response = self.client.post(reverse('token_refresh'), {"refresh": self.refresh_token}, format='json')
+    self.assertEqual(response.status_code, 401)
+
+  def test_logout_rejects_foreign_refresh_token(self):
+
+    """
+    Teste que le token de rafraîchissement d'un autre utilisateur n'est pas révoqué.
+    """
+    other = User.objects.create_user(
+      email="other@example.com",
+      password="MotdepasseValide123!",
+      firstname="Anna",
+      lastname="Blanc",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+    other_refresh = str(RefreshToken.for_user(other))
+
+    self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+    response = self.client.post(self.url, {"refresh": other_refresh}, format='json')
+    self.assertEqual(response.status_code, 400)
+
+    response = self.client.post(reverse('token_refresh'), {"refresh": other_refresh}, format='json')
+    self.assertEqual(response.status_code, 200)
+
+  @override_settings(CACHES=SHARED_CACHES)
+  def test_unrevoked_token_checked_without_query(self):
+
+    """
+    Teste qu'un token qui n'a pas été révoqué est accepté sans requête sur la table des tokens révoqués, lorsque le
+    cache est partagé entre les processus.
+    """
+    cache.clear()
+    access_token = str(CustomTokenObtainPairSerializer.get_token(self.user).access_token)
+    self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+    self.client.get(reverse('me'))
+
+    with self.assertNumQueries(0):
+      response = self.client.get(reverse('me'))
+
+    self.assertEqual(response.status_code, 200)
\ No newline at end of file
@@ -0,0 +1,153 @@
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.versions import shared_cache
+from user import denylist
+from user.models import RevokedToken, User
+
+# Cache partagé entre les processus, comme en production, à la place du cache en mémoire des tests
+SHARED_CACHES = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": tempfile.mkdtemp()}}
+
+@override_settings(CACHES=SHARED_CACHES)
+class DenylistTests(TestCase):
+
+  def setUp(self):
+
+    """
+    Vide le cache et crée un utilisateur et son token de rafraîchissement.
+    """
+    cache.clear()
+
+    self.user = User.objects.create_user(
+      email="denylist@example.com",
+      password="MotdepasseValide123!",
+      firstname="Jean",
+      lastname="Dupont",
+      date_of_birth="1990-01-01",
+      country="France"
+    )
+    self.refresh = RefreshToken.for_user(self.user)
+
+  def test_bloom_filter_has_no_false_negative(self):
+
+    """
+    Teste que toutes les clés ajoutées sont retrouvées et que le taux de faux positifs reste proche de celui visé.
+    """
+    bloom = denylist.BloomFilter(1000, 0.01)
+    for i in range(1000):
+      bloom.add(f"ajout-{i}")
+
+    self.assertTrue(all(f"ajout-{i}" in bloom for i in range(1000)))
+    self.assertLess(sum(f"absent-{i}" in bloom for i in range(10000)), 300)
+
+  def test_revoke_and_check(self):
+
+    """
+    Teste qu'un token révoqué est reconnu, qu'une révocation répétée est ignorée, et qu'un token non révoqué est écarté
+    par le filtre sans requête.
+    """
+    jti = self.refresh['jti']
+    self.assertFalse(denylist.is_revoked(jti))
+
+    denylist.revoke(self.refresh)
+    denylist.revoke(self.refresh)
+
+    self.assertTrue(denylist.is_revoked(jti))
+    self.assertEqual(RevokedToken.objects.count(), 1)
+
+    with self.assertNumQueries(0):
+      self.assertFalse(denylist.is_revoked(self.refresh.access_token['jti']))
+
+  def test_revocation_published_to_other_processes(self):
+
+    """
+    Teste qu'une révocation publiée par un autre processus est ajoutée au filtre sans le reconstruire, et qu'une
+    révocation publiée qui n'est plus dans le cache fait reconstruire le filtre.
+    """
+    denylist.is_revoked("inconnu")
+    expires_at = timezone.now() + timedelta(days=1)
+
+    RevokedToken.objects.create(jti="autre", expires_at=expires_at)
+    denylist.publish("autre")
+
+    # Seule la confirmation du filtre est faite sur la base de données
+    with self.assertNumQueries(1):
+      self.assertTrue(denylist.is_revoked("autre"))
+
+    RevokedToken.objects.create(jti="perdu", expires_at=expires_at)
+    denylist.publish("perdu")
+    cache.delete(denylist.REVOKED_KEY.format(2))
+
+    with self.assertNumQueries(2):
+      self.assertTrue(denylist.is_revoked("perdu"))
+
+  def test_prune_command(self):
+
+    """
+    Teste que la commande ne supprime que les tokens révoqués expirés, lot par lot.
+    """
+    now = timezone.now()
+    RevokedToken.objects.bulk_create(
+      [RevokedToken(jti=f"expire-{i}", expires_at=now - timedelta(minutes=1)) for i in range(5)]
+      + [RevokedToken(jti="actif", expires_at=now + timedelta(days=1))]
+    )
+
+    out = StringIO()
+    call_command("prune_revoked_tokens", "--batch-size", "2", stdout=out)
+
+    self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ["actif"])
+    self.assertIn("5 token(s)", out.getvalue())
+
+    # La purge fait reconstruire le filtre du processus
+    with self.assertNumQueries(1):
+      self.assertFalse(denylist.is_revoked("expire-0"))
+
+
+
+
+class DenylistWithoutSharedCacheTests(TestCase):
+
+  def setUp(self):
+
+    """
+    Vide le cache et oublie le filtre du processus.
+    """
+    cache.clear()
+    denylist._local = None
+
+  def test_local_filter_avoids_database(self):
+
+    """
+    Teste que, sans cache partagé, le filtre du processus écarte sans requête les tokens qui n'ont jamais été révoqués.
+    """
+    RevokedToken.objects.create(jti="autre", expires_at=timezone.now() + timedelta(days=1))
+
+    self.assertFalse(shared_cache())
+    self.assertTrue(denylist.is_revoked("autre"))
+
+    with self.assertNumQueries(0):
+      self.assertFalse(denylist.is_revoked("inconnu"))
+
+  @override_settings(LOCAL_CACHE_MAX_AGE=0)
+  def test_local_filter_reads_recent_revocations(self):
+
+    """
+    Teste que, sans cache partagé, une révocation faite par un autre processus est lue lors de la lecture suivante du
+    filtre, en une requête limitée aux révocations récentes.
+    """
+    self.assertFalse(denylist.is_revoked("autre"))
+
+    RevokedToken.objects.create(jti="autre", expires_at=timezone.now() + timedelta(days=1))
+
+    with CaptureQueriesContext(connection) as context:
+      self.assertTrue(denylist.is_revoked("autre"))
+
+    self.assertEqual(len(context.captured_queries), 2)
+    self.assertIn("revoked_at", context.captured_queries[0]['sql'])
@@ -327,6 +327,16 @@ class CustomTokenObtainPairSerializerTests(TestCase):
     """
     token = CustomTokenObtainPairSerializer.get_token(self.user)
     self.assertIsInstance(token, RefreshToken)
+
+  def test_get_token_adds_name_claims(self):
+
+    """
+    Teste que le prénom et le nom de l'utilisateur sont signés dans le token et recopiés dans le token d'accès.
+    """
+    token = CustomTokenObtainPairSerializer.get_token(self.user)
+
+    self.assertEqual((token['firstname'], token['lastname']), ("Token", "User"))
+    self.assertEqual((token.access_token['firstname'], token.access_token['lastname']), ("Token", "User"))
   
   def test_validate_with_valid_credentials(self):
 
@@ -0,0 +1,34 @@
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .denylist import is_revoked
+
+class RevocableTokenMixin:
+
+  """
+  Refuse les jetons révoqués à la déconnexion, après les vérifications de signature, d'expiration et de type.
+  """
+
+  def verify(self) -> None:
+
+    """
+    Vérifie le jeton, puis lève une `TokenError` s'il figure dans la liste des jetons révoqués.
+    """
+    super().verify()
+
+    if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+      raise TokenError("Le jeton a été révoqué.")
+
+
+
+
+class RevocableAccessToken(RevocableTokenMixin, AccessToken):
+
+  pass
+
+
+
+
+class RevocableRefreshToken(RevocableTokenMixin, RefreshToken):
+
+  access_token_class = RevocableAccessToken
\ No newline at end of file